@@ -0,0 +1,378 @@
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import click
+
+from mock_scc_server import (
+    DEFAULT_PORT,
+    MSP_TENANT_UID,
+    MockSccConfig,
+    create_mock_server,
+    mock_api_token,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FLOWS = ["onboard_ftds", "provision_tenant", "upgrade_ftd", "upgrade_asa"]
+DEFAULT_FLEET_SIZES = [10, 100, 1000, 10000]
+BENCHMARK_API_USER = "benchmark-api-only-user"
+# any UID will do, the mock server does not check access policies
+BENCHMARK_ACCESS_POLICY_UID = "00000000-0000-0000-0000-0000000000ac"
+
+
+def write_ftd_ztp_csv(file_path: str, fleet_size: int) -> None:
+    with open(file_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "serial_number", "admin_password", "licenses"])
+        for index in range(fleet_size):
+            writer.writerow(
+                [
+                    f"bench-ftd-{index:05d}",
+                    f"JAD{index:08d}",
+                    "Adm1n-pass",
+                    "BASE;THREAT",
+                ]
+            )
+
+
+def write_users_csv(file_path: str, user_count: int) -> None:
+    with open(file_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["username", "role", "api_only_user"])
+        for index in range(user_count):
+            writer.writerow(
+                [f"bench-user-{index:05d}@example.com", "ROLE_READ_ONLY", "false"]
+            )
+
+
+def build_invocations(
+    flow: str,
+    fleet_size: int,
+    server,
+    work_directory: str,
+    max_upgrades: int,
+) -> List[List[str]]:
+    credentials = ["--region", "localhost", "--api-token", mock_api_token(), "--batch"]
+    if flow == "onboard_ftds":
+        tenant_uid = server.state.new_uid()
+        server.state.add_tenant(tenant_uid, f"bench-{fleet_size}", "Benchmark")
+        server.state.add_user(tenant_uid, BENCHMARK_API_USER, "ROLE_SUPER_ADMIN", True)
+        ftd_ztp_csv_file = os.path.join(work_directory, "ftds.csv")
+        write_ftd_ztp_csv(ftd_ztp_csv_file, fleet_size)
+        return [
+            [
+                "onboard_ftds.py",
+                "--tenant-uid",
+                tenant_uid,
+                "--fmc-access-policy-uid",
+                BENCHMARK_ACCESS_POLICY_UID,
+                "--username",
+                BENCHMARK_API_USER,
+                # ZTP, since registering with a CLI key waits for someone to paste the key into the FTD
+                "--ftd-ztp-csv-file",
+                ftd_ztp_csv_file,
+                "--no-token-cache",
+                *credentials,
+            ]
+        ]
+    if flow == "provision_tenant":
+        users_csv_file = os.path.join(work_directory, "users.csv")
+        write_users_csv(users_csv_file, fleet_size)
+        return [
+            [
+                "provision_tenant.py",
+                "--tenant-name",
+                f"bench-{fleet_size}",
+                "--display-name",
+                f"Benchmark tenant with {fleet_size} users",
+                "--users-csv-file",
+                users_csv_file,
+                "--provision-cdfmc",
+                "yes",
+                *credentials,
+            ]
+        ]
+
+    # upgrades are triggered one device per invocation, on a sample of the fleet
+    device_type = "CDFMC_MANAGED_FTD" if flow == "upgrade_ftd" else "ASA"
+    devices = [
+        device
+        for device in server.state.devices[MSP_TENANT_UID].values()
+        if device["deviceType"] == device_type
+        and device["connectivityState"] == "ONLINE"
+    ][:max_upgrades]
+    if flow == "upgrade_ftd":
+        return [
+            [
+                "upgrade_ftd.py",
+                *credentials,
+                "upgrade",
+                "--ftd-uid",
+                device["uid"],
+                "--upgrade-package-uid",
+                "package-7.6.0",
+            ]
+            for device in devices
+        ]
+    return [
+        [
+            "upgrade_asa.py",
+            *credentials,
+            "upgrade",
+            "--asa-uid",
+            device["uid"],
+            "--software-version",
+            "9.20(3)",
+            "--asdm-version",
+            "7.22(1)",
+        ]
+        for device in devices
+    ]
+
+
+def run_invocation(
+    invocation: List[str], env: Dict[str, str], log_file_path: str
+) -> Tuple[float, float, int]:
+    """Returns the wall time in seconds, the peak RSS in MB and the exit code of the invocation."""
+    with open(log_file_path, "ab") as log_file:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, *invocation],
+            cwd=REPO_ROOT,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=log_file,
+        )
+        # wait4 rather than wait, for the resource usage of this child alone
+        _, status, rusage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return wall_seconds, rusage.ru_maxrss / 1024, process.returncode
+
+
+def stage_breakdown(trace_file_paths: List[str]) -> Dict[str, Dict]:
+    durations_ms: Dict[str, List[float]] = defaultdict(list)
+    for trace_file_path in trace_file_paths:
+        if not os.path.exists(trace_file_path):
+            continue
+        with open(trace_file_path, "r") as file:
+            for line in file:
+                span = json.loads(line)
+                if span["duration_seconds"] is not None:
+                    durations_ms[span["name"]].append(span["duration_seconds"] * 1000)
+    return {
+        name: {
+            "count": len(durations),
+            "total_ms": round(sum(durations), 1),
+            "p50_ms": round(statistics.median(durations), 1),
+            "p95_ms": round(
+                sorted(durations)[max(int(len(durations) * 0.95) - 1, 0)], 1
+            ),
+        }
+        for name, durations in sorted(
+            durations_ms.items(), key=lambda item: -sum(item[1])
+        )
+    }
+
+
+def run_flow(
+    flow: str, fleet_size: int, config: MockSccConfig, max_upgrades: int, env: Dict
+) -> Dict:
+    config.devices = fleet_size
+    server = create_mock_server(config, port=DEFAULT_PORT)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="scc-benchmark-") as work_directory:
+            invocations = build_invocations(
+                flow, fleet_size, server, work_directory, max_upgrades
+            )
+            server.state.reset_stats()
+            log_file_path = os.path.join(work_directory, "output.log")
+            trace_file_paths = []
+            wall_seconds, peak_rss_mb, failures = 0.0, 0.0, 0
+            for index, invocation in enumerate(invocations):
+                trace_file_path = os.path.join(work_directory, f"trace-{index}.jsonl")
+                trace_file_paths.append(trace_file_path)
+                # a fresh home directory keeps the user's credentials and caches out of the measurements
+                invocation_env = {
+                    **env,
+                    "HOME": work_directory,
+                    "SCC_TRACE_FILE": trace_file_path,
+                }
+                seconds, rss_mb, exit_code = run_invocation(
+                    invocation, invocation_env, log_file_path
+                )
+                wall_seconds += seconds
+                peak_rss_mb = max(peak_rss_mb, rss_mb)
+                failures += exit_code != 0
+            stats = server.state.stats()
+            result = {
+                "flow": flow,
+                "fleet_size": fleet_size,
+                "invocations": len(invocations),
+                "failed_invocations": failures,
+                "wall_seconds": round(wall_seconds, 2),
+                "peak_rss_mb": round(peak_rss_mb, 1),
+                "api_calls": stats["total_requests"],
+                "api_calls_per_endpoint": stats["requests"],
+                "rate_limited": stats["rate_limited"],
+                "stages": stage_breakdown(trace_file_paths),
+            }
+            if failures:
+                with open(log_file_path, "r", errors="replace") as log_file:
+                    result["last_output"] = log_file.read()[-2000:]
+            return result
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def last_results(history_file: str) -> Dict[Tuple[str, int], Dict]:
+    if not history_file or not os.path.exists(history_file):
+        return {}
+    with open(history_file, "r") as file:
+        lines = [line for line in file if line.strip()]
+    if len(lines) == 0:
+        return {}
+    return {
+        (result["flow"], result["fleet_size"]): result
+        for result in json.loads(lines[-1])["results"]
+    }
+
+
+@click.command(
+    help="Run the onboarding, provisioning and upgrade scripts end to end against the mock SCC API, and record wall time, API calls, peak RSS and time per stage."
+)
+@click.option(
+    "--flow",
+    "flows",
+    type=click.Choice(FLOWS),
+    multiple=True,
+    help="The flows to run. Defaults to all of them.",
+)
+@click.option(
+    "--fleet-size",
+    "fleet_sizes",
+    type=int,
+    multiple=True,
+    help=f"Number of devices (or users, for provision_tenant). Defaults to {', '.join(map(str, DEFAULT_FLEET_SIZES))}.",
+)
+@click.option(
+    "--max-upgrades",
+    type=int,
+    default=10,
+    show_default=True,
+    help="Number of devices upgraded in the upgrade flows, one invocation each.",
+)
+@click.option("--latency-ms", type=float, default=5, show_default=True)
+@click.option("--transaction-seconds", type=float, default=0, show_default=True)
+@click.option("--rate-limit-fraction", type=float, default=0, show_default=True)
+@click.option(
+    "--client-requests-per-second",
+    type=float,
+    default=1000,
+    show_default=True,
+    help="SCC_REQUESTS_PER_SECOND for the scripts; the default keeps client-side throttling out of the measurements.",
+)
+@click.option(
+    "--history-file",
+    type=str,
+    default=None,
+    help="Append the results to this JSON lines file, to track them over time.",
+)
+@click.option(
+    "--max-regression-percent",
+    type=float,
+    default=None,
+    help="Exit with a non-zero status if a flow's wall time or API calls grew by more than this since the last run in the history file.",
+)
+def main(
+    flows: Tuple[str],
+    fleet_sizes: Tuple[int],
+    max_upgrades: int,
+    latency_ms: float,
+    transaction_seconds: float,
+    rate_limit_fraction: float,
+    client_requests_per_second: float,
+    history_file: str,
+    max_regression_percent: float,
+) -> None:
+    config = MockSccConfig(
+        latency_ms=latency_ms,
+        latency_jitter_ms=latency_ms / 2,
+        transaction_seconds=transaction_seconds,
+        rate_limit_fraction=rate_limit_fraction,
+    )
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("SCC_METRICS_PORT", "SCC_METRICS_TEXTFILE")
+    }
+    env["SCC_REQUESTS_PER_SECOND"] = str(client_requests_per_second)
+    env["SCC_REQUEST_BURST"] = str(int(client_requests_per_second))
+    previous_results = last_results(history_file)
+
+    results = []
+    regressions = []
+    for fleet_size in fleet_sizes or DEFAULT_FLEET_SIZES:
+        for flow in flows or FLOWS:
+            result = run_flow(flow, fleet_size, config, max_upgrades, env)
+            results.append(result)
+            slowest_stages = ", ".join(
+                f"{name} {stage['total_ms'] / 1000:.1f}s"
+                for name, stage in list(result["stages"].items())[:3]
+            )
+            click.echo(
+                f"{flow:<18} {fleet_size:>6} devices  {result['wall_seconds']:>8.2f} s  "
+                f"{result['api_calls']:>7} API calls  {result['peak_rss_mb']:>6.1f} MB  "
+                f"failed {result['failed_invocations']}/{result['invocations']}  slowest: {slowest_stages}"
+            )
+            if result["failed_invocations"]:
+                click.echo(result["last_output"], err=True)
+
+            previous = previous_results.get((flow, fleet_size))
+            if max_regression_percent is not None and previous is not None:
+                for measure in ("wall_seconds", "api_calls"):
+                    if result[measure] > previous[measure] * (
+                        1 + max_regression_percent / 100
+                    ):
+                        regressions.append(
+                            f"{flow} with {fleet_size} devices: {measure} went from {previous[measure]} to {result[measure]}"
+                        )
+
+    if history_file:
+        with open(history_file, "a") as file:
+            file.write(
+                json.dumps(
+                    {
+                        "timestamp": int(time.time()),
+                        "python": sys.version.split()[0],
+                        "mock": {
+                            "latency_ms": latency_ms,
+                            "transaction_seconds": transaction_seconds,
+                            "rate_limit_fraction": rate_limit_fraction,
+                        },
+                        "results": results,
+                    }
+                )
+                + "\n"
+            )
+
+    for regression in regressions:
+        click.echo(f"Regression: {regression}", err=True)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
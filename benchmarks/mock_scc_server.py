@@ -0,0 +1,923 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import click
+import jwt
+
+# the localhost region of utils/region_mapping.py
+DEFAULT_PORT = 3077
+MOCK_SIGNING_KEY = "mock-scc-server-signing-key-not-a-secret"
+MSP_TENANT_UID = "00000000-0000-0000-0000-000000000001"
+FTD_VERSIONS = ["7.2.5", "7.2.8", "7.4.1", "7.4.2", "7.6.0"]
+ASA_VERSIONS = [("9.18(4)", "7.18(2)"), ("9.20(2)", "7.20(2)"), ("9.20(3)", "7.22(1)")]
+
+
+@dataclass
+class MockSccConfig:
+    latency_ms: float = 20
+    latency_jitter_ms: float = 10
+    transaction_seconds: float = 2
+    transaction_failure_rate: float = 0
+    error_rate: float = 0
+    # 429s are sent for this fraction of requests, and for every request above requests_per_second
+    rate_limit_fraction: float = 0
+    requests_per_second: float = 0
+    retry_after_seconds: int = 1
+    devices: int = 100
+    # MSP-managed tenants, each with devices devices and an API-only user named <tenant name>-api-only-user
+    tenants: int = 0
+    # upgraded devices are UNREACHABLE for this long after their upgrade finishes, as if rebooting
+    reboot_seconds: float = 0
+    seed: int = 1
+
+
+def mock_api_token(tenant_uid: str = MSP_TENANT_UID, name: str = "api-user") -> str:
+    """Returns an API token the mock server accepts for the tenant."""
+    return jwt.encode(
+        {
+            "parentId": tenant_uid,
+            "name": name,
+            "iat": int(time.time()),
+            "jti": str(uuid.uuid4()),
+        },
+        MOCK_SIGNING_KEY,
+        algorithm="HS256",
+    )
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _page(items: List[Dict], limit: int, offset: int) -> Dict:
+    return {
+        "count": len(items),
+        "limit": limit,
+        "offset": offset,
+        "items": items[offset : offset + limit],
+    }
+
+
+def _train_of(version: str) -> str:
+    return ".".join(version.split(".")[:2])
+
+
+def _value_pattern(value: str) -> str:
+    # an unescaped * is a wildcard, and \x is a literal x
+    return "".join(
+        ".*" if token == "*" else re.escape(token[-1])
+        for token in re.findall(r"\\.|.", value)
+    )
+
+
+def _matches_query(item: Dict, q: Optional[str]) -> bool:
+    # supports the subset of the Lucene syntax the scripts use: field:value terms, joined with AND, with OR groups
+    # in parentheses, * wildcards and backslash escapes
+    if not q:
+        return True
+    for term in re.split(r"\s+AND\s+", q.strip()):
+        field_name, _, value = term.partition(":")
+        value = value.strip()
+        if value.startswith("(") and value.endswith(")") and not value.endswith("\\)"):
+            value = value[1:-1]
+        alternatives = [
+            alternative.strip()
+            for alternative in value.split(" OR ")
+            if alternative.strip()
+        ]
+        actual = str(item.get(field_name.strip(), ""))
+        if not any(
+            re.fullmatch(_value_pattern(alternative.strip('"')), actual)
+            for alternative in alternatives
+        ):
+            return False
+    return True
+
+
+@dataclass
+class _Transaction:
+    uid: str
+    tenant_uid: str
+    transaction_type: str
+    entity_uid: Optional[str]
+    submitted_at: float
+    duration_seconds: float
+    fails: bool
+    details: Dict[str, str] = field(default_factory=dict)
+    on_done: Optional[Callable[[], None]] = None
+    settled: bool = False
+
+    def status(self, now: float) -> str:
+        elapsed = now - self.submitted_at
+        if elapsed >= self.duration_seconds:
+            return "ERROR" if self.fails else "DONE"
+        return "PENDING" if elapsed < self.duration_seconds / 4 else "IN_PROGRESS"
+
+    def to_json(self, now: float) -> Dict:
+        status = self.status(now)
+        return {
+            "transactionUid": self.uid,
+            "tenantUid": self.tenant_uid,
+            "transactionType": self.transaction_type,
+            "entityUid": self.entity_uid,
+            "cdoTransactionStatus": status,
+            "transactionDetails": self.details,
+            "errorMessage": "Injected failure" if status == "ERROR" else None,
+            "submissionTime": datetime.fromtimestamp(
+                self.submitted_at, timezone.utc
+            ).isoformat(),
+            "lastUpdatedTime": _now(),
+            "transactionPollingUrl": f"/v1/transactions/{self.uid}",
+        }
+
+
+class MockSccState:
+    """Tenants, inventories, users, transactions and CLI results of the mock server, plus request statistics."""
+
+    def __init__(self, config: MockSccConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.RLock()
+        self.tenants: Dict[str, Dict] = {}
+        self.devices: Dict[str, Dict[str, Dict]] = {}
+        self.users: Dict[str, Dict[str, Dict]] = {}
+        self.domain_uids: Dict[str, str] = {}
+        self.transactions: Dict[str, _Transaction] = {}
+        self.pending_transactions: List[_Transaction] = []
+        self.cli_results: Dict[str, Dict] = {}
+        # like SCC, generating an API token for a user revokes the user's previous token
+        self.api_tokens: Dict[str, str] = {}
+        self.revoked_api_tokens: set = set()
+        self.request_counts: Counter = Counter()
+        self.rate_limited_count = 0
+        self.errors_count = 0
+        self._rate_window_started_at = time.monotonic()
+        self._rate_window_count = 0
+        self.add_tenant(MSP_TENANT_UID, "mock-msp", "Mock MSP portal")
+        for index in range(config.devices):
+            self._seed_device(MSP_TENANT_UID, index)
+        for tenant_index in range(config.tenants):
+            tenant = self.add_tenant(
+                self.new_uid(), f"tenant-{tenant_index:04d}", f"Tenant {tenant_index}"
+            )
+            self.add_user(
+                tenant["uid"],
+                f"{tenant['name']}-api-only-user",
+                "ROLE_SUPER_ADMIN",
+                True,
+            )
+            for index in range(config.devices):
+                self._seed_device(tenant["uid"], index)
+
+    def new_uid(self) -> str:
+        with self.lock:
+            return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def add_tenant(self, tenant_uid: str, name: str, display_name: str) -> Dict:
+        tenant = {
+            "uid": tenant_uid,
+            "name": name,
+            "displayName": display_name,
+            "region": "UNKNOWN",
+        }
+        self.tenants[tenant_uid] = tenant
+        self.devices.setdefault(tenant_uid, {})
+        self.users.setdefault(tenant_uid, {})
+        return tenant
+
+    def add_user(
+        self, tenant_uid: str, username: str, role: str, api_only_user: bool
+    ) -> Dict:
+        user = {
+            "uid": self.new_uid(),
+            "name": username,
+            "roles": [role],
+            "apiOnlyUser": api_only_user,
+        }
+        with self.lock:
+            self.users[tenant_uid][user["uid"]] = user
+        return user
+
+    def _add_cdfmc(self, tenant_uid: str) -> None:
+        self.domain_uids[tenant_uid] = self.new_uid()
+
+    def _seed_device(self, tenant_uid: str, index: int) -> None:
+        is_asa = index % 2 == 1
+        connectivity_state = "ONLINE" if self.random.random() < 0.95 else "UNREACHABLE"
+        if is_asa:
+            software_version, asdm_version = self.random.choice(ASA_VERSIONS[:2])
+        else:
+            software_version, asdm_version = self.random.choice(FTD_VERSIONS[:3]), None
+        device = {
+            "uid": self.new_uid(),
+            "name": f"{'asa' if is_asa else 'ftd'}-{index:05d}",
+            "deviceType": "ASA" if is_asa else "CDFMC_MANAGED_FTD",
+            "connectivityState": connectivity_state,
+            "softwareVersion": software_version,
+            "asdmVersion": asdm_version,
+            "hardwareModel": "ASA5516" if is_asa else "Cisco Firepower 2110",
+            "address": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}:443",
+        }
+        self.devices[tenant_uid][device["uid"]] = device
+        if tenant_uid not in self.domain_uids and not is_asa:
+            self._add_cdfmc(tenant_uid)
+
+    def start_transaction(
+        self,
+        tenant_uid: str,
+        transaction_type: str,
+        entity_uid: Optional[str],
+        on_done: Callable[[], None] = None,
+        details: Dict[str, str] = None,
+    ) -> Dict:
+        with self.lock:
+            transaction = _Transaction(
+                uid=self.new_uid(),
+                tenant_uid=tenant_uid,
+                transaction_type=transaction_type,
+                entity_uid=entity_uid,
+                submitted_at=time.time(),
+                duration_seconds=self.config.transaction_seconds
+                * self.random.uniform(0.5, 1.5),
+                fails=self.random.random() < self.config.transaction_failure_rate,
+                details=details or {},
+                on_done=on_done,
+            )
+            self.transactions[transaction.uid] = transaction
+            self.pending_transactions.append(transaction)
+            return transaction.to_json(time.time())
+
+    def settle_transactions(self) -> None:
+        # side effects of transactions (a device coming online, a new version) are applied once they are done
+        now = time.time()
+        with self.lock:
+            still_pending = []
+            for transaction in self.pending_transactions:
+                status = transaction.status(now)
+                if status == "DONE" and transaction.on_done is not None:
+                    transaction.on_done()
+                if status in ("DONE", "ERROR"):
+                    transaction.settled = True
+                else:
+                    still_pending.append(transaction)
+            self.pending_transactions = still_pending
+
+    def admit_request(self) -> Tuple[bool, bool]:
+        """Returns whether the request should be rate limited, and whether it should fail with a server error."""
+        with self.lock:
+            now = time.monotonic()
+            if now - self._rate_window_started_at >= 1:
+                self._rate_window_started_at = now
+                self._rate_window_count = 0
+            self._rate_window_count += 1
+            over_limit = (
+                self.config.requests_per_second > 0
+                and self._rate_window_count > self.config.requests_per_second
+            )
+            rate_limited = (
+                over_limit or self.random.random() < self.config.rate_limit_fraction
+            )
+            failed = not rate_limited and self.random.random() < self.config.error_rate
+            if rate_limited:
+                self.rate_limited_count += 1
+            if failed:
+                self.errors_count += 1
+            return rate_limited, failed
+
+    def latency_seconds(self) -> float:
+        with self.lock:
+            jitter = self.random.uniform(
+                -self.config.latency_jitter_ms, self.config.latency_jitter_ms
+            )
+        return max(self.config.latency_ms + jitter, 0) / 1000
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "requests": dict(self.request_counts),
+                "total_requests": sum(self.request_counts.values()),
+                "rate_limited": self.rate_limited_count,
+                "errors": self.errors_count,
+                "transactions": len(self.transactions),
+                "pending_transactions": len(self.pending_transactions),
+            }
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.request_counts.clear()
+            self.rate_limited_count = 0
+            self.errors_count = 0
+
+
+class MockSccApi:
+    """The endpoints of the mock server; each handler gets the tenant of the caller's token and returns (status, body)."""
+
+    def __init__(self, state: MockSccState):
+        self.state = state
+        self.routes: List[Tuple[str, re.Pattern, Callable, str]] = []
+        for method, path, handler in [
+            ("GET", "/v1/token", self.get_token),
+            ("GET", "/v1/transactions/{uid}", self.get_transaction),
+            ("GET", "/v1/inventory/devices", self.get_devices),
+            ("GET", "/v1/inventory/devices/{uid}", self.get_device),
+            ("GET", "/v1/inventory/managers", self.get_managers),
+            ("POST", "/v1/inventory/devices/ftds", self.create_ftd),
+            ("POST", "/v1/inventory/devices/ftds/register", self.register_ftd),
+            ("POST", "/v1/inventory/devices/ftds/ztp", self.onboard_ftd_ztp),
+            (
+                "GET",
+                "/v1/inventory/devices/ftds/{uid}/upgrades/versions",
+                self.get_ftd_versions,
+            ),
+            (
+                "POST",
+                "/v1/inventory/devices/ftds/{uid}/upgrades/trigger",
+                self.upgrade_ftd,
+            ),
+            (
+                "GET",
+                "/v1/inventory/devices/asas/{uid}/upgrades/versions",
+                self.get_asa_versions,
+            ),
+            (
+                "POST",
+                "/v1/inventory/devices/asas/{uid}/upgrades/trigger",
+                self.upgrade_asa,
+            ),
+            ("POST", "/v1/inventory/devices/asas/cli/execute", self.execute_cli),
+            ("GET", "/v1/cli/results/{uid}", self.get_cli_result),
+            ("POST", "/v1/msp/tenants/create", self.create_tenant),
+            ("GET", "/v1/msp/tenants", self.get_tenants),
+            ("GET", "/v1/msp/tenants/{uid}", self.get_tenant),
+            ("POST", "/v1/msp/tenants/{uid}/users", self.add_users),
+            ("GET", "/v1/msp/tenants/{uid}/users", self.get_users),
+            (
+                "POST",
+                "/v1/msp/tenants/{uid}/users/{user_uid}/token",
+                self.generate_token,
+            ),
+            ("POST", "/v1/msp/tenants/{uid}/cdfmc", self.provision_cdfmc),
+            (
+                "POST",
+                "/v1/cdfmc/api/fmc_config/v1/domain/{uid}/policy/accesspolicies",
+                self.create_access_policy,
+            ),
+            (
+                "POST",
+                "/v1/cdfmc/api/fmc_config/v1/domain/{uid}/policy/accesspolicies/{policy_uid}/accessrules",
+                self.create_access_rule,
+            ),
+            (
+                "GET",
+                "/v1/cdfmc/api/fmc_config/v1/domain/{uid}/object/networks",
+                self.get_networks,
+            ),
+            (
+                "GET",
+                "/v1/cdfmc/api/fmc_config/v1/domain/{uid}/object/urlcategories",
+                self.get_url_categories,
+            ),
+        ]:
+            pattern = re.compile(
+                "^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path) + "$"
+            )
+            self.routes.append((method, pattern, handler, path))
+
+    def handle(
+        self, method: str, path: str, query: Dict[str, str], body: Any, tenant_uid: str
+    ) -> Tuple[int, Any, str]:
+        for route_method, pattern, handler, route_path in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                self.state.settle_transactions()
+                status, response = handler(
+                    tenant_uid=tenant_uid, query=query, body=body, **match.groupdict()
+                )
+                return status, response, f"{method} {route_path}"
+        return 404, {"error": f"No mock for {method} {path}"}, f"{method} (unknown)"
+
+    def _tenant_devices(self, tenant_uid: str) -> Dict[str, Dict]:
+        return self.state.devices.setdefault(tenant_uid, {})
+
+    def get_token(self, tenant_uid, query, body):
+        return 200, {
+            "tenantUid": tenant_uid,
+            "name": "api-user",
+            "roles": ["ROLE_SUPER_ADMIN"],
+        }
+
+    def get_transaction(self, tenant_uid, query, body, uid):
+        transaction = self.state.transactions.get(uid)
+        if transaction is None:
+            return 404, {"error": f"Transaction {uid} not found"}
+        return 200, transaction.to_json(time.time())
+
+    def get_devices(self, tenant_uid, query, body):
+        with self.state.lock:
+            devices = [
+                device
+                for device in self._tenant_devices(tenant_uid).values()
+                if _matches_query(device, query.get("q"))
+            ]
+        return 200, _page(
+            devices, int(query.get("limit", 50)), int(query.get("offset", 0))
+        )
+
+    def get_device(self, tenant_uid, query, body, uid):
+        device = self._tenant_devices(tenant_uid).get(uid)
+        if device is None:
+            return 404, {"error": f"Device {uid} not found"}
+        return 200, device
+
+    def get_managers(self, tenant_uid, query, body):
+        domain_uid = self.state.domain_uids.get(tenant_uid)
+        managers = []
+        if domain_uid is not None:
+            managers.append(
+                {
+                    "uid": domain_uid,
+                    "name": "cdFMC",
+                    "deviceType": "CDFMC",
+                    "fmcDomainUid": domain_uid,
+                    "connectivityState": "ONLINE",
+                }
+            )
+        managers = [
+            manager for manager in managers if _matches_query(manager, query.get("q"))
+        ]
+        return 200, _page(
+            managers, int(query.get("limit", 50)), int(query.get("offset", 0))
+        )
+
+    def create_ftd(self, tenant_uid, query, body):
+        device_uid = self.state.new_uid()
+        with self.state.lock:
+            self._tenant_devices(tenant_uid)[device_uid] = {
+                "uid": device_uid,
+                "name": body["name"],
+                "deviceType": "CDFMC_MANAGED_FTD",
+                "connectivityState": "PENDING_SETUP",
+                "cdFmcInfo": {
+                    "cliKey": f"configure manager add mock.localhost {device_uid[:8]} {device_uid[-8:]}",
+                    "natId": device_uid[-8:],
+                    "regKey": device_uid[:8],
+                },
+            }
+        return 202, self.state.start_transaction(tenant_uid, "CREATE_FTD", device_uid)
+
+    def register_ftd(self, tenant_uid, query, body):
+        device = self._tenant_devices(tenant_uid).get(body.get("ftdUid"))
+        if device is None:
+            return 404, {"error": f"Device {body.get('ftdUid')} not found"}
+
+        def on_done():
+            device["connectivityState"] = "ONLINE"
+            device["softwareVersion"] = self.state.random.choice(FTD_VERSIONS[:3])
+
+        return 202, self.state.start_transaction(
+            tenant_uid, "REGISTER_FTD", device["uid"], on_done
+        )
+
+    def onboard_ftd_ztp(self, tenant_uid, query, body):
+        device_uid = self.state.new_uid()
+
+        def on_done():
+            self._tenant_devices(tenant_uid)[device_uid] = {
+                "uid": device_uid,
+                "name": body["name"],
+                "deviceType": "CDFMC_MANAGED_FTD",
+                "connectivityState": "ONLINE",
+                "softwareVersion": self.state.random.choice(FTD_VERSIONS[:3]),
+                "serial": body.get("serialNumber"),
+            }
+
+        return 202, self.state.start_transaction(
+            tenant_uid, "ONBOARD_FTD_ZTP", device_uid, on_done
+        )
+
+    def get_ftd_versions(self, tenant_uid, query, body, uid):
+        device = self._tenant_devices(tenant_uid).get(uid)
+        if device is None:
+            return 404, {"error": f"Device {uid} not found"}
+        current_version = device.get("softwareVersion") or ""
+        # like real FTDs, a device can only be upgraded up to the release train after its own
+        trains = sorted({_train_of(version) for version in FTD_VERSIONS})
+        next_train = trains[
+            min(
+                len(trains) - 1,
+                sum(train <= _train_of(current_version) for train in trains),
+            )
+        ]
+        newer_versions = [
+            version
+            for version in FTD_VERSIONS
+            if version > current_version and _train_of(version) <= next_train
+        ]
+        items = [
+            {
+                "softwareVersion": version,
+                "upgradePackageUid": f"package-{version}",
+                "isSuggestedVersion": version == newer_versions[-1],
+                "upgradeType": "UPGRADE",
+                "filename": f"Cisco_FTD_Upgrade-{version}.sh.REL.tar",
+            }
+            for version in newer_versions
+        ]
+        return 200, {"count": len(items), "items": items}
+
+    def upgrade_ftd(self, tenant_uid, query, body, uid):
+        device = self._tenant_devices(tenant_uid).get(uid)
+        if device is None:
+            return 404, {"error": f"Device {uid} not found"}
+        package_uid = body.get("upgradePackageUid", "")
+        if not package_uid.startswith("package-"):
+            return 400, {"error": f"Unknown upgrade package {package_uid}"}
+
+        def on_done():
+            device["softwareVersion"] = package_uid[len("package-") :]
+            self._reboot(device)
+
+        return 202, self.state.start_transaction(
+            tenant_uid, "UPGRADE_FTD", uid, on_done
+        )
+
+    def get_asa_versions(self, tenant_uid, query, body, uid):
+        device = self._tenant_devices(tenant_uid).get(uid)
+        if device is None:
+            return 404, {"error": f"Device {uid} not found"}
+        items = [
+            {"softwareVersion": software_version, "asdmVersion": asdm_version}
+            for software_version, asdm_version in ASA_VERSIONS
+            if software_version > (device.get("softwareVersion") or "")
+        ]
+        return 200, {"count": len(items), "items": items}
+
+    def upgrade_asa(self, tenant_uid, query, body, uid):
+        device = self._tenant_devices(tenant_uid).get(uid)
+        if device is None:
+            return 404, {"error": f"Device {uid} not found"}
+
+        def on_done():
+            if body.get("softwareVersion"):
+                device["softwareVersion"] = body["softwareVersion"]
+            if body.get("asdmVersion"):
+                device["asdmVersion"] = body["asdmVersion"]
+            self._reboot(device)
+
+        return 202, self.state.start_transaction(
+            tenant_uid, "UPGRADE_ASA", uid, on_done
+        )
+
+    def _reboot(self, device: Dict[str, Any]) -> None:
+        if self.state.config.reboot_seconds <= 0:
+            return
+        device["connectivityState"] = "UNREACHABLE"
+
+        def back_online():
+            device["connectivityState"] = "ONLINE"
+
+        timer = threading.Timer(self.state.config.reboot_seconds, back_online)
+        timer.daemon = True
+        timer.start()
+
+    def execute_cli(self, tenant_uid, query, body):
+        device_uids = body.get("deviceUids", [])
+        script = body.get("script", "")
+        cli_result_uid = self.state.new_uid()
+        output = "\n".join(
+            self._cli_output(line.strip()) for line in script.splitlines()
+        )
+        self.state.cli_results[cli_result_uid] = {
+            "uid": cli_result_uid,
+            "deviceUid": device_uids[0] if device_uids else "",
+            "script": script,
+            "result": output,
+            "startTime": _now(),
+        }
+        return 202, self.state.start_transaction(
+            tenant_uid, "EXECUTE_CLI_COMMAND", cli_result_uid
+        )
+
+    def _cli_output(self, command: str) -> str:
+        with self.state.lock:
+            cpu = [self.state.random.randint(1, 90) for _ in range(3)]
+            used_percent = self.state.random.randint(10, 80)
+            in_use = self.state.random.randint(0, 50000)
+        if command == "show cpu usage":
+            return f"CPU utilization for 5 seconds = {cpu[0]}%; 1 minute: {cpu[1]}%; 5 minutes: {cpu[2]}%"
+        if command == "show memory":
+            total = 8 * 1024**3
+            used = total * used_percent // 100
+            return (
+                f"Free memory:        {total - used} bytes ({100 - used_percent}%)\n"
+                f"Used memory:        {used} bytes ({used_percent:3d}%)\n"
+                f"-------------     ------------------\n"
+                f"Total memory:       {total} bytes (100%)"
+            )
+        if command == "show conn count":
+            return f"{in_use} in use, {in_use * 2} most used"
+        if command == "show version":
+            return (
+                "Cisco Adaptive Security Appliance Software Version 9.20(2)\n"
+                "Device Manager Version 7.20(2)\n\n"
+                "mock-asa up 12 days 3 hours\n\n"
+                "Hardware:   ASA5516, 8192 MB RAM, CPU Atom C2000 series 2416 MHz\n"
+                "Serial Number: JAD0000MOCK"
+            )
+        return ""
+
+    def get_cli_result(self, tenant_uid, query, body, uid):
+        cli_result = self.state.cli_results.get(uid)
+        if cli_result is None:
+            return 404, {"error": f"CLI result {uid} not found"}
+        return 200, cli_result
+
+    def create_tenant(self, tenant_uid, query, body):
+        new_tenant_uid = self.state.new_uid()
+        with self.state.lock:
+            self.state.add_tenant(
+                new_tenant_uid, body["tenantName"], body.get("displayName")
+            )
+        return 202, self.state.start_transaction(
+            tenant_uid, "MSP_CREATE_TENANT", new_tenant_uid
+        )
+
+    def get_tenants(self, tenant_uid, query, body):
+        tenants = [
+            tenant
+            for tenant in self.state.tenants.values()
+            if tenant["uid"] != MSP_TENANT_UID
+            and _matches_query(tenant, query.get("q"))
+        ]
+        return 200, _page(
+            tenants, int(query.get("limit", 50)), int(query.get("offset", 0))
+        )
+
+    def get_tenant(self, tenant_uid, query, body, uid):
+        tenant = self.state.tenants.get(uid)
+        if tenant is None:
+            return 404, {"error": f"Tenant {uid} not found"}
+        return 200, tenant
+
+    def add_users(self, tenant_uid, query, body, uid):
+        if uid not in self.state.tenants:
+            return 404, {"error": f"Tenant {uid} not found"}
+        users = body.get("users", [])
+        if len(users) > 50:
+            return 400, {"error": "At most 50 users can be added at once"}
+        with self.state.lock:
+            for user in users:
+                self.state.add_user(
+                    uid,
+                    user["username"],
+                    user.get("role", "ROLE_READ_ONLY"),
+                    user.get("apiOnlyUser", False),
+                )
+        return 202, self.state.start_transaction(
+            tenant_uid, "MSP_ADD_USERS_TO_TENANT", uid
+        )
+
+    def get_users(self, tenant_uid, query, body, uid):
+        users = [
+            user
+            for user in self.state.users.get(uid, {}).values()
+            if _matches_query(user, query.get("q"))
+        ]
+        return 200, _page(
+            users, int(query.get("limit", 50)), int(query.get("offset", 0))
+        )
+
+    def generate_token(self, tenant_uid, query, body, uid, user_uid):
+        user = self.state.users.get(uid, {}).get(user_uid)
+        if user is None:
+            return 404, {"error": f"User {user_uid} not found"}
+        api_token = mock_api_token(uid, user["name"])
+        with self.state.lock:
+            previous_api_token = self.state.api_tokens.get(user_uid)
+            if previous_api_token is not None:
+                self.state.revoked_api_tokens.add(previous_api_token)
+            self.state.api_tokens[user_uid] = api_token
+        return 201, {"apiToken": api_token}
+
+    def provision_cdfmc(self, tenant_uid, query, body, uid):
+        if uid not in self.state.tenants:
+            return 404, {"error": f"Tenant {uid} not found"}
+        # like SCC, the MSP transaction points to the provisioning transaction in the managed tenant
+        target_transaction = self.state.start_transaction(
+            uid, "MSP_PROVISION_CDFMC", None, lambda: self.state._add_cdfmc(uid)
+        )
+        return 202, self.state.start_transaction(
+            tenant_uid,
+            "MSP_PROVISION_CDFMC",
+            uid,
+            details={
+                "TRANSACTION_UID_IN_TARGET_TENANT": target_transaction["transactionUid"]
+            },
+        )
+
+    def create_access_policy(self, tenant_uid, query, body, uid):
+        return 201, {"id": self.state.new_uid(), "name": body.get("name")}
+
+    def create_access_rule(self, tenant_uid, query, body, uid, policy_uid):
+        return 201, {"id": self.state.new_uid(), **body}
+
+    def get_networks(self, tenant_uid, query, body, uid):
+        return 200, {
+            "paging": {"count": 1},
+            "items": [{"id": f"{uid}-any-ipv4", "name": "any-ipv4"}],
+        }
+
+    def get_url_categories(self, tenant_uid, query, body, uid):
+        return 200, {
+            "paging": {"count": 2},
+            "items": [
+                {"id": f"{uid}-gambling", "name": "Gambling"},
+                {"id": f"{uid}-news", "name": "News"},
+            ],
+        }
+
+
+def _tenant_of(authorization: Optional[str]) -> Optional[str]:
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    try:
+        claims = jwt.decode(
+            authorization[len("Bearer ") :], MOCK_SIGNING_KEY, algorithms=["HS256"]
+        )
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get("parentId")
+
+
+def create_mock_server(
+    config: MockSccConfig, host: str = "127.0.0.1", port: int = DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    """Creates the server; the state is available as server.state. Use port 0 to pick a free port."""
+    state = MockSccState(config)
+    api = MockSccApi(state)
+
+    class MockSccRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def _handle(self, method: str):
+            url = urlparse(self.path)
+            path = unquote(url.path).rstrip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+            if path == "/_mock/stats":
+                return self._respond(200, state.stats())
+            if path == "/_mock/reset":
+                state.reset_stats()
+                return self._respond(200, state.stats())
+
+            time.sleep(state.latency_seconds())
+            authorization = self.headers.get("Authorization")
+            tenant_uid = _tenant_of(authorization)
+            if (
+                tenant_uid is None
+                or authorization[len("Bearer ") :] in state.revoked_api_tokens
+            ):
+                return self._respond(401, {"error": "Missing or invalid API token"})
+            rate_limited, failed = state.admit_request()
+            if rate_limited:
+                return self._respond(
+                    429,
+                    {"error": "Too many requests"},
+                    {"Retry-After": str(config.retry_after_seconds)},
+                )
+            if failed:
+                return self._respond(500, {"error": "Injected server error"})
+
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            body = json.loads(raw_body) if raw_body else {}
+            status, response, endpoint = api.handle(
+                method, path, query, body, tenant_uid
+            )
+            with state.lock:
+                state.request_counts[endpoint] += 1
+            self._respond(status, response)
+
+        def _respond(self, status: int, body: Any, headers: Dict[str, str] = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MockSccRequestHandler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+@click.command(
+    help="Serve a local stand-in for the SCC API on the localhost region (http://localhost:3077), for benchmarks and load tests."
+)
+@click.option("--port", type=int, default=DEFAULT_PORT, show_default=True)
+@click.option(
+    "--latency-ms",
+    help="Latency added to every request.",
+    type=float,
+    default=20,
+    show_default=True,
+)
+@click.option(
+    "--latency-jitter-ms",
+    help="Random variation of the latency, in both directions.",
+    type=float,
+    default=10,
+    show_default=True,
+)
+@click.option(
+    "--transaction-seconds",
+    help="Average time transactions take to finish.",
+    type=float,
+    default=2,
+    show_default=True,
+)
+@click.option(
+    "--transaction-failure-rate",
+    help="Fraction of transactions that finish with an ERROR.",
+    type=float,
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--error-rate",
+    help="Fraction of requests that fail with HTTP 500.",
+    type=float,
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--rate-limit-fraction",
+    help="Fraction of requests rejected with HTTP 429.",
+    type=float,
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--requests-per-second",
+    help="Reject requests above this rate with HTTP 429 (0 for no limit).",
+    type=float,
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--devices",
+    help="The number of devices in the MSP tenant's inventory.",
+    type=int,
+    default=100,
+    show_default=True,
+)
+@click.option(
+    "--tenants",
+    help="The number of MSP-managed tenants, each with --devices devices.",
+    type=int,
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--reboot-seconds",
+    help="How long upgraded devices stay UNREACHABLE after their upgrade finishes.",
+    type=float,
+    default=0,
+    show_default=True,
+)
+@click.option(
+    "--seed", help="Seed for reproducible runs.", type=int, default=1, show_default=True
+)
+def main(port: int, **config_options) -> None:
+    server = create_mock_server(MockSccConfig(**config_options), port=port)
+    click.echo(f"Mock SCC API listening on http://localhost:{server.server_port}")
+    click.echo(f"API token: {mock_api_token()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
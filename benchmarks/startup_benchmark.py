@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Dict
+
+import click
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# commands that must start without touching the SDK, prompts or the network
+DEFAULT_INVOCATIONS = [
+    ["scc.py", "--help"],
+    ["scc.py", "provision-tenant", "--help"],
+    ["scc.py", "onboard-ftds", "--help"],
+    ["scc.py", "upgrade-ftd", "--help"],
+    ["scc.py", "upgrade-asa", "--help"],
+    ["scc.py", "objects", "--help"],
+    ["scc.py", "run-manifest", "--help"],
+    ["scc.py", "portfolio", "--help"],
+    ["scc.py", "export-inventory", "--help"],
+    ["scc.py", "upgrade-readiness", "--help"],
+    ["scc.py", "upgrade-wave", "--help"],
+    ["scc.py", "rollout", "--help"],
+]
+HEAVY_MODULES = ["cdo_sdk_python", "questionary", "rich", "yaml", "email_validator"]
+IMPORT_TIME_REGEX = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\S.*)$")
+
+
+def time_invocation(invocation: List[str], runs: int) -> List[float]:
+    timings_ms = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *invocation],
+            cwd=REPO_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        timings_ms.append((time.perf_counter() - start) * 1000)
+    return timings_ms
+
+
+def heavy_modules_imported(invocation: List[str]) -> Dict[str, float]:
+    completed_process = subprocess.run(
+        [sys.executable, "-X", "importtime", *invocation],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    imported = {}
+    for line in completed_process.stderr.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+        if match and match.group(3).strip() in HEAVY_MODULES:
+            imported[match.group(3).strip()] = int(match.group(2)) / 1000
+    return imported
+
+
+@click.command(
+    help="Measure how long the CLI entry points take to start, and which heavy modules they import."
+)
+@click.option("--runs", type=int, default=5, help="Number of runs per invocation.")
+@click.option(
+    "--max-median-ms",
+    type=float,
+    default=None,
+    help="Exit with a non-zero status if any invocation's median start-up time exceeds this.",
+)
+@click.option(
+    "--history-file",
+    type=str,
+    default=None,
+    help="Append the results to this JSON lines file, to track start-up time over time.",
+)
+def main(runs: int, max_median_ms: float, history_file: str) -> None:
+    results = []
+    for invocation in DEFAULT_INVOCATIONS:
+        timings_ms = time_invocation(invocation, runs)
+        result = {
+            "invocation": " ".join(invocation),
+            "median_ms": round(statistics.median(timings_ms), 1),
+            "min_ms": round(min(timings_ms), 1),
+            "heavy_imports_ms": heavy_modules_imported(invocation),
+        }
+        results.append(result)
+        click.echo(
+            f"{result['invocation']:<40} median {result['median_ms']:>7.1f} ms  min {result['min_ms']:>7.1f} ms  "
+            f"heavy imports: {', '.join(result['heavy_imports_ms']) or 'none'}"
+        )
+
+    if history_file:
+        with open(history_file, "a") as file:
+            file.write(
+                json.dumps(
+                    {
+                        "timestamp": int(time.time()),
+                        "python": sys.version.split()[0],
+                        "results": results,
+                    }
+                )
+                + "\n"
+            )
+
+    if max_median_ms is not None and any(
+        result["median_ms"] > max_median_ms for result in results
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,9 @@ import ipaddress
 from typing import List
 
 import click
-import questionary
-from cdo_sdk_python import Device, ApiClient, Configuration
-from rich.console import Console
 
-from services.cli_api_service import CliApiService
-from services.inventory_api_service import InventoryApiService
+from utils.batch_mode import batch_mode
+from utils.cli_context import get_api_client
 
 
 def validate_ip(ip: str) -> str:
@@ -34,14 +31,14 @@ def validate_ips(comma_separated_ips: str) -> List[str]:
     required=False,
 )
 @click.option(
-    "--obj-name",
-    help="The name of the object group to add the IPs to",
+    "--device-uid",
+    help="The unique identifier, represented as a UUID, of the ASA device to create the object group in",
     type=str,
     required=False,
 )
 @click.option(
-    "--device-uid",
-    help="The unique identifier, represented as a UUID, of the ASA device to create the object group in",
+    "--device-name",
+    help="The name of the ASA device to create the object group in, instead of its UID",
     type=str,
     required=False,
 )
@@ -53,57 +50,58 @@ def validate_ips(comma_separated_ips: str) -> List[str]:
 )
 @click.pass_context
 def add_ips_to_object_group(
-    ctx: any, obj_name: str, device_uid: str, ips_to_add: str
+    ctx: any, obj_name: str, device_uid: str, device_name: str, ips_to_add: str
 ) -> None:
-    console = Console()
-    with ApiClient(
-        Configuration(host=ctx.obj["base_url"], access_token=ctx.obj["api_token"])
-    ) as api_client:
-        inventory_api_service = InventoryApiService(api_client=api_client)
-        cli_api_service = CliApiService(api_client=api_client)
-        if device_uid is None:
-            online_asa_devices: List[Device] = inventory_api_service.get_devices(
-                "deviceType:ASA AND connectivityState:ONLINE"
-            )
-            selected_asa_name = questionary.select(
-                "Select ASA",
-                choices=[device.name for device in online_asa_devices],
-            ).ask()
-            selected_asa_device: Device = [
-                asa_device
-                for asa_device in online_asa_devices
-                if asa_device.name == selected_asa_name
-            ][0]
-        if obj_name is None:
-            obj_name = questionary.text(
-                "Enter the object name", default="block_network_group"
-            ).ask()
+    import questionary
+    from rich.console import Console
+
+    from services.cli_api_service import CliApiService
+    from services.inventory_api_service import InventoryApiService
+    from utils.device_picker import DevicePicker
 
-        if not ips_to_add:
-            ips = []
-            while True:
-                ip = questionary.text(
-                    f"Enter an IP address to add to  {obj_name} (or press Enter to finish):"
-                ).ask()
-                if ip.lower() == "" and len(ips) > 0:
-                    break
-                elif ip.lower() == "":
-                    console.print(
-                        "[yellow]At least one IP address is required[/yellow]"
-                    )
-                    continue
-                try:
-                    validate_ip(ip)
-                    ips.append(ip)
-                except click.BadParameter as e:
-                    console.print(f"[red]e[/red]")
+    console = Console()
+    api_client = get_api_client(ctx)
+    inventory_api_service = InventoryApiService(api_client=api_client)
+    cli_api_service = CliApiService(api_client=api_client)
+    if device_uid is None:
+        picker = DevicePicker(
+            inventory_api_service,
+            base_query="deviceType:ASA AND connectivityState:ONLINE",
+            device_kind="ASA",
+        )
+        if device_name is None:
+            batch_mode.ensure_can_prompt("--device-uid or --device-name")
+            device_uid = picker.pick("Select ASA")
         else:
-            ips = [validate_ip(ip) for ip in ips_to_add.split(",")]
+            device_uid = picker.resolve(device_name)
+    if obj_name is None:
+        batch_mode.ensure_can_prompt("--obj-name")
+        obj_name = questionary.text(
+            "Enter the object name", default="block_network_group"
+        ).ask()
 
-        commands = [f"object-group network {obj_name}"]
-        commands.extend([f" network-object host {ip}" for ip in ips])
+    if not ips_to_add:
+        batch_mode.ensure_can_prompt("--ips-to-add")
+        ips = []
+        while True:
+            ip = questionary.text(
+                f"Enter an IP address to add to  {obj_name} (or press Enter to finish):"
+            ).ask()
+            if ip.lower() == "" and len(ips) > 0:
+                break
+            elif ip.lower() == "":
+                console.print("[yellow]At least one IP address is required[/yellow]")
+                continue
+            try:
+                validate_ip(ip)
+                ips.append(ip)
+            except click.BadParameter as e:
+                console.print(f"[red]e[/red]")
+    else:
+        ips = [validate_ip(ip) for ip in ips_to_add.split(",")]
 
-        cli_api_service.execute_command_and_get_result(
-            [selected_asa_device.uid], "\n".join(commands)
-        )
-        console.print("[green]Done[/green]")
+    commands = [f"object-group network {obj_name}"]
+    commands.extend([f" network-object host {ip}" for ip in ips])
+
+    cli_api_service.execute_command_and_get_result([device_uid], "\n".join(commands))
+    console.print("[green]Done[/green]")
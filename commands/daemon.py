@@ -0,0 +1,95 @@
+import click
+from click_option_group import AllOptionGroup, optgroup
+
+from services.daemon_client import DEFAULT_SOCKET_PATH
+from utils.batch_mode import batch_option
+from utils.cli_context import (
+    store_credential_options,
+    get_base_url_and_api_token,
+    get_daemon_client,
+)
+from utils.region_mapping import supported_regions
+
+
+@click.group(
+    help="Run a background process that keeps API clients and the inventory warm for the other commands."
+)
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@click.option(
+    "--socket-path",
+    help="The Unix socket the daemon listens on.",
+    type=str,
+    default=DEFAULT_SOCKET_PATH,
+    show_default=True,
+)
+@batch_option
+@click.pass_context
+def daemon(ctx: any, api_token: str, region: str, socket_path: str) -> None:
+    store_credential_options(ctx, region=region, api_token=api_token)
+    ctx.obj["socket_path"] = socket_path
+
+
+@daemon.command(name="start")
+@click.option(
+    "--inventory-cache-ttl-seconds",
+    help="How long device lists and compatible versions are served from the cache.",
+    type=int,
+    default=60,
+    show_default=True,
+)
+@click.pass_context
+def start(ctx: any, inventory_cache_ttl_seconds: int) -> None:
+    """Start the daemon in the foreground; stop it with Ctrl+C or `daemon stop`."""
+    from rich.console import Console
+
+    from services.daemon_service import DaemonService
+
+    base_url, api_token = get_base_url_and_api_token(ctx)
+    daemon_service = DaemonService(
+        region=ctx.obj["region"],
+        base_url=base_url,
+        api_token=api_token,
+        socket_path=ctx.obj["socket_path"],
+        inventory_cache_ttl_seconds=inventory_cache_ttl_seconds,
+    )
+    try:
+        daemon_service.bind()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    Console().print(f"Listening on {daemon_service.socket_path}")
+    try:
+        daemon_service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+@daemon.command(name="stop")
+@click.pass_context
+def stop(ctx: any) -> None:
+    """Stop the running daemon."""
+    from services.daemon_client import DaemonClient
+
+    daemon_client = get_daemon_client(ctx, socket_path=ctx.obj["socket_path"])
+    if daemon_client is None:
+        if DaemonClient(socket_path=ctx.obj["socket_path"]).is_running():
+            raise click.ClickException(
+                "The daemon is running with other credentials; pass the --region and --api-token it was started with"
+            )
+        raise click.ClickException("The daemon is not running")
+    daemon_client.shutdown()
+
+
+@daemon.command(name="status")
+@click.pass_context
+def status(ctx: any) -> None:
+    """Check whether the daemon is running."""
+    from services.daemon_client import DaemonClient
+
+    daemon_client = DaemonClient(socket_path=ctx.obj["socket_path"])
+    click.echo("running" if daemon_client.is_running() else "not running")
@@ -0,0 +1,100 @@
+import importlib.util
+
+import click
+from click_option_group import AllOptionGroup, optgroup
+
+from utils.batch_mode import batch_option
+from utils.export_formats import EXPORT_FORMATS, export_format_of
+from utils.region_mapping import supported_regions
+
+
+def resolve_export_format(output_file: str, export_format: str) -> str:
+    export_format = export_format or export_format_of(output_file)
+    if export_format not in EXPORT_FORMATS:
+        raise click.BadParameter(
+            f"Cannot tell the format of {output_file} from its extension, pass --format.",
+            param_hint="--format",
+        )
+    if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise click.UsageError(
+            "Exporting to Parquet needs pyarrow: install it with pip install pyarrow"
+        )
+    return export_format
+
+
+output_argument = click.argument(
+    "output_file", type=click.Path(dir_okay=False, writable=True)
+)
+format_option = click.option(
+    "--format",
+    "export_format",
+    help="The format of the output file. Defaults to the one its extension names (.csv, .jsonl, .parquet).",
+    type=click.Choice(EXPORT_FORMATS),
+)
+with_versions_option = click.option(
+    "--with-versions",
+    is_flag=True,
+    default=False,
+    help="Also export the versions each FTD and ASA can be upgraded to. This makes one more API call per device.",
+)
+
+
+@click.command(
+    help="Export the inventory to a CSV, JSON lines or Parquet file. Devices are written a page at a time, so inventories of any size are exported in bounded memory."
+)
+@output_argument
+@format_option
+@click.option(
+    "--query",
+    help="Only export the devices matching this query, e.g. 'deviceType:CDFMC_MANAGED_FTD'.",
+    type=str,
+)
+@with_versions_option
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
+def main(
+    output_file: str,
+    export_format: str,
+    query: str,
+    with_versions: bool,
+    region: str,
+    api_token: str,
+) -> None:
+    # the SDK and services are imported here rather than at module load so that --help stays fast
+    from rich.console import Console
+
+    from services.api_client_registry import api_client_registry
+    from services.inventory_export_service import (
+        InventoryExportService,
+        open_device_writer,
+    )
+    from services.scc_credentials_service import SccCredentialsService
+
+    export_format = resolve_export_format(output_file, export_format)
+    credentials_service = SccCredentialsService(region=region, api_token=api_token)
+    credentials_service.load_or_prompt_credentials()
+    api_token, base_url = credentials_service.get_credentials()
+
+    writer = open_device_writer(
+        output_file, export_format, InventoryExportService.columns(with_versions)
+    )
+    try:
+        exported = InventoryExportService(
+            writer, with_versions=with_versions
+        ).export_tenant(
+            api_client_registry.get_api_client(host=base_url, access_token=api_token),
+            q=query,
+        )
+    finally:
+        writer.close()
+    Console().print(f"[green]Exported {exported} devices to {output_file}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class VersionInfo:
+    software_version: Optional[str] = None
+    build: Optional[str] = None
+    device_manager_version: Optional[str] = None
+    hostname: Optional[str] = None
+    uptime: Optional[str] = None
+    hardware_model: Optional[str] = None
+    serial_number: Optional[str] = None
+
+
+@dataclass
+class CpuUsage:
+    five_seconds_percent: float
+    one_minute_percent: float
+    five_minutes_percent: float
+
+
+@dataclass
+class MemoryUsage:
+    free_bytes: int
+    used_bytes: int
+    used_percent: int
+
+
+@dataclass
+class ConnectionCount:
+    in_use: int
+    most_used: int
+
+
+@dataclass
+class ObjectGroupMember:
+    # the kind of the member line, e.g. network-object, group-object or port-object
+    kind: str
+    value: str
+
+
+@dataclass
+class ObjectGroup:
+    group_type: str
+    name: str
+    protocol: Optional[str] = None
+    description: Optional[str] = None
+    members: List[ObjectGroupMember] = field(default_factory=list)
+
+
+@dataclass
+class Interface:
+    name: str
+    nameif: Optional[str] = None
+    status: Optional[str] = None
+    line_protocol: Optional[str] = None
+    mac_address: Optional[str] = None
+    mtu: Optional[int] = None
+    ip_address: Optional[str] = None
+    subnet_mask: Optional[str] = None
+    packets_input: Optional[int] = None
+    bytes_input: Optional[int] = None
+    input_errors: Optional[int] = None
+    packets_output: Optional[int] = None
+    bytes_output: Optional[int] = None
+    output_errors: Optional[int] = None
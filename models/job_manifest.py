@@ -0,0 +1,157 @@
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from validators.ftd_csv_validator import FtdCsvValidator
+from validators.ftd_ztp_csv_validator import FtdZtpCsvValidator
+from validators.users_csv_validator import UsersCsvValidator
+
+
+@dataclass
+class UpgradeManifest:
+    device_type: str  # "ftd" or "asa"
+    device_name: str
+    software_version: Optional[str] = None
+    upgrade_package_uid: Optional[str] = None
+    asdm_version: Optional[str] = None
+
+
+@dataclass
+class TenantManifest:
+    name: str
+    display_name: Optional[str] = None
+    # the UID of an existing tenant; the tenant is created when it is not given
+    uid: Optional[str] = None
+    api_only_user: Optional[str] = None
+    users_csv_file: Optional[str] = None
+    provision_cdfmc: bool = False
+    create_access_policy: bool = False
+    fmc_access_policy_uid: Optional[str] = None
+    ftd_csv_file: Optional[str] = None
+    ftd_ztp_csv_file: Optional[str] = None
+    upgrades: List[UpgradeManifest] = field(default_factory=list)
+
+    @property
+    def api_only_user_name(self) -> str:
+        return self.api_only_user or f"{self.name}-api-only-user"
+
+
+@dataclass
+class JobManifest:
+    """
+    The tenants, users, cdFMC baseline, devices and upgrades to apply, e.g.:
+
+        tenants:
+          - name: acme
+            display_name: ACME
+            users_csv_file: acme-users.csv
+            provision_cdfmc: true
+            create_access_policy: true
+            ftd_ztp_csv_file: acme-ftds.csv
+            upgrades:
+              - ftd: acme-ftd-1
+                software_version: 7.4.2
+              - asa: acme-asa-1
+                software_version: 9.20(2)
+                asdm_version: 7.20(2)
+
+    Relative file paths are relative to the manifest.
+    """
+
+    tenants: List[TenantManifest]
+
+    @classmethod
+    def load(cls, manifest_file: str) -> "JobManifest":
+        import yaml
+
+        with open(manifest_file, "r") as file:
+            document = yaml.safe_load(file) or {}
+        base_directory = os.path.dirname(os.path.abspath(manifest_file))
+        tenants = [
+            cls._parse_tenant(tenant, base_directory)
+            for tenant in document.get("tenants") or []
+        ]
+        if len(tenants) == 0:
+            raise ValueError(f"{manifest_file} does not list any tenants")
+        names = [tenant.name for tenant in tenants]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Tenants listed more than once: {', '.join(duplicates)}")
+        return cls(tenants=tenants)
+
+    @classmethod
+    def _parse_tenant(
+        cls, tenant: Dict[str, Any], base_directory: str
+    ) -> TenantManifest:
+        if not tenant.get("name"):
+            raise ValueError(f"Every tenant needs a name: {tenant}")
+        tenant_manifest = TenantManifest(
+            name=tenant["name"],
+            display_name=tenant.get("display_name", tenant["name"]),
+            uid=tenant.get("uid"),
+            api_only_user=tenant.get("api_only_user"),
+            provision_cdfmc=bool(tenant.get("provision_cdfmc", False)),
+            create_access_policy=bool(tenant.get("create_access_policy", False)),
+            fmc_access_policy_uid=tenant.get("fmc_access_policy_uid"),
+            upgrades=[
+                cls._parse_upgrade(upgrade, tenant["name"])
+                for upgrade in tenant.get("upgrades") or []
+            ],
+        )
+        for attribute, validator_class in (
+            ("users_csv_file", UsersCsvValidator),
+            ("ftd_csv_file", FtdCsvValidator),
+            ("ftd_ztp_csv_file", FtdZtpCsvValidator),
+        ):
+            if tenant.get(attribute):
+                file_path = os.path.join(base_directory, tenant[attribute])
+                if not validator_class(file_path).validate():
+                    raise ValueError(f"CSV file {file_path} is invalid.")
+                setattr(tenant_manifest, attribute, file_path)
+
+        onboards_devices = (
+            tenant_manifest.ftd_csv_file or tenant_manifest.ftd_ztp_csv_file
+        )
+        if (
+            onboards_devices
+            and not tenant_manifest.create_access_policy
+            and not tenant_manifest.fmc_access_policy_uid
+        ):
+            raise ValueError(
+                f"Tenant {tenant_manifest.name} onboards devices, so it needs create_access_policy or fmc_access_policy_uid"
+            )
+        if tenant_manifest.create_access_policy and not (
+            tenant_manifest.provision_cdfmc or tenant_manifest.uid
+        ):
+            raise ValueError(
+                f"Tenant {tenant_manifest.name} needs a cdFMC for its access policy: set provision_cdfmc"
+            )
+        return tenant_manifest
+
+    @staticmethod
+    def _parse_upgrade(upgrade: Dict[str, Any], tenant_name: str) -> UpgradeManifest:
+        device_type = "ftd" if "ftd" in upgrade else "asa" if "asa" in upgrade else None
+        if device_type is None:
+            raise ValueError(
+                f"Upgrades of tenant {tenant_name} must name an ftd or an asa: {upgrade}"
+            )
+        upgrade_manifest = UpgradeManifest(
+            device_type=device_type,
+            device_name=upgrade[device_type],
+            software_version=upgrade.get("software_version"),
+            upgrade_package_uid=upgrade.get("upgrade_package_uid"),
+            asdm_version=upgrade.get("asdm_version"),
+        )
+        if device_type == "ftd" and not (
+            upgrade_manifest.software_version or upgrade_manifest.upgrade_package_uid
+        ):
+            raise ValueError(
+                f"The upgrade of FTD {upgrade_manifest.device_name} needs a software_version or an upgrade_package_uid"
+            )
+        if device_type == "asa" and not (
+            upgrade_manifest.software_version or upgrade_manifest.asdm_version
+        ):
+            raise ValueError(
+                f"The upgrade of ASA {upgrade_manifest.device_name} needs a software_version or an asdm_version"
+            )
+        return upgrade_manifest
@@ -0,0 +1,72 @@
+import operator
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+CONNECTIVITY_ONLINE = "connectivity.online"
+CPU_USAGE_5S_PERCENT = "cpu.usage_5s_percent"
+CPU_USAGE_1M_PERCENT = "cpu.usage_1m_percent"
+CPU_USAGE_5M_PERCENT = "cpu.usage_5m_percent"
+MEMORY_USED_PERCENT = "memory.used_percent"
+CONNECTIONS_IN_USE = "connections.in_use"
+CONNECTIONS_MOST_USED = "connections.most_used"
+
+_OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+
+@dataclass
+class MetricSample:
+    device_uid: str
+    metric: str
+    timestamp: float
+    value: float
+
+
+@dataclass
+class ThresholdRule:
+    metric: str
+    comparison: str
+    threshold: float
+
+    @classmethod
+    def parse(cls, rule: str) -> "ThresholdRule":
+        """Parses rules such as `cpu.usage_1m_percent>80` or `connectivity.online<1`."""
+        match = re.fullmatch(r"\s*([\w.]+)\s*(>=|<=|>|<)\s*([-\d.]+)\s*", rule)
+        if match is None:
+            raise ValueError(f"Invalid threshold rule: {rule}")
+        return cls(
+            metric=match.group(1),
+            comparison=match.group(2),
+            threshold=float(match.group(3)),
+        )
+
+    def is_breached_by(self, sample: MetricSample) -> bool:
+        return sample.metric == self.metric and _OPERATORS[self.comparison](
+            sample.value, self.threshold
+        )
+
+    def __str__(self) -> str:
+        return f"{self.metric}{self.comparison}{self.threshold:g}"
+
+
+@dataclass
+class Alert:
+    rule: ThresholdRule
+    sample: MetricSample
+    device_name: str
+
+
+@dataclass
+class ConnectivityTransition:
+    device_uid: str
+    device_name: Optional[str]
+    # None when the device was not known before, or is no longer in the inventory
+    previous_state: Optional[str]
+    state: Optional[str]
+    software_version: Optional[str]
+    timestamp: float
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+from cdo_sdk_python import UserInput
+
+
+@dataclass
+class FailedUserCreation:
+    user: UserInput
+    reason: str
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class RolloutDevice:
+    uid: str
+    name: str
+    current_version: Optional[str]
+    # the version the device reports once upgraded, checked by the health gate
+    software_version: str
+
+
+@dataclass
+class RolloutBatch:
+    number: int
+    devices: List[RolloutDevice]
+    # the reason each failed device failed, by device UID: a failed upgrade, or a failed health gate
+    failures: Dict[str, str] = field(default_factory=dict)
+    duration_seconds: float = 0
+
+    @property
+    def is_canary(self) -> bool:
+        return self.number == 1
+
+
+@dataclass
+class RolloutResult:
+    batches: List[RolloutBatch] = field(default_factory=list)
+    # the devices not upgraded because the rollout halted
+    not_started: List[RolloutDevice] = field(default_factory=list)
+    halted_reason: Optional[str] = None
+
+    @property
+    def failures(self) -> Dict[str, str]:
+        return {
+            uid: reason
+            for batch in self.batches
+            for uid, reason in batch.failures.items()
+        }
+
+    @property
+    def upgraded_count(self) -> int:
+        return sum(len(batch.devices) - len(batch.failures) for batch in self.batches)
@@ -0,0 +1,50 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+ALREADY_ON_TARGET = "ALREADY_ON_TARGET"
+ELIGIBLE = "ELIGIBLE"
+ELIGIBLE_VIA_INTERMEDIATE = "ELIGIBLE_VIA_INTERMEDIATE"
+BLOCKED = "BLOCKED"
+UNKNOWN = "UNKNOWN"
+
+READINESS_COLUMNS = [
+    "uid",
+    "name",
+    "hardware_model",
+    "software_version",
+    "target_version",
+    "status",
+    "upgrade_path",
+    "highest_reachable_version",
+]
+
+
+def version_key(version: Optional[str]) -> Tuple[int, ...]:
+    """Orders FTD versions such as 7.4.2 and ASA versions such as 9.20(2) numerically."""
+    return tuple(int(number) for number in re.findall(r"\d+", version or ""))
+
+
+@dataclass
+class DeviceReadiness:
+    uid: str
+    name: str
+    hardware_model: Optional[str]
+    software_version: Optional[str]
+    target_version: str
+    status: str
+    # the versions to upgrade to, in order, ending with the target version
+    upgrade_path: List[str] = field(default_factory=list)
+    highest_reachable_version: Optional[str] = None
+
+    def to_row(self) -> dict:
+        return {
+            "uid": self.uid,
+            "name": self.name,
+            "hardware_model": self.hardware_model,
+            "software_version": self.software_version,
+            "target_version": self.target_version,
+            "status": self.status,
+            "upgrade_path": " > ".join(self.upgrade_path),
+            "highest_reachable_version": self.highest_reachable_version,
+        }
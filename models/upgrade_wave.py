@@ -0,0 +1,44 @@
+from dataclasses import asdict, dataclass, field
+from typing import List
+
+
+@dataclass
+class WaveEntry:
+    device_uid: str
+    device_name: str
+    current_version: str
+    # the next version on the device's path to the wave's target, which may be an intermediate version
+    software_version: str
+    upgrade_package_uid: str
+
+
+@dataclass
+class UpgradeWave:
+    """
+    FTD upgrades planned ahead of a maintenance window, so that the window is only spent running them. Saved as YAML.
+    """
+
+    target_version: str
+    planned_at: str
+    entries: List[WaveEntry] = field(default_factory=list)
+
+    def save(self, plan_file: str) -> None:
+        import yaml
+
+        with open(plan_file, "w") as file:
+            yaml.safe_dump(asdict(self), file, sort_keys=False)
+
+    @classmethod
+    def load(cls, plan_file: str) -> "UpgradeWave":
+        import yaml
+
+        with open(plan_file, "r") as file:
+            document = yaml.safe_load(file) or {}
+        try:
+            return cls(
+                target_version=document["target_version"],
+                planned_at=document["planned_at"],
+                entries=[WaveEntry(**entry) for entry in document.get("entries") or []],
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{plan_file} is not an upgrade wave plan: {e}")
@@ -0,0 +1,330 @@
+import time
+from typing import List, TYPE_CHECKING
+
+import click
+from click_option_group import AllOptionGroup, optgroup
+
+from utils.batch_mode import batch_option
+from utils.cli_context import store_credential_options, get_api_client
+from utils.region_mapping import supported_regions
+
+if TYPE_CHECKING:
+    from models.monitoring import Alert, MetricSample
+
+
+def print_samples(title: str, samples: List["MetricSample"]) -> None:
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=title)
+    table.add_column("Time", justify="center")
+    table.add_column("Device UID", justify="center")
+    table.add_column("Metric", justify="center")
+    table.add_column("Value", justify="right")
+    for sample in samples:
+        table.add_row(
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sample.timestamp)),
+            sample.device_uid,
+            sample.metric,
+            f"{sample.value:g}",
+        )
+    Console().print(table)
+
+
+def print_alerts(alerts: List["Alert"]) -> None:
+    from rich.console import Console
+
+    console = Console()
+    for alert in alerts:
+        console.print(
+            f"[red]ALERT[/red] {alert.device_name}: {alert.sample.metric} is {alert.sample.value:g} ({alert.rule})"
+        )
+
+
+def parse_thresholds(ctx: any, param: any, rules: List[str]) -> List:
+    from models.monitoring import ThresholdRule
+
+    try:
+        return [ThresholdRule.parse(rule) for rule in rules]
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+metrics_directory_option = click.option(
+    "--metrics-directory",
+    help="The local directory the metrics are stored in.",
+    type=str,
+    default="~/.cisco-security-metrics",
+    show_default=True,
+)
+threshold_option = click.option(
+    "--threshold",
+    "thresholds",
+    help="An alert threshold such as 'cpu.usage_1m_percent>80' or 'connectivity.online<1'. Can be repeated.",
+    type=str,
+    multiple=True,
+    callback=parse_thresholds,
+)
+
+
+@click.group()
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
+@click.pass_context
+def cli(ctx: any, api_token: str, region: str) -> None:
+    store_credential_options(ctx, region=region, api_token=api_token)
+
+
+@click.command(name="collect")
+@click.option(
+    "--interval-seconds",
+    help="How often to collect metrics from the fleet.",
+    type=int,
+    default=300,
+    show_default=True,
+)
+@click.option("--once", help="Collect metrics once and exit.", is_flag=True)
+@click.option(
+    "--device-query",
+    help="Only monitor the devices matching this inventory query (Lucene syntax).",
+    type=str,
+    required=False,
+)
+@click.option(
+    "--max-concurrent-devices",
+    help="The number of devices to run CLI commands on at the same time.",
+    type=int,
+    default=32,
+    show_default=True,
+)
+@click.option(
+    "--raw-retention-days",
+    help="How long to keep every sample before downsampling them to hourly averages.",
+    type=int,
+    default=7,
+    show_default=True,
+)
+@click.option(
+    "--rollup-retention-days",
+    help="How long to keep hourly averages.",
+    type=int,
+    default=400,
+    show_default=True,
+)
+@metrics_directory_option
+@threshold_option
+@click.pass_context
+def collect(
+    ctx: any,
+    interval_seconds: int,
+    once: bool,
+    device_query: str,
+    max_concurrent_devices: int,
+    raw_retention_days: int,
+    rollup_retention_days: int,
+    metrics_directory: str,
+    thresholds: List,
+) -> None:
+    """Collect connectivity, CPU, memory and connection metrics from every device."""
+    from rich.console import Console
+
+    from services.fleet_monitoring_service import FleetMonitoringService
+    from services.metric_store import MetricStore
+
+    console = Console()
+    metric_store = MetricStore(
+        metrics_directory,
+        raw_retention_days=raw_retention_days,
+        rollup_retention_days=rollup_retention_days,
+    )
+    monitoring_service = FleetMonitoringService(
+        get_api_client(ctx),
+        metric_store,
+        max_concurrent_devices=max_concurrent_devices,
+        device_query=device_query,
+    )
+
+    def on_cycle(samples: List["MetricSample"], alerts: List["Alert"]) -> None:
+        console.print(
+            f"Collected {len(samples)} samples from {len(monitoring_service.device_names)} devices"
+            f" ({len(monitoring_service.failed_devices)} failed)"
+        )
+        print_alerts(alerts)
+        metric_store.downsample_and_expire()
+
+    if once:
+        samples = monitoring_service.collect_once()
+        on_cycle(samples, monitoring_service.evaluate_thresholds(samples, thresholds))
+        return
+    try:
+        monitoring_service.run_forever(interval_seconds, thresholds, on_cycle)
+    except KeyboardInterrupt:
+        pass
+
+
+@click.command(name="query")
+@click.option("--metric", help="The metric to query.", type=str, required=True)
+@click.option("--device-uid", help="Only show this device.", type=str)
+@click.option(
+    "--since-minutes",
+    help="How far back to query.",
+    type=int,
+    default=60,
+    show_default=True,
+)
+@metrics_directory_option
+def query(
+    metric: str, device_uid: str, since_minutes: int, metrics_directory: str
+) -> None:
+    """Show the stored samples of a metric."""
+    from services.metric_store import MetricStore
+
+    samples = MetricStore(metrics_directory).query(
+        metric, device_uid=device_uid, since=time.time() - since_minutes * 60
+    )
+    print_samples(metric, samples)
+
+
+@click.command(name="alerts")
+@metrics_directory_option
+@threshold_option
+def alerts(metrics_directory: str, thresholds: List) -> None:
+    """Check the latest stored sample of every device against the thresholds."""
+    from models.monitoring import Alert
+    from services.metric_store import MetricStore
+
+    metric_store = MetricStore(metrics_directory)
+    print_alerts(
+        [
+            Alert(rule=rule, sample=sample, device_name=sample.device_uid)
+            for rule in thresholds
+            for sample in metric_store.latest(rule.metric).values()
+            if rule.is_breached_by(sample)
+        ]
+    )
+
+
+@click.command(name="watch")
+@click.option(
+    "--device-uid",
+    "device_uids",
+    help="A device to watch. Can be repeated.",
+    type=str,
+    multiple=True,
+)
+@click.option(
+    "--device-query",
+    help="Watch the devices matching this inventory query (Lucene syntax), e.g. 'name:branch*'.",
+    type=str,
+)
+@click.option(
+    "--until-online",
+    help="Exit once every device is ONLINE, or with an error after --timeout-seconds.",
+    is_flag=True,
+)
+@click.option(
+    "--timeout-seconds",
+    help="How long to wait for the devices to come ONLINE with --until-online.",
+    type=float,
+    default=1800,
+    show_default=True,
+)
+@click.option(
+    "--min-interval-seconds",
+    help="The time between checks while devices are changing state.",
+    type=float,
+    default=5,
+    show_default=True,
+)
+@click.option(
+    "--max-interval-seconds",
+    help="The time between checks once no device has changed state for a while.",
+    type=float,
+    default=60,
+    show_default=True,
+)
+@click.pass_context
+def watch(
+    ctx: any,
+    device_uids: List[str],
+    device_query: str,
+    until_online: bool,
+    timeout_seconds: float,
+    min_interval_seconds: float,
+    max_interval_seconds: float,
+) -> None:
+    """Print the connectivity changes of devices while they are onboarded or upgraded."""
+    import sys
+
+    from cdo_sdk_python import ConnectivityState
+    from rich.console import Console
+
+    from models.monitoring import ConnectivityTransition
+    from services.connectivity_watcher import ConnectivityWatcher, state_of
+    from services.inventory_api_service import InventoryApiService
+
+    if not device_uids and not device_query:
+        raise click.UsageError(
+            "Specify the devices with --device-uid or --device-query."
+        )
+
+    console = Console()
+    api_client = get_api_client(ctx)
+    watcher = ConnectivityWatcher(
+        api_client,
+        min_interval_seconds=min_interval_seconds,
+        max_interval_seconds=max_interval_seconds,
+    )
+    watcher.watch(device_uids)
+    if device_query:
+        # the query is resolved once, so that devices are still watched when they no longer match it
+        watcher.watch(
+            device.uid
+            for device in InventoryApiService(api_client).get_devices(q=device_query)
+        )
+    console.print(f"Watching {len(watcher.devices)} devices...")
+
+    def print_transition(transition: ConnectivityTransition) -> None:
+        console.print(
+            f"{time.strftime('%H:%M:%S', time.localtime(transition.timestamp))} "
+            f"{transition.device_name or transition.device_uid}: "
+            f"{transition.previous_state or '-'} -> {transition.state or 'not in the inventory'}"
+        )
+
+    if not until_online:
+        try:
+            watcher.run_forever(print_transition)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    unsettled = watcher.wait_until(
+        lambda device: device.connectivity_state == ConnectivityState.ONLINE,
+        timeout_seconds=timeout_seconds,
+        on_transition=print_transition,
+    )
+    if unsettled:
+        for uid, device in unsettled.items():
+            console.print(
+                f"[red]{device.name if device else uid}: {state_of(device) or 'not in the inventory'}[/red]"
+            )
+        console.print(
+            f"[red]{len(unsettled)} devices not ONLINE after {timeout_seconds:g}s[/red]"
+        )
+        sys.exit(1)
+    console.print(f"[green]All {len(watcher.devices)} devices are ONLINE[/green]")
+
+
+cli.add_command(collect)
+cli.add_command(query)
+cli.add_command(alerts)
+cli.add_command(watch)
+
+if __name__ == "__main__":
+    cli(obj={})
@@ -1,25 +1,11 @@
 import re
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List
 
 import click
-import questionary
-from cdo_sdk_python import (
-    ZtpOnboardingInput,
-    ApiClient,
-    Configuration,
-    MspManagedTenant,
-    FtdCreateOrUpdateInput,
-    Device,
-)
 from click_option_group import optgroup, AllOptionGroup, MutuallyExclusiveOptionGroup
-from rich.console import Console
 
-from parsers.ftd_parser import FtdParser
-from parsers.ftd_ztp_parser import FtdZtpParser
-from services.inventory_api_service import InventoryApiService
-from services.msp_api_service import MspApiService
-from services.scc_credentials_service import SccCredentialsService
+from utils.batch_mode import batch_mode, batch_option
 from utils.region_mapping import supported_regions
 from validators.ftd_csv_validator import FtdCsvValidator
 from validators.ftd_ztp_csv_validator import FtdZtpCsvValidator
@@ -100,6 +86,12 @@ def validate_ztp_ftd_csv_file(
     callback=validate_ztp_ftd_csv_file,
     help="Path to the CSV file with FTD information. The CSV file should contain the FTD name, serial number, admin password, and licenses",
 )
+@click.option(
+    "--no-token-cache",
+    is_flag=True,
+    default=False,
+    help="Always generate a new API token for the MSP-managed tenant instead of reusing one cached in ~/.cisco-security-token-cache.yaml.",
+)
 @optgroup.group("API Credentials", cls=AllOptionGroup)
 @optgroup.option(
     "--region",
@@ -107,6 +99,7 @@ def validate_ztp_ftd_csv_file(
     type=click.Choice(supported_regions),
 )
 @optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
 def main(
     tenant_uid: str,
     username: str,
@@ -115,7 +108,26 @@ def main(
     region: str,
     api_token: str,
     fmc_access_policy_uid: str,
+    no_token_cache: bool,
 ) -> None:
+    # the SDK, prompts and services are imported here rather than at module load so that --help stays fast
+    from cdo_sdk_python import (
+        ApiClient,
+        ZtpOnboardingInput,
+        MspManagedTenant,
+        FtdCreateOrUpdateInput,
+        Device,
+    )
+    from rich.console import Console
+
+    from parsers.ftd_parser import FtdParser
+    from parsers.ftd_ztp_parser import FtdZtpParser
+    from services.api_client_registry import api_client_registry
+    from services.inventory_api_service import InventoryApiService
+    from services.msp_api_service import MspApiService
+    from services.scc_credentials_service import SccCredentialsService
+    from services.token_cache_service import TokenCacheService
+
     console = Console()
     args: CmdlineArgs = CmdlineArgs(
         tenant_uid=tenant_uid,
@@ -131,68 +143,81 @@ def main(
     )
     credentials_service.load_or_prompt_credentials()
     api_token, base_url = credentials_service.get_credentials()
+    if not args.ftd_csv_file and not args.ftd_ztp_csv_file:
+        batch_mode.ensure_can_prompt("--ftd-csv-file or --ftd-ztp-csv-file")
     if not args.tenant_uid:
+        import questionary
+
+        batch_mode.ensure_can_prompt("--tenant-uid")
         args.tenant_uid = questionary.text(
             message="Enter the MSP-managed tenant UUID, it should be associated with the MSP portal (must match [a-zA-Z0-9-_]{1,50}):",
             validate=lambda text: bool(re.match(UUID_REGEX, text)),
         ).ask()
     if not args.fmc_access_policy_uid:
+        import questionary
+
+        batch_mode.ensure_can_prompt("--fmc-access-policy-uid")
         args.fmc_access_policy_uid = questionary.text(
             message="Enter the access policy UUID to apply to each onboarded device:",
             validate=lambda text: bool(re.match(UUID_REGEX, text)),
         ).ask()
 
-    ztp_onboarding_inputs: List[ZtpOnboardingInput] = FtdZtpParser(
-        ftd_ztp_csv_file=args.ftd_ztp_csv_file,
-        fmc_access_policy_uid=args.fmc_access_policy_uid,
-    ).get_ztp_onboarding_inputs()
-
-    ftd_onboarding_inputs: List[FtdCreateOrUpdateInput] = FtdParser(
-        ftd_csv_file=args.ftd_csv_file,
-        fmc_access_policy_uid=args.fmc_access_policy_uid,
-    ).get_ftds_to_onboard()
-
-    with ApiClient(
-        Configuration(host=base_url, access_token=api_token)
-    ) as msp_api_client:
-        msp_api_service = MspApiService(api_client=msp_api_client)
-        msp_managed_tenant: MspManagedTenant = (
-            msp_api_service.get_managed_tenant_by_uid(tenant_uid=args.tenant_uid)
+    # the CSV files are mutually exclusive, so only prompt for devices of the other onboarding type if neither is given
+    ztp_onboarding_inputs: List[ZtpOnboardingInput] = (
+        []
+        if args.ftd_csv_file
+        else FtdZtpParser(
+            ftd_ztp_csv_file=args.ftd_ztp_csv_file,
+            fmc_access_policy_uid=args.fmc_access_policy_uid,
+        ).get_ztp_onboarding_inputs()
+    )
+
+    ftd_onboarding_inputs: List[FtdCreateOrUpdateInput] = (
+        []
+        if args.ftd_ztp_csv_file
+        else FtdParser(
+            ftd_csv_file=args.ftd_csv_file,
+            fmc_access_policy_uid=args.fmc_access_policy_uid,
+        ).get_ftds_to_onboard()
+    )
+
+    msp_api_client = api_client_registry.get_api_client(
+        host=base_url, access_token=api_token
+    )
+    msp_api_service = MspApiService(
+        api_client=msp_api_client,
+        token_cache_service=None if no_token_cache else TokenCacheService(),
+    )
+    msp_managed_tenant: MspManagedTenant = msp_api_service.get_managed_tenant_by_uid(
+        tenant_uid=args.tenant_uid
+    )
+    managed_tenant_api_client: ApiClient = (
+        msp_api_service.get_managed_tenant_api_client(
+            msp_managed_tenant=msp_managed_tenant,
+            username=(
+                args.username
+                if args.username is not None
+                else f"{msp_managed_tenant.name.replace('CDO_', '').split('__')[0]}-api-only-user"
+            ),
         )
-        msp_managed_tenant_api_token: str = (
-            msp_api_service.generate_managed_tenant_api_token(
-                msp_managed_tenant=msp_managed_tenant,
-                username=(
-                    args.username
-                    if args.username is not None
-                    else f"{msp_managed_tenant.name.replace("CDO_", "").split("__")[0]}-api-only-user"
-                ),
-            )
+    )
+    console.print(
+        f"[green]Retrieved API token for {msp_managed_tenant.name} (UID: {msp_managed_tenant.uid})[/green]"
+    )
+
+    inventory_api_service = InventoryApiService(api_client=managed_tenant_api_client)
+    for ztp_onboarding_input in ztp_onboarding_inputs:
+        ztp_device: Device = inventory_api_service.onboard_ftd_ztp_device(
+            ztp_onboarding_input=ztp_onboarding_input
         )
         console.print(
-            f"[green]Generated API token for {msp_managed_tenant.name} (UID: {msp_managed_tenant.uid})[/green]"
+            f"[green]Onboarded FTD {ztp_device.name} (UID: {ztp_device.uid})[/green]"
         )
-
-    with ApiClient(
-        Configuration(host=base_url, access_token=msp_managed_tenant_api_token)
-    ) as managed_tenant_api_client:
-        inventory_api_service = InventoryApiService(
-            api_client=managed_tenant_api_client
+    for ftd_onboarding_input in ftd_onboarding_inputs:
+        device: Device = inventory_api_service.onboard_ftd_device(
+            ftd_input=ftd_onboarding_input
         )
-        for ztp_onboarding_input in ztp_onboarding_inputs:
-            ztp_device: Device = inventory_api_service.onboard_ftd_ztp_device(
-                ztp_onboarding_input=ztp_onboarding_input
-            )
-            console.print(
-                f"[green]Onboarded FTD {ztp_device.name} (UID: {ztp_device.uid})[/green]"
-            )
-        for ftd_onboarding_input in ftd_onboarding_inputs:
-            device: Device = inventory_api_service.onboard_ftd_device(
-                ftd_input=ftd_onboarding_input
-            )
-            console.print(
-                f"[green]Onboarded FTD {device.name} (UID: {device.uid})[/green]"
-            )
+        console.print(f"[green]Onboarded FTD {device.name} (UID: {device.uid})[/green]")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,10 @@
 import csv
 from typing import List
 
-import questionary
 from cdo_sdk_python import FtdCreateOrUpdateInput
 
+from utils.batch_mode import batch_mode
+
 
 class FtdParser:
     def __init__(self, fmc_access_policy_uid: str, ftd_csv_file: str = None):
@@ -15,6 +16,8 @@ class FtdParser:
     ) -> List[FtdCreateOrUpdateInput]:
         if self.ftd_csv_file:
             return self._parse_csv()
+        elif batch_mode.enabled:
+            return []
         else:
             return self._prompt_ftd_details()
 
@@ -39,6 +42,8 @@ class FtdParser:
         return ftd_credentials
 
     def _prompt_ftd_details(self) -> List[FtdCreateOrUpdateInput]:
+        import questionary
+
         ftd_inputs = []
 
         get_ftd_details = questionary.confirm(
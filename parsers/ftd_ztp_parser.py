@@ -2,9 +2,10 @@ import csv
 import re
 from typing import List, Optional
 
-import questionary
 from cdo_sdk_python.models.ztp_onboarding_input import ZtpOnboardingInput
 
+from utils.batch_mode import batch_mode
+
 
 class FtdZtpParser:
     def __init__(
@@ -18,6 +19,8 @@ class FtdZtpParser:
     def get_ztp_onboarding_inputs(self) -> List[ZtpOnboardingInput]:
         if self.ftd_ztp_csv_file:
             return self._parse_csv()
+        elif batch_mode.enabled:
+            return []
         else:
             return self._prompt_ztp_details()
 
@@ -39,6 +42,8 @@ class FtdZtpParser:
         return ztp_onboarding_inputs
 
     def _prompt_ztp_details(self) -> List[ZtpOnboardingInput]:
+        import questionary
+
         ztp_onboarding_inputs = []
 
         onboard_ztp = questionary.confirm(
@@ -1,8 +1,8 @@
 import csv
 from typing import List
 from cdo_sdk_python.models import UserInput
-from email_validator import validate_email, EmailNotValidError
-import questionary
+
+from utils.batch_mode import batch_mode
 
 
 class SccUsersParser:
@@ -12,6 +12,9 @@ class SccUsersParser:
     def get_users(self) -> List[UserInput]:
         if self.users_csv_file:
             return self._parse_csv()
+        elif batch_mode.enabled:
+            # in batch mode, only the users in the CSV file are created
+            return []
         else:
             return self._prompt_users()
 
@@ -31,6 +34,9 @@ class SccUsersParser:
 
     @staticmethod
     def _prompt_users() -> List[UserInput]:
+        import questionary
+        from email_validator import validate_email, EmailNotValidError
+
         users = []
 
         create_users = questionary.confirm(
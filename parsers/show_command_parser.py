@@ -0,0 +1,160 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+
+from models.cli_output import (
+    ConnectionCount,
+    CpuUsage,
+    Interface,
+    MemoryUsage,
+    ObjectGroup,
+    ObjectGroupMember,
+    VersionInfo,
+)
+
+T = TypeVar("T")
+
+
+@dataclass
+class FieldRule:
+    """Sets the fields to the groups of the first match of the pattern, converted with convert."""
+
+    fields: List[str]
+    pattern: re.Pattern
+    convert: Callable[[str], Any] = str
+
+
+def _rule(fields: str, pattern: str, convert: Callable[[str], Any] = str) -> FieldRule:
+    return FieldRule(fields.split(), re.compile(pattern, re.MULTILINE), convert)
+
+
+# ASA and FTD word show version differently, so fields can have a rule per platform; the first rule that matches wins
+VERSION_RULES: List[FieldRule] = [
+    _rule("software_version", r"Software Version (\S+)"),
+    _rule("software_version build", r"Version (\d[\w.()]*) \(Build (\d+)\)"),
+    _rule("device_manager_version", r"Device Manager Version (\S+)"),
+    _rule("hostname uptime", r"^(\S+) up (.+?)\s*$"),
+    _rule("hostname", r"^-+\[ (\S+) \]-+"),
+    _rule("hardware_model", r"^Hardware:\s+([^,\n]+)"),
+    _rule("hardware_model", r"^Model\s+:\s+(.+?)(?: \(\d+\))? Version"),
+    _rule("serial_number", r"^Serial Number:\s+(\S+)"),
+]
+CPU_USAGE_RULES: List[FieldRule] = [
+    _rule(
+        "five_seconds_percent one_minute_percent five_minutes_percent",
+        r"CPU utilization for 5 seconds = (\d+(?:\.\d+)?)%; 1 minute: (\d+(?:\.\d+)?)%; 5 minutes: (\d+(?:\.\d+)?)%",
+        float,
+    ),
+]
+MEMORY_USAGE_RULES: List[FieldRule] = [
+    _rule("free_bytes", r"^Free memory:\s+(\d+) bytes", int),
+    _rule("used_bytes used_percent", r"^Used memory:\s+(\d+) bytes \(\s*(\d+)%\)", int),
+]
+CONNECTION_COUNT_RULES: List[FieldRule] = [
+    _rule("in_use most_used", r"(\d+) in use, (\d+) most used", int),
+]
+INTERFACE_RULES: List[FieldRule] = [
+    _rule("mac_address", r"MAC address ([0-9a-f.]+)"),
+    _rule("mtu", r"MAC address [0-9a-f.]+, MTU (\d+)", int),
+    _rule("ip_address subnet_mask", r"IP address ([\d.]+), subnet mask ([\d.]+)"),
+    _rule("packets_input bytes_input", r"(\d+) packets input, (\d+) bytes", int),
+    _rule("input_errors", r"(\d+) input errors", int),
+    _rule("packets_output bytes_output", r"(\d+) packets output, (\d+) bytes", int),
+    _rule("output_errors", r"(\d+) output errors", int),
+]
+
+_INTERFACE_HEADER = re.compile(
+    r'^Interface (\S+) "([^"]*)", is ([\w ]+?), line protocol is (\w+)', re.MULTILINE
+)
+_OBJECT_GROUP_HEADER = re.compile(
+    r"^object-group (\S+) (\S+)(?: (\S+))?\s*$", re.MULTILINE
+)
+_OBJECT_GROUP_LINE = re.compile(r"^ +(\S+) ?(.*?)\s*$", re.MULTILINE)
+
+
+def parse_fields(output: str, rules: List[FieldRule]) -> Dict[str, Any]:
+    values: Dict[str, Any] = {}
+    for rule in rules:
+        if all(field in values for field in rule.fields):
+            continue
+        match = rule.pattern.search(output)
+        if match is None:
+            continue
+        for field, value in zip(rule.fields, match.groups()):
+            if field not in values and value is not None:
+                values[field] = rule.convert(value)
+    return values
+
+
+def _parse_record(
+    output: str, rules: List[FieldRule], record_class: Type[T]
+) -> Optional[T]:
+    # records with required fields are only returned when the output contains all of them
+    try:
+        return record_class(**parse_fields(output, rules))
+    except TypeError:
+        return None
+
+
+def parse_show_version(output: str) -> VersionInfo:
+    return VersionInfo(**parse_fields(output, VERSION_RULES))
+
+
+def parse_show_cpu_usage(output: str) -> Optional[CpuUsage]:
+    return _parse_record(output, CPU_USAGE_RULES, CpuUsage)
+
+
+def parse_show_memory(output: str) -> Optional[MemoryUsage]:
+    return _parse_record(output, MEMORY_USAGE_RULES, MemoryUsage)
+
+
+def parse_show_conn_count(output: str) -> Optional[ConnectionCount]:
+    return _parse_record(output, CONNECTION_COUNT_RULES, ConnectionCount)
+
+
+def _blocks(output: str, header: re.Pattern) -> List[tuple]:
+    """Splits the output into (header match, body) pairs, one per block starting with a header line."""
+    matches = list(header.finditer(output))
+    return [
+        (
+            match,
+            output[
+                match.end() : (
+                    matches[index + 1].start() if index + 1 < len(matches) else None
+                )
+            ],
+        )
+        for index, match in enumerate(matches)
+    ]
+
+
+def parse_show_interface(output: str) -> List[Interface]:
+    return [
+        Interface(
+            name=header.group(1),
+            nameif=header.group(2) or None,
+            status=header.group(3),
+            line_protocol=header.group(4),
+            **parse_fields(body, INTERFACE_RULES),
+        )
+        for header, body in _blocks(output, _INTERFACE_HEADER)
+    ]
+
+
+def parse_show_run_object_group(output: str) -> List[ObjectGroup]:
+    object_groups = []
+    for header, body in _blocks(output, _OBJECT_GROUP_HEADER):
+        object_group = ObjectGroup(
+            group_type=header.group(1),
+            name=header.group(2),
+            protocol=header.group(3),
+        )
+        for line in _OBJECT_GROUP_LINE.finditer(body):
+            if line.group(1) == "description":
+                object_group.description = line.group(2)
+            else:
+                object_group.members.append(
+                    ObjectGroupMember(kind=line.group(1), value=line.group(2))
+                )
+        object_groups.append(object_group)
+    return object_groups
@@ -0,0 +1,376 @@
+from typing import Any, Callable, Dict, List, TYPE_CHECKING
+
+import click
+from click_option_group import AllOptionGroup, optgroup
+
+from export_inventory import (
+    format_option,
+    output_argument,
+    resolve_export_format,
+    with_versions_option,
+)
+from utils.batch_mode import batch_mode, batch_option
+from utils.cli_context import store_credential_options, get_api_client
+from utils.region_mapping import supported_regions
+
+if TYPE_CHECKING:
+    from services.job_graph import JobResult
+
+
+def run_across_portfolio(
+    ctx: click.Context, operation: Callable[..., Any]
+) -> Dict[str, "JobResult"]:
+    from rich.console import Console
+    from rich.table import Table
+
+    from services.job_graph import DONE, JobResult
+    from services.portfolio_service import PortfolioService
+    from services.token_cache_service import TokenCacheService
+
+    console = Console()
+    portfolio_service = PortfolioService(
+        msp_api_client=get_api_client(ctx),
+        token_cache_service=(
+            None if ctx.obj["no_token_cache"] else TokenCacheService()
+        ),
+        api_only_user=ctx.obj["api_only_user"],
+    )
+    # the operation runs unattended, in parallel across the tenants
+    batch_mode.enable()
+    tenants = portfolio_service.get_tenants(q=ctx.obj["tenant_query"])
+    console.print(f"Running across {len(tenants)} tenants...")
+
+    def print_result(result: JobResult) -> None:
+        if result.status == DONE:
+            console.print(
+                f"[green]{result.name}: {result.result} ({result.duration_seconds:.1f}s)[/green]"
+            )
+        else:
+            console.print(f"[red]{result.name}: failed, {result.error}[/red]")
+
+    results = portfolio_service.run(
+        tenants,
+        operation,
+        max_concurrent_tenants=ctx.obj["max_concurrent_tenants"],
+        on_finished=print_result,
+    )
+    table = Table(title=f"{len(results)} tenants")
+    table.add_column("Tenant", justify="left")
+    table.add_column("Status", justify="center")
+    table.add_column("Seconds", justify="right")
+    for tenant in tenants:
+        result = results[tenant.name]
+        table.add_row(tenant.name, result.status, f"{result.duration_seconds:.1f}")
+    console.print(table)
+    return results
+
+
+def print_totals(
+    title: str, columns: List[str], results: Dict[str, "JobResult"]
+) -> None:
+    # each tenant's result counts its devices by the values of the columns
+    from collections import Counter
+
+    from rich.console import Console
+    from rich.table import Table
+
+    totals = Counter()
+    tenant_counts = Counter()
+    for result in results.values():
+        for key, count in (result.result or {}).items():
+            totals[key] += count
+            tenant_counts[key] += 1
+    table = Table(title=title)
+    for column in columns:
+        table.add_column(column, justify="left")
+    table.add_column("Devices", justify="right")
+    table.add_column("Tenants", justify="right")
+    for key, count in sorted(totals.items()):
+        table.add_row(*key, str(count), str(tenant_counts[key]))
+    Console().print(table)
+
+
+def exit_if_any_tenant_failed(results: Dict[str, "JobResult"]) -> None:
+    import sys
+
+    from services.job_graph import DONE
+
+    if any(result.status != DONE for result in results.values()):
+        sys.exit(1)
+
+
+@click.group(
+    help="Run an operation across every MSP-managed tenant of the portfolio, in parallel. You need a super-admin API token generated using the Cisco Security Cloud Control MSSP portal to use these commands."
+)
+@click.option(
+    "--tenant-query",
+    help="Only the tenants matching this query, e.g. 'name:acme*'.",
+    type=str,
+)
+@click.option(
+    "--max-concurrent-tenants",
+    help="The number of tenants worked on at the same time.",
+    type=int,
+    default=16,
+    show_default=True,
+)
+@click.option(
+    "--api-only-user",
+    help="The API-only user whose API token is used in each tenant. {tenant_name} is replaced with the tenant's name.",
+    type=str,
+    default="{tenant_name}-api-only-user",
+    show_default=True,
+)
+@click.option(
+    "--no-token-cache",
+    is_flag=True,
+    default=False,
+    help="Always generate new API tokens for the tenants instead of reusing the ones cached in ~/.cisco-security-token-cache.yaml.",
+)
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
+@click.pass_context
+def cli(
+    ctx: any,
+    tenant_query: str,
+    max_concurrent_tenants: int,
+    api_only_user: str,
+    no_token_cache: bool,
+    api_token: str,
+    region: str,
+) -> None:
+    store_credential_options(ctx, region=region, api_token=api_token)
+    ctx.obj["tenant_query"] = tenant_query
+    ctx.obj["max_concurrent_tenants"] = max_concurrent_tenants
+    ctx.obj["api_only_user"] = api_only_user
+    ctx.obj["no_token_cache"] = no_token_cache
+
+
+@click.command(name="inventory")
+@click.option(
+    "--output",
+    help="Also write every device, with its tenant, to this file as JSON lines.",
+    type=click.Path(dir_okay=False, writable=True),
+)
+@click.pass_context
+def inventory(ctx: any, output: str) -> None:
+    """Count the devices of every tenant by type and connectivity state."""
+    import json
+    import threading
+    from collections import Counter
+
+    from services.inventory_api_service import InventoryApiService
+
+    output_file = open(output, "w") if output else None
+    output_lock = threading.Lock()
+
+    def count_devices(tenant, api_client) -> Counter:
+        devices = InventoryApiService(api_client).get_devices()
+        if output_file is not None:
+            lines = "".join(
+                json.dumps(
+                    {
+                        "tenant_uid": tenant.uid,
+                        "tenant_name": tenant.name,
+                        **device.model_dump(mode="json", exclude_none=True),
+                    }
+                )
+                + "\n"
+                for device in devices
+            )
+            with output_lock:
+                output_file.write(lines)
+        return Counter(
+            (str(device.device_type.value), str(device.connectivity_state.value))
+            for device in devices
+        )
+
+    try:
+        results = run_across_portfolio(ctx, count_devices)
+    finally:
+        if output_file is not None:
+            output_file.close()
+
+    print_totals(
+        f"Devices in {len(results)} tenants",
+        ["Device Type", "Connectivity State"],
+        results,
+    )
+    exit_if_any_tenant_failed(results)
+
+
+@click.command(name="export")
+@output_argument
+@format_option
+@with_versions_option
+@click.pass_context
+def export(ctx: any, output_file: str, export_format: str, with_versions: bool) -> None:
+    """Export the devices of every tenant, with their tenant, to one CSV, JSON lines or Parquet file."""
+    from services.inventory_export_service import (
+        InventoryExportService,
+        open_device_writer,
+    )
+
+    export_format = resolve_export_format(output_file, export_format)
+    writer = open_device_writer(
+        output_file, export_format, InventoryExportService.columns(with_versions)
+    )
+    export_service = InventoryExportService(writer, with_versions=with_versions)
+
+    def export_devices(tenant, api_client) -> str:
+        return f"Exported {export_service.export_tenant(api_client, tenant)} devices"
+
+    try:
+        results = run_across_portfolio(ctx, export_devices)
+    finally:
+        writer.close()
+    click.echo(f"Exported {writer.rows_written} devices to {output_file}")
+    exit_if_any_tenant_failed(results)
+
+
+@click.command(name="versions")
+@click.pass_context
+def versions(ctx: any) -> None:
+    """Count the FTDs and ASAs of every tenant by software version."""
+    from collections import Counter
+
+    from services.inventory_api_service import InventoryApiService
+
+    def count_versions(tenant, api_client) -> Counter:
+        return Counter(
+            (str(device.device_type.value), device.software_version or "unknown")
+            for device in InventoryApiService(api_client).get_devices(
+                q="deviceType:(CDFMC_MANAGED_FTD OR ASA)"
+            )
+        )
+
+    results = run_across_portfolio(ctx, count_versions)
+    print_totals("Software versions", ["Device Type", "Version"], results)
+    exit_if_any_tenant_failed(results)
+
+
+def parse_ips(ctx: any, param: any, comma_separated_ips: str) -> list:
+    from commands.add_ips_to_object_group import validate_ips
+
+    return validate_ips(comma_separated_ips)
+
+
+@click.command(name="add-ips-to-object-group")
+@click.option(
+    "--obj-name",
+    help="The name of the object group to add the IPs to",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--ips-to-add",
+    help="Comma separated list of IPs to add to the object group",
+    type=str,
+    required=True,
+    callback=parse_ips,
+)
+@click.pass_context
+def add_ips_to_object_group(ctx: any, obj_name: str, ips_to_add: list) -> None:
+    """Add IPs to an object group on every online ASA of every tenant."""
+    from services.cli_api_service import CliApiService
+    from services.inventory_api_service import InventoryApiService
+
+    commands = [f"object-group network {obj_name}"]
+    commands.extend([f" network-object host {ip}" for ip in ips_to_add])
+
+    def push_object_group(tenant, api_client) -> str:
+        asa_uids = [
+            device.uid
+            for device in InventoryApiService(api_client).get_devices(
+                q="deviceType:ASA AND connectivityState:ONLINE"
+            )
+        ]
+        if len(asa_uids) == 0:
+            return "No online ASAs"
+        cli_result = CliApiService(api_client).run_command(
+            asa_uids, "\n".join(commands)
+        )
+        if cli_result.error_msg is not None:
+            raise RuntimeError(cli_result.error_msg)
+        return f"Updated {obj_name} on {len(asa_uids)} ASAs"
+
+    exit_if_any_tenant_failed(run_across_portfolio(ctx, push_object_group))
+
+
+@click.command(name="upgrade-ftd")
+@click.option(
+    "--software-version",
+    help="The version to upgrade the online FTDs of every tenant to.",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--max-concurrent-upgrades-per-tenant",
+    help="The number of FTDs of a tenant upgrading at the same time.",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+)
+@click.pass_context
+def upgrade_ftd(
+    ctx: any, software_version: str, max_concurrent_upgrades_per_tenant: int
+) -> None:
+    """Upgrade every online FTD of every tenant that is not on the given version yet."""
+    from models.upgrade_readiness import ALREADY_ON_TARGET, ELIGIBLE
+    from models.upgrade_wave import WaveEntry
+    from services.job_graph import DONE
+    from services.upgrade_readiness_service import UpgradeReadinessService
+    from services.upgrade_wave_service import UpgradeWaveService
+
+    def upgrade_tenant_ftds(tenant, api_client) -> str:
+        readiness_service = UpgradeReadinessService(api_client)
+        entries, incompatible = [], []
+        for readiness in readiness_service.assess(
+            "ftd", [software_version], q="connectivityState:ONLINE"
+        ):
+            if readiness.status == ALREADY_ON_TARGET:
+                continue
+            if readiness.status != ELIGIBLE:
+                incompatible.append(readiness.name)
+                continue
+            entries.append(
+                WaveEntry(
+                    device_uid=readiness.uid,
+                    device_name=readiness.name,
+                    current_version=readiness.software_version,
+                    software_version=software_version,
+                    upgrade_package_uid=readiness_service.get_upgrade_package_uid(
+                        readiness, software_version
+                    ),
+                )
+            )
+        # the same upgrade waves as upgrade-wave run, so the FTDs of a tenant upgrade concurrently
+        results = UpgradeWaveService(api_client).run(
+            entries, max_concurrent_transfers=max_concurrent_upgrades_per_tenant
+        )
+        failed = [name for name, result in results.items() if result.status != DONE]
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(entries)} FTD upgrades failed: {', '.join(failed)}"
+            )
+        if incompatible:
+            return f"Upgraded {len(entries)} FTDs; cannot upgrade {', '.join(incompatible)} to {software_version}"
+        return f"Upgraded {len(entries)} FTDs"
+
+    exit_if_any_tenant_failed(run_across_portfolio(ctx, upgrade_tenant_ftds))
+
+
+cli.add_command(inventory)
+cli.add_command(export)
+cli.add_command(versions)
+cli.add_command(add_ips_to_object_group)
+cli.add_command(upgrade_ftd)
+
+if __name__ == "__main__":
+    cli(obj={})
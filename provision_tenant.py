@@ -1,20 +1,20 @@
 import re
+import sys
 from dataclasses import dataclass
-from typing import List
+from typing import List, TYPE_CHECKING
 
 import click
-import questionary
-from cdo_sdk_python import ApiClient, Configuration, UserInput, MspManagedTenant
 from click_option_group import optgroup, AllOptionGroup
-from rich.console import Console
 
-from parsers.scc_users_parser import SccUsersParser
-from services.cdfmc_api_service import CdFmcApiService
-from services.msp_api_service import MspApiService
-from services.scc_credentials_service import SccCredentialsService
+from utils.batch_mode import batch_mode, batch_option
 from utils.region_mapping import supported_regions
 from validators.users_csv_validator import UsersCsvValidator
 
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from models.msp import FailedUserCreation
+
 
 @dataclass
 class CmdlineArgs:
@@ -36,6 +36,22 @@ def validate_user_csv_file(
     return value
 
 
+def print_failed_users(
+    console: "Console", failed_users: List["FailedUserCreation"]
+) -> None:
+    from rich.table import Table
+
+    table = Table(title=f"{len(failed_users)} users could not be created")
+    table.add_column("Username", justify="left")
+    table.add_column("Role", justify="center")
+    table.add_column("Reason", justify="left")
+    for failed_user in failed_users:
+        table.add_row(
+            failed_user.user.username, failed_user.user.role, failed_user.reason
+        )
+    console.print(table)
+
+
 @click.command(
     help="Create a new MSSP-managed tenant. You need a super-admin API token generated using the Cisco Security Cloud Control MSSP portal to use this script."
 )
@@ -61,6 +77,7 @@ def validate_user_csv_file(
     type=click.Choice(supported_regions),
 )
 @optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
 def main(
     tenant_name: str,
     display_name: str,
@@ -69,6 +86,17 @@ def main(
     api_token: str,
     provision_cdfmc: str,
 ) -> None:
+    # the SDK, prompts and services are imported here rather than at module load so that --help stays fast
+    import questionary
+    from cdo_sdk_python import UserInput, MspManagedTenant
+    from rich.console import Console
+
+    from parsers.scc_users_parser import SccUsersParser
+    from services.api_client_registry import api_client_registry
+    from services.cdfmc_api_service import CdFmcApiService
+    from services.msp_api_service import MspApiService
+    from services.scc_credentials_service import SccCredentialsService
+
     args: CmdlineArgs = CmdlineArgs(
         tenant_name=tenant_name,
         display_name=display_name,
@@ -83,15 +111,16 @@ def main(
     credentials_service.load_or_prompt_credentials()
     scc_users_parser = SccUsersParser(args.users_csv_file)
     console = Console()
-    credentials_service.load_or_prompt_credentials()
     api_token, base_url = credentials_service.get_credentials()
 
     if not args.tenant_name:
+        batch_mode.ensure_can_prompt("--tenant-name")
         args.tenant_name = questionary.text(
             message="Enter the tenant name (must match [a-zA-Z0-9-_]{1,50}):",
             validate=lambda text: bool(re.match(r"^[a-zA-Z0-9-_]{1,50}$", text)),
         ).ask()
     if not args.display_name:
+        batch_mode.ensure_can_prompt("--display-name")
         args.display_name = questionary.text("Enter the display name:").ask()
     users: List[UserInput] = scc_users_parser.get_users()
     api_only_user_name = f"{args.tenant_name}-api-only-user"
@@ -103,6 +132,9 @@ def main(
     )
     users.append(api_only_user)
 
+    if not args.provision_cdfmc and batch_mode.enabled:
+        # the prompt's default
+        args.provision_cdfmc = "no"
     if not args.provision_cdfmc:
         args.provision_cdfmc = questionary.text(
             message="Do you want to provision a cdFMC? [yes/no]",
@@ -110,38 +142,53 @@ def main(
             validate=lambda text: text.lower() in ["yes", "no"],
         ).ask()
 
-    with ApiClient(Configuration(host=base_url, access_token=api_token)) as api_client:
-        msp_api_service = MspApiService(api_client=api_client)
-        msp_managed_tenant: MspManagedTenant = msp_api_service.create_tenant(
-            tenant_name=args.tenant_name,
-            display_name=args.display_name,
-        )
-        console.print(
-            f"[green]Tenant {msp_managed_tenant.display_name} (UID: {msp_managed_tenant.uid})created successfully[/green]"
-        )
-        msp_api_service.create_users(users=users, msp_managed_tenant=msp_managed_tenant)
+    api_client = api_client_registry.get_api_client(
+        host=base_url, access_token=api_token
+    )
+    msp_api_service = MspApiService(api_client=api_client)
+    msp_managed_tenant: MspManagedTenant = msp_api_service.create_tenant(
+        tenant_name=args.tenant_name,
+        display_name=args.display_name,
+    )
+    console.print(
+        f"[green]Tenant {msp_managed_tenant.display_name} (UID: {msp_managed_tenant.uid})created successfully[/green]"
+    )
+    failed_users: List[FailedUserCreation] = msp_api_service.create_users_in_chunks(
+        users=users, msp_managed_tenant=msp_managed_tenant
+    )
+    if len(failed_users) == 0:
         console.print("[green]Users added to tenant successfully[/green]")
-        msp_managed_tenant_api_token = (
-            msp_api_service.generate_managed_tenant_api_token(
-                msp_managed_tenant=msp_managed_tenant, username=api_only_user_name
-            )
-        )
-        msp_api_service.provision_cdfmc_on_msp_managed_tenant(
-            msp_managed_tenant=msp_managed_tenant,
-            msp_managed_tenant_api_token=msp_managed_tenant_api_token,
-            should_wait_for_cdfmc_to_be_active=True,
-        )
-        console.print("[green]cdFMC provisioned successfully[/green]")
-        cdfmc_api_service = CdFmcApiService(
-            api_client=ApiClient(
-                Configuration(host=base_url, access_token=msp_managed_tenant_api_token)
+    else:
+        print_failed_users(console, failed_users)
+        if any(
+            failed_user.user.username == api_only_user_name
+            for failed_user in failed_users
+        ):
+            console.print(
+                f"[red]Could not create API-only user {api_only_user_name}; cannot configure the tenant.[/red]"
             )
+            sys.exit(1)
+    if args.provision_cdfmc.lower() != "yes":
+        return
+    msp_managed_tenant_api_token = msp_api_service.generate_managed_tenant_api_token(
+        msp_managed_tenant=msp_managed_tenant, username=api_only_user_name
+    )
+    msp_api_service.provision_cdfmc_on_msp_managed_tenant(
+        msp_managed_tenant=msp_managed_tenant,
+        msp_managed_tenant_api_token=msp_managed_tenant_api_token,
+        should_wait_for_cdfmc_to_be_active=True,
+    )
+    console.print("[green]cdFMC provisioned successfully[/green]")
+    cdfmc_api_service = CdFmcApiService(
+        api_client=api_client_registry.get_api_client(
+            host=base_url, access_token=msp_managed_tenant_api_token
         )
-        access_policy_uid = cdfmc_api_service.create_default_access_policy()
-        cdfmc_api_service.block_gambling(access_policy_uid=access_policy_uid)
-        console.print(
-            f"[green]MSP access policy with UID {access_policy_uid} created successfully[/green]"
-        )
+    )
+    access_policy_uid = cdfmc_api_service.create_default_access_policy()
+    cdfmc_api_service.block_gambling(access_policy_uid=access_policy_uid)
+    console.print(
+        f"[green]MSP access policy with UID {access_policy_uid} created successfully[/green]"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+from typing import Callable, List, TYPE_CHECKING
+
+import click
+from click_option_group import AllOptionGroup, optgroup
+
+from monitor_fleet import parse_thresholds
+from utils.batch_mode import batch_mode, batch_option
+from utils.cli_context import store_credential_options, get_api_client
+from utils.region_mapping import supported_regions
+
+if TYPE_CHECKING:
+    from models.rollout import RolloutDevice
+
+
+@click.group(
+    help="Upgrade devices canary first, then in growing batches, checking the health of every batch before the next."
+)
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
+@click.pass_context
+def cli(ctx: any, api_token: str, region: str) -> None:
+    store_credential_options(ctx, region=region, api_token=api_token)
+
+
+def rollout_options(command: Callable) -> Callable:
+    options = [
+        click.option(
+            "--canary-size",
+            help="The number of devices upgraded, and checked, before any other.",
+            type=click.IntRange(min=1),
+            default=1,
+            show_default=True,
+        ),
+        click.option(
+            "--growth-factor",
+            help="How much larger each batch is than the one before it.",
+            type=click.FloatRange(min=1),
+            default=2,
+            show_default=True,
+        ),
+        click.option(
+            "--max-batch-size",
+            help="The largest number of devices upgraded at the same time.",
+            type=click.IntRange(min=1),
+            default=50,
+            show_default=True,
+        ),
+        click.option(
+            "--max-failed-devices",
+            help="Halt the rollout when more devices than this failed to upgrade or failed their health checks. Any failed canary halts it.",
+            type=click.IntRange(min=0),
+            default=0,
+            show_default=True,
+        ),
+        click.option(
+            "--recovery-timeout-seconds",
+            help="How long an upgraded device has to come back ONLINE on its new version.",
+            type=float,
+            default=1800,
+            show_default=True,
+        ),
+        click.option(
+            "--poll-interval-seconds",
+            help="The longest time between checks of the connectivity of a recovering batch; checks come faster while devices change state.",
+            type=float,
+            default=15,
+            show_default=True,
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def run_rollout(
+    ctx: any,
+    devices: List["RolloutDevice"],
+    upgrade: Callable[["RolloutDevice"], None],
+    **rollout_settings,
+) -> None:
+    import sys
+
+    from rich.console import Console
+
+    from models.rollout import RolloutBatch
+    from services.rollout_service import RolloutService
+
+    console = Console()
+    if len(devices) == 0:
+        console.print("[green]No devices to upgrade[/green]")
+        return
+    rollout_service = RolloutService(get_api_client(ctx), upgrade, **rollout_settings)
+    names = {device.uid: device.name for device in devices}
+    batch_count = len(rollout_service.plan_batches(devices))
+    # the upgrades run unattended, in parallel
+    batch_mode.enable()
+
+    def print_batch_started(batch: RolloutBatch) -> None:
+        kind = "canary batch" if batch.is_canary else "batch"
+        console.print(
+            f"Upgrading {kind} {batch.number}/{batch_count}: {len(batch.devices)} devices..."
+        )
+
+    def print_batch_finished(batch: RolloutBatch) -> None:
+        for uid, reason in batch.failures.items():
+            console.print(f"[red]{names[uid]} ({uid}): {reason}[/red]")
+        healthy = len(batch.devices) - len(batch.failures)
+        console.print(
+            f"{'[green]' if not batch.failures else '[yellow]'}Batch {batch.number}: {healthy} of "
+            f"{len(batch.devices)} devices upgraded and healthy ({batch.duration_seconds:.0f}s)"
+        )
+
+    result = rollout_service.run(
+        devices,
+        on_batch_started=print_batch_started,
+        on_batch_finished=print_batch_finished,
+    )
+    if result.halted_reason is not None:
+        console.print(
+            f"[red]Rollout halted: {result.halted_reason}. {result.upgraded_count} devices upgraded, "
+            f"{len(result.not_started)} not started.[/red]"
+        )
+        sys.exit(1)
+    if result.failures:
+        console.print(
+            f"[yellow]Upgraded {result.upgraded_count} devices, {len(result.failures)} failed[/yellow]"
+        )
+        sys.exit(1)
+    console.print(f"[green]Upgraded {result.upgraded_count} devices[/green]")
+
+
+@click.command(name="ftd")
+@click.argument("plan_file", type=click.Path(exists=True, dir_okay=False))
+@rollout_options
+@click.pass_context
+def ftd(ctx: any, plan_file: str, **rollout_settings) -> None:
+    """Roll out the FTD upgrades planned in PLAN_FILE with `upgrade-wave plan`, skipping FTDs already upgraded."""
+    from models.rollout import RolloutDevice
+    from models.upgrade_wave import UpgradeWave
+    from services.upgrade_wave_service import UpgradeWaveService
+
+    try:
+        wave = UpgradeWave.load(plan_file)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="PLAN_FILE")
+
+    wave_service = UpgradeWaveService(get_api_client(ctx))
+    entries = {entry.device_uid: entry for entry in wave_service.pending_entries(wave)}
+    devices = [
+        RolloutDevice(
+            uid=entry.device_uid,
+            name=entry.device_name,
+            current_version=entry.current_version,
+            software_version=entry.software_version,
+        )
+        for entry in entries.values()
+    ]
+    run_rollout(
+        ctx,
+        devices,
+        lambda device: wave_service.upgrade(entries[device.uid]),
+        **rollout_settings,
+    )
+
+
+@click.command(name="asa")
+@click.option(
+    "--software-version",
+    help="The software version to upgrade the ASAs to.",
+    type=str,
+)
+@click.option(
+    "--asdm-version",
+    help="The ASDM version to upgrade the ASAs to.",
+    type=str,
+)
+@click.option(
+    "--query",
+    help="Only upgrade the online ASAs matching this query, e.g. 'name:branch*'.",
+    type=str,
+)
+@click.option(
+    "--health-gate",
+    "health_gates",
+    help="A threshold upgraded ASAs must stay within, checked on the CLI, e.g. 'cpu.usage_1m_percent>90'. Can be repeated.",
+    multiple=True,
+    callback=parse_thresholds,
+)
+@click.option(
+    "--soak-seconds",
+    help="How long upgraded ASAs run before their health gates are checked.",
+    type=float,
+    default=0,
+    show_default=True,
+)
+@rollout_options
+@click.pass_context
+def asa(
+    ctx: any,
+    software_version: str,
+    asdm_version: str,
+    query: str,
+    **rollout_settings,
+) -> None:
+    """Roll out an ASA software and/or ASDM version to the online ASAs not already running it."""
+    from cdo_sdk_python import UpgradeAsaDeviceInput
+
+    from models.rollout import RolloutDevice
+    from services.device_upgrade_api_service import DeviceUpgradeApiService
+    from services.inventory_api_service import InventoryApiService
+    from services.transaction_service import TransactionService
+
+    if software_version is None and asdm_version is None:
+        raise click.UsageError(
+            "Specify --software-version and/or --asdm-version to upgrade to."
+        )
+
+    api_client = get_api_client(ctx)
+    device_query = "deviceType:ASA AND connectivityState:ONLINE"
+    if query:
+        device_query = f"{device_query} AND ({query})"
+    devices = [
+        RolloutDevice(
+            uid=device.uid,
+            name=device.name,
+            current_version=device.software_version,
+            # an ASDM-only upgrade leaves the software version as it is
+            software_version=software_version or device.software_version,
+        )
+        for device in InventoryApiService(api_client).get_devices(q=device_query)
+        if (
+            software_version is not None and device.software_version != software_version
+        )
+        or (asdm_version is not None and device.asdm_version != asdm_version)
+    ]
+
+    device_upgrade_service = DeviceUpgradeApiService(api_client)
+    transaction_service = TransactionService(api_client)
+    upgrade_input = UpgradeAsaDeviceInput(
+        software_version=software_version, asdm_version=asdm_version
+    )
+
+    def upgrade(device: RolloutDevice) -> None:
+        transaction = device_upgrade_service.start_asa_upgrade(
+            device.uid, upgrade_input
+        )
+        transaction_service.wait_for_transaction_to_finish(
+            transaction_uid=transaction.transaction_uid
+        )
+
+    run_rollout(ctx, devices, upgrade, **rollout_settings)
+
+
+cli.add_command(ftd)
+cli.add_command(asa)
+
+if __name__ == "__main__":
+    cli(obj={})
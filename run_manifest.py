@@ -0,0 +1,124 @@
+from typing import TYPE_CHECKING
+
+import click
+from click_option_group import optgroup, AllOptionGroup
+
+from utils.batch_mode import batch_mode, batch_option
+from utils.region_mapping import supported_regions
+
+if TYPE_CHECKING:
+    from models.job_manifest import JobManifest
+
+
+def load_manifest(
+    _ctx: click.Context, _param: click.Parameter, value: str
+) -> "JobManifest":
+    from models.job_manifest import JobManifest
+
+    try:
+        return JobManifest.load(value)
+    except (ValueError, FileNotFoundError) as e:
+        raise click.BadParameter(str(e))
+
+
+@click.command(
+    help="Create tenants and users, provision cdFMCs, onboard devices and upgrade them as described in a YAML manifest. Steps that do not depend on each other, such as the cdFMCs of different tenants, run in parallel. You need a super-admin API token generated using the Cisco Security Cloud Control MSSP portal to use this script."
+)
+@click.argument("manifest", type=click.Path(exists=True), callback=load_manifest)
+@click.option(
+    "--max-concurrent-jobs",
+    help="The number of steps run at the same time.",
+    type=int,
+    default=8,
+    show_default=True,
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Print the steps and what they wait for, without running them.",
+)
+@click.option(
+    "--no-token-cache",
+    is_flag=True,
+    default=False,
+    help="Always generate new API tokens for the MSP-managed tenants instead of reusing the ones cached in ~/.cisco-security-token-cache.yaml.",
+)
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
+def main(
+    manifest: "JobManifest",
+    max_concurrent_jobs: int,
+    dry_run: bool,
+    no_token_cache: bool,
+    region: str,
+    api_token: str,
+) -> None:
+    # the SDK and services are imported here rather than at module load so that --help stays fast
+    import sys
+
+    from rich.console import Console
+    from rich.table import Table
+
+    from services.api_client_registry import api_client_registry
+    from services.job_graph import DONE, SKIPPED, JobResult
+    from services.manifest_runner import ManifestRunner
+    from services.scc_credentials_service import SccCredentialsService
+    from services.token_cache_service import TokenCacheService
+
+    console = Console()
+    credentials_service = SccCredentialsService(region=region, api_token=api_token)
+    credentials_service.load_or_prompt_credentials()
+    api_token, base_url = credentials_service.get_credentials()
+    # the jobs run unattended, in parallel
+    batch_mode.enable()
+
+    runner = ManifestRunner(
+        msp_api_client=api_client_registry.get_api_client(
+            host=base_url, access_token=api_token
+        ),
+        token_cache_service=None if no_token_cache else TokenCacheService(),
+    )
+    graph = runner.compile(manifest)
+    if dry_run:
+        for job in graph.jobs.values():
+            waits_for = (
+                f" (after {', '.join(job.dependencies)})" if job.dependencies else ""
+            )
+            console.print(f"{job.name}{waits_for}")
+        return
+
+    def print_result(result: JobResult) -> None:
+        if result.status == DONE:
+            console.print(
+                f"[green]{result.name}: {result.result} ({result.duration_seconds:.1f}s)[/green]"
+            )
+        elif result.status == SKIPPED:
+            console.print(f"[yellow]{result.name}: skipped, {result.error}[/yellow]")
+        else:
+            console.print(f"[red]{result.name}: failed, {result.error}[/red]")
+
+    results = graph.run(
+        max_concurrent_jobs=max_concurrent_jobs, on_finished=print_result
+    )
+
+    table = Table(title=f"{len(results)} steps")
+    table.add_column("Step", justify="left")
+    table.add_column("Status", justify="center")
+    table.add_column("Seconds", justify="right")
+    for name in graph.jobs:
+        result = results[name]
+        table.add_row(name, result.status, f"{result.duration_seconds:.1f}")
+    console.print(table)
+    if any(result.status != DONE for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import click
+
+from utils.batch_mode import batch_option
+from utils.lazy_group import LazyGroup
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "provision-tenant": "provision_tenant:main",
+        "onboard-ftds": "onboard_ftds:main",
+        "upgrade-ftd": "upgrade_ftd:cli",
+        "upgrade-asa": "upgrade_asa:cli",
+        "objects": "object_manager:cli",
+        "monitor": "monitor_fleet:cli",
+        "daemon": "commands.daemon:daemon",
+        "run-manifest": "run_manifest:main",
+        "portfolio": "portfolio:cli",
+        "export-inventory": "export_inventory:main",
+        "upgrade-readiness": "upgrade_readiness:main",
+        "upgrade-wave": "upgrade_wave:cli",
+        "rollout": "rollout:cli",
+    },
+    help="Automate MSSP tenants, onboarding and upgrades using the Cisco Security Cloud Control APIs.",
+)
+@batch_option
+@click.pass_context
+def cli(ctx: click.Context) -> None:
+    ctx.ensure_object(dict)
+
+
+if __name__ == "__main__":
+    cli(obj={})
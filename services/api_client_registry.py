@@ -0,0 +1,157 @@
+import atexit
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from cdo_sdk_python import ApiClient, Configuration
+
+from services.metrics import api_request_duration, start_exporter_from_environment
+from services.request_scheduler import request_scheduler
+from services.tracing import endpoint_of, tracer
+
+
+def _send(
+    method: str,
+    url: str,
+    authorization: str,
+    send: Callable,
+    status_of: Callable[..., int],
+):
+    # rate limits, traces and times a request sent through a shared client
+    started_at = time.perf_counter()
+    with tracer.http_span(method, url, authorization) as span:
+        response = request_scheduler.execute(url, method, send)
+        status = status_of(response)
+        if span is not None:
+            span.http_status = status
+    api_request_duration.observe(
+        time.perf_counter() - started_at, endpoint_of(method, url), str(status)
+    )
+    return response
+
+
+class ScheduledApiClient(ApiClient):
+    def __init__(self, configuration: Configuration):
+        super().__init__(configuration)
+        # when set, called once on the first 401 to get a new access token, which the rejected request is retried with
+        self.refresh_access_token: Optional[Callable[[], str]] = None
+        self._refresh_lock = threading.Lock()
+
+    # every SDK call ends up in call_api, so this is where requests are rate limited and 429s retried
+    def call_api(
+        self,
+        method,
+        url,
+        header_params=None,
+        body=None,
+        post_params=None,
+        _request_timeout=None,
+    ):
+        def send():
+            return _send(
+                method,
+                url,
+                (header_params or {}).get("Authorization"),
+                lambda: super(ScheduledApiClient, self).call_api(
+                    method, url, header_params, body, post_params, _request_timeout
+                ),
+                lambda response: response.status,
+            )
+
+        response = send()
+        if response.status == 401 and self._refresh_rejected_access_token(
+            header_params
+        ):
+            header_params["Authorization"] = f"Bearer {self.configuration.access_token}"
+            response = send()
+        return response
+
+    def _refresh_rejected_access_token(self, header_params: Optional[Dict]) -> bool:
+        with self._refresh_lock:
+            authorization = (header_params or {}).get("Authorization")
+            if authorization is None:
+                return False
+            if authorization != f"Bearer {self.configuration.access_token}":
+                # another request already refreshed the token this one was sent with
+                return True
+            if self.refresh_access_token is None:
+                return False
+            refresh_access_token, self.refresh_access_token = (
+                self.refresh_access_token,
+                None,
+            )
+            self.configuration.access_token = refresh_access_token()
+            return True
+
+
+class ApiClientRegistry:
+    """Hands out one pooled, keep-alive API client per (host, access token), shared by the whole process."""
+
+    def __init__(self, connection_pool_maxsize: int = None):
+        self.connection_pool_maxsize = connection_pool_maxsize or int(
+            os.environ.get("SCC_CONNECTION_POOL_MAXSIZE", "20")
+        )
+        self._lock = threading.Lock()
+        self._api_clients: Dict[Tuple[str, str], ApiClient] = {}
+        self._sessions: Dict[str, "requests.Session"] = {}
+
+    def get_api_client(self, host: str, access_token: str) -> ApiClient:
+        # every command and script builds its clients here, so this is where the metrics start being exported
+        start_exporter_from_environment()
+        with self._lock:
+            api_client = self._api_clients.get((host, access_token))
+            if api_client is None:
+                configuration = Configuration(host=host, access_token=access_token)
+                configuration.connection_pool_maxsize = self.connection_pool_maxsize
+                api_client = ScheduledApiClient(configuration)
+                self._api_clients[(host, access_token)] = api_client
+            return api_client
+
+    def get_session(self, host: str) -> "requests.Session":
+        # used for the cdFMC endpoints, which are called with requests rather than through the SDK
+        from requests.adapters import HTTPAdapter
+
+        start_exporter_from_environment()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = _scheduled_session_class()()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.connection_pool_maxsize
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def close(self) -> None:
+        with self._lock:
+            for api_client in self._api_clients.values():
+                api_client.rest_client.pool_manager.clear()
+            for session in self._sessions.values():
+                session.close()
+            self._api_clients.clear()
+            self._sessions.clear()
+
+
+def _scheduled_session_class():
+    import requests
+
+    class ScheduledSession(requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            return _send(
+                method,
+                url,
+                (kwargs.get("headers") or {}).get("Authorization"),
+                lambda: super(ScheduledSession, self).request(
+                    method, url, *args, **kwargs
+                ),
+                lambda response: response.status_code,
+            )
+
+    return ScheduledSession
+
+
+api_client_registry = ApiClientRegistry()
+atexit.register(api_client_registry.close)
@@ -1,4 +1,3 @@
-import requests
 from cdo_sdk_python import ApiClient, InventoryApi, DevicePage
 
 from models.fmc import (
@@ -10,19 +9,43 @@ from models.fmc import (
     UrlCategory,
     NetworkObject,
 )
+from services.api_client_registry import api_client_registry
+from services.cdfmc_domain_cache import CdFmcDomainCache, cdfmc_domain_cache
 
 
 class CdFmcApiService:
-    def __init__(self, api_client: ApiClient):
+    def __init__(
+        self, api_client: ApiClient, domain_cache: CdFmcDomainCache = cdfmc_domain_cache
+    ):
         self.api_client = api_client
         self.inventory_api = InventoryApi(api_client)
+        self.session = api_client_registry.get_session(api_client.configuration.host)
+        self.domain_cache = domain_cache
 
+    @property
+    def cdfmc_domain_uid(self) -> str:
+        return self.domain_cache.get_or_load(
+            self.api_client.configuration.host,
+            self.api_client.configuration.access_token,
+            self._get_cdfmc_domain_uid,
+        )
+
+    def _get_cdfmc_domain_uid(self) -> str:
         manager_page: DevicePage = self.inventory_api.get_device_managers(
             limit="1", offset="0", q="deviceType:CDFMC"
         )
         if len(manager_page.items) != 1:
             raise RuntimeError("CDFMC not found")
-        self.cdfmc_domain_uid = manager_page.items[0].fmc_domain_uid
+        return manager_page.items[0].fmc_domain_uid
+
+    def _raise_for_status(self, response) -> None:
+        # a cached domain UID goes stale if the tenant's cdFMC is re-provisioned
+        if response.status_code == 404:
+            self.domain_cache.invalidate(
+                self.api_client.configuration.host,
+                self.api_client.configuration.access_token,
+            )
+        response.raise_for_status()
 
     def create_default_access_policy(self):
 
@@ -35,8 +58,8 @@ class CdFmcApiService:
             "Authorization": f"Bearer {self.api_client.configuration.access_token}",
             "Content-Type": "application/json",
         }
-        response = requests.post(url, headers=headers, json=policy.__dict__)
-        response.raise_for_status()
+        response = self.session.post(url, headers=headers, json=policy.__dict__)
+        self._raise_for_status(response)
         return response.json()["id"]
 
     def block_gambling(self, access_policy_uid: str):
@@ -78,8 +101,8 @@ class CdFmcApiService:
             ),
         )
 
-        response = requests.post(url, headers=headers, json=access_rule.to_dict())
-        response.raise_for_status()
+        response = self.session.post(url, headers=headers, json=access_rule.to_dict())
+        self._raise_for_status(response)
 
         return response.json()
 
@@ -89,8 +112,8 @@ class CdFmcApiService:
             "Authorization": f"Bearer {self.api_client.configuration.access_token}",
             "Content-Type": "application/json",
         }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = self.session.get(url, headers=headers)
+        self._raise_for_status(response)
         data = response.json()
 
         if data["paging"]["count"] != 1:
@@ -106,8 +129,8 @@ class CdFmcApiService:
             "Authorization": f"Bearer {self.api_client.configuration.access_token}",
             "Content-Type": "application/json",
         }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        response = self.session.get(url, headers=headers)
+        self._raise_for_status(response)
         url_categories = response.json()["items"]
 
         gambling_categories = [
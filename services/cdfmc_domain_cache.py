@@ -0,0 +1,86 @@
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+import jwt
+import yaml
+
+
+class CdFmcDomainCache:
+    """
+    Remembers the cdFMC domain UID of each tenant, so that it is only looked up once per tenant. Entries are kept in
+    memory and, when a cache file is given, on disk across runs.
+    """
+
+    def __init__(self, cache_file_path: Optional[str] = None):
+        self.cache_file_path = (
+            os.path.expanduser(cache_file_path) if cache_file_path else None
+        )
+        self._lock = threading.Lock()
+        self._domain_uids: Dict[str, str] = None
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def get_or_load(self, host: str, access_token: str, load: Callable[[], str]) -> str:
+        key = self.key_for(host, access_token)
+        domain_uid = self._get(key)
+        if domain_uid is not None:
+            return domain_uid
+        # services created concurrently for the same tenant share a single lookup
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            domain_uid = self._get(key)
+            if domain_uid is None:
+                domain_uid = load()
+                self._put(key, domain_uid)
+        return domain_uid
+
+    def invalidate(self, host: str, access_token: str) -> None:
+        key = self.key_for(host, access_token)
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._save()
+
+    @staticmethod
+    def key_for(host: str, access_token: str) -> str:
+        # the tenant is identified by the token's parentId claim; tokens without one are keyed by their digest
+        try:
+            claims = jwt.decode(access_token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            claims = {}
+        tenant = (
+            claims.get("parentId")
+            or hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+        )
+        return f"{host}/{tenant}"
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._load().get(key)
+
+    def _put(self, key: str, domain_uid: str) -> None:
+        with self._lock:
+            self._load()[key] = domain_uid
+            self._save()
+
+    def _load(self) -> Dict[str, str]:
+        if self._domain_uids is None:
+            self._domain_uids = {}
+            if self.cache_file_path and os.path.exists(self.cache_file_path):
+                with open(self.cache_file_path, "r") as file:
+                    self._domain_uids = yaml.safe_load(file) or {}
+        return self._domain_uids
+
+    def _save(self) -> None:
+        if not self.cache_file_path:
+            return
+        tmp_file_path = f"{self.cache_file_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as file:
+            yaml.safe_dump(self._domain_uids, file)
+        os.replace(tmp_file_path, self.cache_file_path)
+
+
+# in memory only, unless SCC_CDFMC_DOMAIN_CACHE_FILE names a file to keep the domain UIDs in across runs
+cdfmc_domain_cache = CdFmcDomainCache(os.environ.get("SCC_CDFMC_DOMAIN_CACHE_FILE"))
@@ -1,5 +1,4 @@
 import sys
-from idlelib.pyparse import trans
 from typing import List
 
 from cdo_sdk_python import (
@@ -8,9 +7,11 @@ from cdo_sdk_python import (
     CommandLineInterfaceApi,
     InventoryApi,
     CliCommandInput,
+    CdoCliResult,
 )
 from rich.progress import TaskID, Progress, SpinnerColumn, TextColumn
 
+from services.tracing import tracer
 from services.transaction_service import TransactionService
 
 
@@ -36,15 +37,7 @@ class CliApiService:
                 start=True,
             )
             try:
-                transaction = self.inventory_api.execute_cli_command(
-                    CliCommandInput(device_uids=device_uids, script=command)
-                )
-                transaction = self.transaction_service.wait_for_transaction_to_finish(
-                    transaction.transaction_uid
-                )
-                cli_result = self.cli_api.get_cli_result(
-                    cli_result_uid=transaction.entity_uid
-                )
+                cli_result = self.run_command(device_uids, command)
 
                 if cli_result.error_msg is not None:
                     progress.update(
@@ -58,3 +51,14 @@ class CliApiService:
                 progress.stop_task(task_id=execute_cli_task)
 
         return cli_result.result
+
+    def run_command(self, device_uids: List[str], command: str) -> CdoCliResult:
+        """Runs the command without any console output, for callers running many commands in the background."""
+        with tracer.span("cli.execute", device=",".join(device_uids)):
+            transaction = self.inventory_api.execute_cli_command(
+                CliCommandInput(device_uids=device_uids, script=command)
+            )
+            transaction = self.transaction_service.wait_for_transaction_to_finish(
+                transaction.transaction_uid
+            )
+            return self.cli_api.get_cli_result(cli_result_uid=transaction.entity_uid)
@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cdo_sdk_python import ApiClient, Device
+
+from models.monitoring import ConnectivityTransition
+from services.inventory_api_service import InventoryApiService
+from services.tracing import tracer
+
+# UIDs per inventory query, to keep the query string of a large set within URL length limits
+UIDS_PER_QUERY = 50
+
+
+def state_of(device: Optional[Device]) -> Optional[str]:
+    if device is None or device.connectivity_state is None:
+        return None
+    return device.connectivity_state.value
+
+
+class ConnectivityWatcher:
+    """
+    Tracks the connectivity state of a set of devices with one inventory query per poll for the whole set, instead of
+    one per device. Polls come quickly while states are changing, and back off to the longest interval while they
+    are not.
+    """
+
+    def __init__(
+        self,
+        api_client: ApiClient,
+        min_interval_seconds: float = 5,
+        max_interval_seconds: float = 60,
+    ):
+        self.inventory_api_service = InventoryApiService(api_client)
+        self.max_interval_seconds = max_interval_seconds
+        self.min_interval_seconds = min(min_interval_seconds, max_interval_seconds)
+        self.interval_seconds = self.min_interval_seconds
+        self.devices: Dict[str, Optional[Device]] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, device_uids: Iterable[str]) -> None:
+        with self._lock:
+            for uid in device_uids:
+                self.devices.setdefault(uid, None)
+        # newly watched devices are about to change state
+        self.interval_seconds = self.min_interval_seconds
+
+    def unwatch(self, device_uids: Iterable[str]) -> None:
+        with self._lock:
+            for uid in device_uids:
+                self.devices.pop(uid, None)
+
+    def poll_once(self) -> List[ConnectivityTransition]:
+        """Queries the watched devices, and returns the devices whose state changed since the last poll."""
+        with self._lock:
+            uids = list(self.devices)
+        with tracer.span("connectivity.poll", devices=len(uids)):
+            found: Dict[str, Device] = {
+                device.uid: device for device in self._get_devices(uids)
+            }
+        timestamp = time.time()
+
+        transitions: List[ConnectivityTransition] = []
+        with self._lock:
+            for uid in uids:
+                if uid not in self.devices:
+                    continue
+                previous, device = self.devices[uid], found.get(uid)
+                self.devices[uid] = device
+                if state_of(previous) == state_of(device) and previous is not None:
+                    continue
+                if previous is None and device is None:
+                    continue
+                transitions.append(
+                    ConnectivityTransition(
+                        device_uid=uid,
+                        device_name=(device or previous).name,
+                        previous_state=state_of(previous),
+                        state=state_of(device),
+                        software_version=(device or previous).software_version,
+                        timestamp=timestamp,
+                    )
+                )
+
+        self.interval_seconds = (
+            self.min_interval_seconds
+            if transitions
+            else min(self.interval_seconds * 2, self.max_interval_seconds)
+        )
+        return transitions
+
+    def wait_until(
+        self,
+        is_settled: Callable[[Device], bool],
+        timeout_seconds: float,
+        on_transition: Callable[[ConnectivityTransition], None] = None,
+    ) -> Dict[str, Optional[Device]]:
+        """
+        Polls until every watched device is settled, or the timeout, and returns the last seen state of the devices
+        that did not settle (None for devices not in the inventory).
+        """
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            for transition in self.poll_once():
+                if on_transition is not None:
+                    on_transition(transition)
+            with self._lock:
+                unsettled = {
+                    uid: device
+                    for uid, device in self.devices.items()
+                    if device is None or not is_settled(device)
+                }
+            remaining_seconds = deadline - time.monotonic()
+            if len(unsettled) == 0 or remaining_seconds <= 0:
+                return unsettled
+            time.sleep(min(self.interval_seconds, remaining_seconds))
+
+    def run_forever(
+        self, on_transition: Callable[[ConnectivityTransition], None]
+    ) -> None:
+        while True:
+            for transition in self.poll_once():
+                on_transition(transition)
+            time.sleep(self.interval_seconds)
+
+    def _get_devices(self, uids: List[str]) -> List[Device]:
+        devices: List[Device] = []
+        for start in range(0, len(uids), UIDS_PER_QUERY):
+            devices.extend(
+                self.inventory_api_service.get_devices(
+                    q=f"uid:({' OR '.join(uids[start : start + UIDS_PER_QUERY])})"
+                )
+            )
+        return devices
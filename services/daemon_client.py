@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import socket
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+DEFAULT_SOCKET_PATH = "~/.cisco-security-daemon.sock"
+
+
+class DaemonUnavailableError(RuntimeError):
+    pass
+
+
+class DaemonCredentialsMismatchError(DaemonUnavailableError):
+    pass
+
+
+class DaemonClient:
+    """
+    Talks to a running daemon (see DaemonService). It deliberately does not import the SDK, so that commands served by
+    the daemon start in milliseconds; results come back as plain records with the SDK models' attribute names.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        region: str = None,
+        api_token: str = None,
+        timeout_seconds: float = None,
+    ):
+        self.socket_path = os.path.expanduser(socket_path)
+        self.region = region
+        self.api_token_sha256 = (
+            hashlib.sha256(api_token.encode("utf-8")).hexdigest() if api_token else None
+        )
+        self.timeout_seconds = timeout_seconds
+
+    def is_available(self) -> bool:
+        if not os.path.exists(self.socket_path):
+            return False
+        try:
+            return self._call("ping", timeout_seconds=0.5) == "pong"
+        except DaemonUnavailableError:
+            return False
+
+    def is_running(self) -> bool:
+        """Whether a daemon answers on the socket, whatever the credentials it serves."""
+        if not os.path.exists(self.socket_path):
+            return False
+        try:
+            return self._call("ping", timeout_seconds=0.5) == "pong"
+        except DaemonCredentialsMismatchError:
+            return True
+        except DaemonUnavailableError:
+            return False
+
+    def search_devices(self, q: str = None, limit: int = 25) -> List[SimpleNamespace]:
+        return [
+            self._to_record(device)
+            for device in self._call("search_devices", q=q, limit=limit)
+        ]
+
+    def get_compatible_ftd_versions(self, ftd_uid: str) -> List[SimpleNamespace]:
+        return [
+            self._to_record(version)
+            for version in self._call("get_compatible_ftd_versions", device_uid=ftd_uid)
+        ]
+
+    def get_compatible_asa_versions(self, asa_uid: str) -> List[SimpleNamespace]:
+        return [
+            self._to_record(version)
+            for version in self._call("get_compatible_asa_versions", device_uid=asa_uid)
+        ]
+
+    def shutdown(self) -> None:
+        self._call("shutdown")
+
+    def _call(
+        self, operation: str, timeout_seconds: float = None, **arguments: Any
+    ) -> Any:
+        request = {
+            "operation": operation,
+            "arguments": arguments,
+            "region": self.region,
+            "api_token_sha256": self.api_token_sha256,
+        }
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(timeout_seconds or self.timeout_seconds)
+                connection.connect(self.socket_path)
+                connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+                connection.shutdown(socket.SHUT_WR)
+                response: Dict = json.loads(self._read_all(connection))
+        except (OSError, ValueError) as e:
+            raise DaemonUnavailableError(f"Could not reach the daemon: {e}") from e
+        if "error" in response:
+            if response["error"] == "credentials-mismatch":
+                raise DaemonCredentialsMismatchError(
+                    "The daemon is running with different credentials"
+                )
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    @staticmethod
+    def _read_all(connection: socket.socket) -> bytes:
+        chunks = []
+        while True:
+            chunk = connection.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    @staticmethod
+    def _to_record(value: Any) -> Any:
+        if isinstance(value, dict):
+            return SimpleNamespace(
+                **{key: DaemonClient._to_record(item) for key, item in value.items()}
+            )
+        if isinstance(value, list):
+            return [DaemonClient._to_record(item) for item in value]
+        return value
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from cdo_sdk_python import ApiClient
+
+from services.api_client_registry import api_client_registry
+from services.daemon_client import DEFAULT_SOCKET_PATH, DaemonClient
+from services.device_upgrade_api_service import DeviceUpgradeApiService
+from services.inventory_api_service import InventoryApiService
+
+
+class _TtlCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+
+    def get_or_load(self, key: Any, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                return entry[1]
+        value = load()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+
+class DaemonService:
+    """
+    Keeps an authenticated, pooled API client and an inventory cache warm, and serves them to the CLI over a Unix
+    socket (one JSON request and one JSON response per connection).
+    """
+
+    def __init__(
+        self,
+        region: str,
+        base_url: str,
+        api_token: str,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        inventory_cache_ttl_seconds: float = 60,
+    ):
+        self.region = region
+        self.api_token_sha256 = hashlib.sha256(api_token.encode("utf-8")).hexdigest()
+        self.socket_path = os.path.expanduser(socket_path)
+        self.api_client: ApiClient = api_client_registry.get_api_client(
+            host=base_url, access_token=api_token
+        )
+        self.inventory_api_service = InventoryApiService(self.api_client)
+        self.device_upgrade_api_service = DeviceUpgradeApiService(self.api_client)
+        self.inventory_cache = _TtlCache(inventory_cache_ttl_seconds)
+        self.operations: Dict[str, Callable[..., Any]] = {
+            "ping": lambda: "pong",
+            "search_devices": self.search_devices,
+            "get_compatible_ftd_versions": self.get_compatible_ftd_versions,
+            "get_compatible_asa_versions": self.get_compatible_asa_versions,
+            "shutdown": self.shutdown,
+        }
+        self._server: socketserver.ThreadingUnixStreamServer = None
+
+    def search_devices(self, q: str = None, limit: int = 25) -> List[Dict]:
+        return self.inventory_cache.get_or_load(
+            ("device_search", q, limit),
+            lambda: [
+                device.model_dump()
+                for device in self.inventory_api_service.search_devices(
+                    q=q, limit=limit
+                )
+            ],
+        )
+
+    def get_compatible_ftd_versions(self, device_uid: str) -> List[Dict]:
+        return self.inventory_cache.get_or_load(
+            ("ftd_versions", device_uid),
+            lambda: [
+                version.model_dump()
+                for version in self.device_upgrade_api_service.get_compatible_ftd_versions(
+                    device_uid
+                )
+            ],
+        )
+
+    def get_compatible_asa_versions(self, device_uid: str) -> List[Dict]:
+        return self.inventory_cache.get_or_load(
+            ("asa_versions", device_uid),
+            lambda: [
+                version.model_dump()
+                for version in self.device_upgrade_api_service.get_compatible_asa_versions(
+                    device_uid
+                )
+            ],
+        )
+
+    def handle_request(self, request: Dict) -> Dict:
+        # a client must be talking to a daemon authenticated with its own credentials, or it would be served another
+        # region's or tenant's inventory
+        if (
+            request.get("region") != self.region
+            or request.get("api_token_sha256") != self.api_token_sha256
+        ):
+            return {"error": "credentials-mismatch"}
+        operation = self.operations.get(request.get("operation"))
+        if operation is None:
+            return {"error": f"Unknown operation {request.get('operation')}"}
+        try:
+            return {"result": operation(**request.get("arguments", {}))}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def bind(self) -> None:
+        """Takes the socket, unless another daemon is serving it; a socket left behind by a daemon that died is replaced."""
+        if os.path.exists(self.socket_path):
+            if DaemonClient(socket_path=self.socket_path).is_running():
+                raise RuntimeError(f"A daemon is already running on {self.socket_path}")
+            os.remove(self.socket_path)
+        daemon_service = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                request = json.loads(self.rfile.readline())
+                response = daemon_service.handle_request(request)
+                self.wfile.write(json.dumps(response, default=str).encode("utf-8"))
+
+        # only the current user may talk to the daemon, since it acts with their API token
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(
+                self.socket_path, RequestHandler
+            )
+        finally:
+            os.umask(previous_umask)
+        self._server.daemon_threads = True
+
+    def serve_forever(self) -> None:
+        if self._server is None:
+            self.bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self) -> str:
+        # serve_forever() must be stopped from another thread than the one handling this request
+        threading.Thread(target=self._server.shutdown, daemon=True).start()
+        return "stopping"
@@ -1,6 +1,5 @@
 import sys
 from typing import List
-from wsgiref.simple_server import software_version
 
 from cdo_sdk_python import (
     ApiClient,
@@ -13,11 +12,10 @@ from cdo_sdk_python import (
     CdoTransaction,
     UpgradeAsaDeviceInput,
 )
-from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, TaskID
-from rich.table import Table
 
-from services.transaction_service import TransactionService
+from services.transaction_service import TransactionService, show_transaction_status
+from utils.version_tables import print_ftd_versions, print_asa_versions
 
 
 class DeviceUpgradeApiService:
@@ -32,27 +30,26 @@ class DeviceUpgradeApiService:
         )
         return ftd_versions_page.items
 
-    def upgrade_ftd(self, ftd_uid: str, ftd_version: FtdVersion) -> None:
+    def upgrade_ftd(
+        self, ftd_uid: str, upgrade_package_uid: str, software_version: str = None
+    ) -> None:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True,
         ) as progress:
-            upgrade_ftd_task_id: TaskID = progress.add_task(
-                f"Upgrading FTD {ftd_uid} to {ftd_version.software_version}...",
-                start=True,
-            )
+            target = software_version or f"upgrade package {upgrade_package_uid}"
+            description = f"Upgrading FTD {ftd_uid} to {target}..."
+            upgrade_ftd_task_id: TaskID = progress.add_task(description, start=True)
             try:
-                cdo_transaction: CdoTransaction = (
-                    self.device_upgrade_api.upgrade_ftd_device(
-                        device_uid=ftd_uid,
-                        upgrade_ftd_device_input=UpgradeFtdDeviceInput(
-                            upgrade_package_uid=ftd_version.upgrade_package_uid
-                        ),
-                    )
+                cdo_transaction: CdoTransaction = self.start_ftd_upgrade(
+                    ftd_uid, upgrade_package_uid
                 )
                 self.transaction_service.wait_for_transaction_to_finish(
-                    transaction_uid=cdo_transaction.transaction_uid
+                    transaction_uid=cdo_transaction.transaction_uid,
+                    on_update=show_transaction_status(
+                        progress, upgrade_ftd_task_id, description
+                    ),
                 )
             except RuntimeError as e:
                 progress.update(task_id=upgrade_ftd_task_id, description=f"Error: {e}")
@@ -60,6 +57,17 @@ class DeviceUpgradeApiService:
             finally:
                 progress.stop_task(task_id=upgrade_ftd_task_id)
 
+    def start_ftd_upgrade(
+        self, ftd_uid: str, upgrade_package_uid: str
+    ) -> CdoTransaction:
+        """Starts the upgrade without waiting for it, for callers tracking many upgrades at once."""
+        return self.device_upgrade_api.upgrade_ftd_device(
+            device_uid=ftd_uid,
+            upgrade_ftd_device_input=UpgradeFtdDeviceInput(
+                upgrade_package_uid=upgrade_package_uid
+            ),
+        )
+
     def get_compatible_asa_versions(self, asa_uid: str) -> List[AsaCompatibleVersion]:
         asa_compatible_versions_response: AsaCompatibleVersionsResponse = (
             self.device_upgrade_api.get_asa_upgrade_versions(device_uid=asa_uid)
@@ -88,11 +96,8 @@ class DeviceUpgradeApiService:
                 start=True,
             )
             try:
-                cdo_transaction: CdoTransaction = (
-                    self.device_upgrade_api.upgrade_asa_device(
-                        device_uid=asa_uid,
-                        upgrade_asa_device_input=upgrade_asa_device_input,
-                    )
+                cdo_transaction: CdoTransaction = self.start_asa_upgrade(
+                    asa_uid, upgrade_asa_device_input
                 )
                 self.transaction_service.wait_for_transaction_to_finish(
                     transaction_uid=cdo_transaction.transaction_uid
@@ -103,34 +108,17 @@ class DeviceUpgradeApiService:
             finally:
                 progress.stop_task(task_id=upgrade_asa_task_id)
 
-    def print_ftd_versions(self, versions: List[FtdVersion]) -> None:
-        table = Table(title="Compatible FTD versions")
-
-        table.add_column("Version", justify="center")
-        table.add_column("Upgrade Package UID", justify="center")
-        table.add_column("Suggested Release", justify="center")
-
-        for version in versions:
-            table.add_row(
-                version.software_version,
-                version.upgrade_package_uid,
-                "Yes" if version.is_suggested_version else "No",
-            )
+    def start_asa_upgrade(
+        self, asa_uid: str, upgrade_asa_device_input: UpgradeAsaDeviceInput
+    ) -> CdoTransaction:
+        """Starts the upgrade without waiting for it, for callers tracking many upgrades at once."""
+        return self.device_upgrade_api.upgrade_asa_device(
+            device_uid=asa_uid,
+            upgrade_asa_device_input=upgrade_asa_device_input,
+        )
 
-        console = Console()
-        console.print(table)
+    def print_ftd_versions(self, versions: List[FtdVersion]) -> None:
+        print_ftd_versions(versions)
 
     def print_asa_versions(self, versions: List[AsaCompatibleVersion]) -> None:
-        table = Table(title="Compatible ASA versions")
-
-        table.add_column("Software Version", justify="center")
-        table.add_column("ASDM Version", justify="center")
-
-        for version in versions:
-            table.add_row(
-                version.software_version,
-                version.asdm_version,
-            )
-
-        console = Console()
-        console.print(table)
+        print_asa_versions(versions)
@@ -0,0 +1,155 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from cdo_sdk_python import ApiClient, ConnectivityState, Device, EntityType
+
+from models.monitoring import (
+    Alert,
+    CONNECTIVITY_ONLINE,
+    CONNECTIONS_IN_USE,
+    CONNECTIONS_MOST_USED,
+    CPU_USAGE_1M_PERCENT,
+    CPU_USAGE_5M_PERCENT,
+    CPU_USAGE_5S_PERCENT,
+    MEMORY_USED_PERCENT,
+    MetricSample,
+    ThresholdRule,
+)
+from parsers.show_command_parser import (
+    parse_show_conn_count,
+    parse_show_cpu_usage,
+    parse_show_memory,
+)
+from services.cli_api_service import CliApiService
+from services.inventory_api_service import InventoryApiService
+from services.metric_store import MetricStore
+
+# one CLI execution per device collects every metric, instead of one transaction per show command
+METRICS_SCRIPT = "show cpu usage\nshow memory\nshow conn count"
+
+
+class FleetMonitoringService:
+    def __init__(
+        self,
+        api_client: ApiClient,
+        metric_store: MetricStore,
+        max_concurrent_devices: int = 32,
+        device_query: str = None,
+    ):
+        self.inventory_api_service = InventoryApiService(api_client)
+        self.cli_api_service = CliApiService(api_client)
+        self.metric_store = metric_store
+        self.max_concurrent_devices = max_concurrent_devices
+        self.device_query = device_query
+        self.device_names: Dict[str, str] = {}
+        self.failed_devices: Dict[str, str] = {}
+
+    def collect_once(self) -> List[MetricSample]:
+        """Collects the connectivity of every device and the CLI metrics of every online ASA, and stores them."""
+        devices: List[Device] = self.inventory_api_service.get_devices(
+            q=self.device_query
+        )
+        self.device_names.update({device.uid: device.name for device in devices})
+        self.failed_devices = {}
+        timestamp = time.time()
+        samples = [
+            MetricSample(
+                device_uid=device.uid,
+                metric=CONNECTIVITY_ONLINE,
+                timestamp=timestamp,
+                value=(
+                    1.0
+                    if device.connectivity_state == ConnectivityState.ONLINE
+                    else 0.0
+                ),
+            )
+            for device in devices
+        ]
+
+        # the CLI execution API only supports ASAs
+        cli_devices = [
+            device
+            for device in devices
+            if device.device_type == EntityType.ASA
+            and device.connectivity_state == ConnectivityState.ONLINE
+        ]
+        if len(cli_devices) > 0:
+            with ThreadPoolExecutor(
+                max_workers=self.max_concurrent_devices,
+                thread_name_prefix="fleet-monitoring",
+            ) as executor:
+                for device_samples in executor.map(
+                    self._collect_cli_metrics, cli_devices
+                ):
+                    samples.extend(device_samples)
+
+        self.metric_store.append(samples)
+        return samples
+
+    def _collect_cli_metrics(self, device: Device) -> List[MetricSample]:
+        try:
+            cli_result = self.cli_api_service.run_command([device.uid], METRICS_SCRIPT)
+        except Exception as e:
+            # one unreachable device must not fail the collection for the rest of the fleet
+            self.failed_devices[device.uid] = str(e)
+            return []
+        if cli_result.error_msg is not None:
+            self.failed_devices[device.uid] = cli_result.error_msg
+            return []
+        return self.parse_metrics(device.uid, cli_result.result or "", time.time())
+
+    @staticmethod
+    def parse_metrics(
+        device_uid: str, output: str, timestamp: float
+    ) -> List[MetricSample]:
+        # the parsers search the combined output of METRICS_SCRIPT for their command's lines
+        values: Dict[str, float] = {}
+        cpu_usage = parse_show_cpu_usage(output)
+        if cpu_usage is not None:
+            values[CPU_USAGE_5S_PERCENT] = cpu_usage.five_seconds_percent
+            values[CPU_USAGE_1M_PERCENT] = cpu_usage.one_minute_percent
+            values[CPU_USAGE_5M_PERCENT] = cpu_usage.five_minutes_percent
+        memory_usage = parse_show_memory(output)
+        if memory_usage is not None:
+            values[MEMORY_USED_PERCENT] = memory_usage.used_percent
+        connection_count = parse_show_conn_count(output)
+        if connection_count is not None:
+            values[CONNECTIONS_IN_USE] = connection_count.in_use
+            values[CONNECTIONS_MOST_USED] = connection_count.most_used
+        return [
+            MetricSample(
+                device_uid=device_uid,
+                metric=metric,
+                timestamp=timestamp,
+                value=float(value),
+            )
+            for metric, value in values.items()
+        ]
+
+    def evaluate_thresholds(
+        self, samples: List[MetricSample], rules: List[ThresholdRule]
+    ) -> List[Alert]:
+        return [
+            Alert(
+                rule=rule,
+                sample=sample,
+                device_name=self.device_names.get(sample.device_uid, sample.device_uid),
+            )
+            for sample in samples
+            for rule in rules
+            if rule.is_breached_by(sample)
+        ]
+
+    def run_forever(
+        self,
+        interval_seconds: float,
+        rules: List[ThresholdRule],
+        on_cycle: Callable[[List[MetricSample], List[Alert]], None],
+    ) -> None:
+        while True:
+            started_at = time.monotonic()
+            samples = self.collect_once()
+            on_cycle(samples, self.evaluate_thresholds(samples, rules))
+            # keep a fixed schedule, however long the collection took
+            time.sleep(max(interval_seconds - (time.monotonic() - started_at), 0))
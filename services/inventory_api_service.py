@@ -1,7 +1,6 @@
 import sys
-from typing import List
+from typing import List, Callable, Iterator
 
-import questionary
 from cdo_sdk_python import (
     InventoryApi,
     ApiClient,
@@ -15,7 +14,10 @@ from cdo_sdk_python import (
 from rich.console import Console
 from rich.progress import SpinnerColumn, TextColumn, Progress, TaskID
 
-from services.transaction_service import TransactionService
+from services.metrics import devices_onboarded, label_of
+from services.tracing import tracer
+from services.transaction_service import TransactionService, show_transaction_status
+from utils.batch_mode import batch_mode
 
 
 class InventoryApiService:
@@ -26,6 +28,8 @@ class InventoryApiService:
         self.console = Console()
 
     def onboard_ftd_device(self, ftd_input: FtdCreateOrUpdateInput):
+        import questionary
+
         device: Device = self.create_ftd_device(ftd_input)
         self.console.print(
             "Paste the following CLI key into the FTD terminal:"
@@ -33,7 +37,8 @@ class InventoryApiService:
             f"{device.cd_fmc_info.cli_key}"
             f"\n{'=' * 10}"
         )
-        while True:
+        # in batch mode, whatever runs the script applies the CLI key printed above, and registration waits for the FTD
+        while not batch_mode.enabled:
             answer = questionary.confirm(
                 "Have you pasted the CLI key into the FTD terminal?", default=False
             ).ask()
@@ -42,24 +47,29 @@ class InventoryApiService:
         return self.register_ftd_device_with_scc(device)
 
     def create_ftd_device(self, ftd_input: FtdCreateOrUpdateInput) -> Device:
-        with Progress(
+        with tracer.span("onboarding.create_ftd", device=ftd_input.name), Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True,
         ) as progress:
-            create_ftd_task_id: TaskID = progress.add_task(
-                f"Generating configure manager CLI commands for FTD {ftd_input.name}...",
-                start=True,
+            description = (
+                f"Generating configure manager CLI commands for FTD {ftd_input.name}..."
             )
+            create_ftd_task_id: TaskID = progress.add_task(description, start=True)
             transaction: CdoTransaction = self.inventory_api.create_ftd_device(
                 ftd_input
             )
             return self._get_device_after_transaction_finished(
-                transaction, progress, create_ftd_task_id
+                transaction,
+                progress,
+                create_ftd_task_id,
+                on_update=show_transaction_status(
+                    progress, create_ftd_task_id, description
+                ),
             )
 
     def register_ftd_device_with_scc(self, device: Device) -> Device:
-        with Progress(
+        with tracer.span("onboarding.register_ftd", device=device.name), Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True,
@@ -73,12 +83,14 @@ class InventoryApiService:
                     FtdRegistrationInput(ftd_uid=device.uid)
                 )
             )
-            return self._get_device_after_transaction_finished(
+            registered_device = self._get_device_after_transaction_finished(
                 transaction, progress, register_ftd_task_id
             )
+            devices_onboarded.inc(label_of(registered_device.device_type))
+            return registered_device
 
     def onboard_ftd_ztp_device(self, ztp_onboarding_input: ZtpOnboardingInput):
-        with Progress(
+        with tracer.span("onboarding.ztp", device=ztp_onboarding_input.name), Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             transient=True,
@@ -106,15 +118,20 @@ class InventoryApiService:
                 sys.exit(1)
             finally:
                 progress.stop_task(task_id=onboard_ftd_task_id)
+            devices_onboarded.inc(label_of(devicePage.items[0].device_type))
             return devicePage.items[0]
 
     def _get_device_after_transaction_finished(
-        self, transaction: CdoTransaction, progress: Progress, task_id: TaskID
+        self,
+        transaction: CdoTransaction,
+        progress: Progress,
+        task_id: TaskID,
+        on_update: Callable[[CdoTransaction], None] = None,
     ) -> Device:
         try:
             finished_transaction: CdoTransaction = (
                 self.transaction_service.wait_for_transaction_to_finish(
-                    transaction_uid=transaction.transaction_uid
+                    transaction_uid=transaction.transaction_uid, on_update=on_update
                 )
             )
             device: Device = self.inventory_api.get_device(
@@ -130,17 +147,29 @@ class InventoryApiService:
 
     def get_devices(self, q: str = None) -> List[Device]:
         devices: List[Device] = []
-        count: int = 0
+        for device_page in self.iter_device_pages(q=q):
+            devices.extend(device_page)
+
+        return devices
+
+    def iter_device_pages(
+        self, q: str = None, limit: int = 200
+    ) -> Iterator[List[Device]]:
+        # one page at a time, for callers that stream the inventory rather than hold all of it
         offset: int = 0
-        limit: int = 200
         while True:
             device_page: DevicePage = self.inventory_api.get_devices(
                 limit=str(limit), offset=str(offset), q=q
             )
-            devices.extend(device_page.items)
-            count = device_page.count
+            if device_page.items:
+                yield device_page.items
             offset += limit
-            if len(devices) >= count:
+            if offset >= device_page.count or len(device_page.items) == 0:
                 break
 
-        return devices
+    def search_devices(self, q: str = None, limit: int = 25) -> List[Device]:
+        # only the first page, for searches that must not load the whole inventory
+        device_page: DevicePage = self.inventory_api.get_devices(
+            limit=str(limit), offset="0", q=q
+        )
+        return device_page.items
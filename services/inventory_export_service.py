@@ -0,0 +1,252 @@
+import csv
+import json
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from cdo_sdk_python import ApiClient, Device
+from cdo_sdk_python.models.msp_managed_tenant import MspManagedTenant
+
+from services.inventory_api_service import InventoryApiService
+from services.tracing import tracer
+from utils.export_formats import EXPORT_FORMATS
+
+DEVICE_COLUMNS = [
+    "tenant_uid",
+    "tenant_name",
+    "uid",
+    "name",
+    "device_type",
+    "connectivity_state",
+    "config_state",
+    "software_version",
+    "asdm_version",
+    "hardware_model",
+    "serial",
+    "address",
+]
+VERSION_COLUMNS = ["compatible_versions", "suggested_version"]
+
+
+class DeviceWriter(ABC):
+    """Appends rows of device columns to a file as they arrive. Safe to share between threads."""
+
+    def __init__(self, output_file: str, columns: List[str]):
+        self.output_file = output_file
+        self.columns = columns
+        self.rows_written = 0
+        self._lock = threading.Lock()
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._write_rows(rows)
+            self.rows_written += len(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    @abstractmethod
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        pass
+
+    @abstractmethod
+    def _close(self) -> None:
+        pass
+
+
+class CsvDeviceWriter(DeviceWriter):
+    def __init__(self, output_file: str, columns: List[str]):
+        super().__init__(output_file, columns)
+        self._file = open(output_file, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        self._writer.writeheader()
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class JsonLinesDeviceWriter(DeviceWriter):
+    def __init__(self, output_file: str, columns: List[str]):
+        super().__init__(output_file, columns)
+        self._file = open(output_file, "w")
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._file.writelines(json.dumps(row) + "\n" for row in rows)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class ParquetDeviceWriter(DeviceWriter):
+    # rows are buffered into row groups of this size, which bounds the memory used whatever the size of the inventory
+    ROW_GROUP_SIZE = 10000
+
+    def __init__(self, output_file: str, columns: List[str]):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError(
+                "Exporting to Parquet needs pyarrow: install it with pip install pyarrow"
+            )
+        super().__init__(output_file, columns)
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema(
+            [(column, pyarrow.string()) for column in columns]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(output_file, self._schema)
+        self._buffered_rows: List[Dict[str, Any]] = []
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._buffered_rows.extend(rows)
+        if len(self._buffered_rows) >= self.ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffered_rows:
+            self._writer.write_table(
+                self._pyarrow.Table.from_pylist(
+                    self._buffered_rows, schema=self._schema
+                )
+            )
+            self._buffered_rows = []
+
+    def _close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def open_device_writer(
+    output_file: str, export_format: str, columns: List[str]
+) -> DeviceWriter:
+    writer_class = {
+        "csv": CsvDeviceWriter,
+        "jsonl": JsonLinesDeviceWriter,
+        "parquet": ParquetDeviceWriter,
+    }.get(export_format)
+    if writer_class is None:
+        raise ValueError(
+            f"Unsupported export format {export_format}; use one of {', '.join(EXPORT_FORMATS)}"
+        )
+    return writer_class(output_file, columns)
+
+
+class InventoryExportService:
+    """
+    Streams the inventory of a tenant into a DeviceWriter one page at a time, so that only a page of devices is held
+    in memory. With with_versions, the compatible versions of the FTDs and ASAs of a page are looked up concurrently
+    before the page is written.
+    """
+
+    def __init__(
+        self,
+        writer: DeviceWriter,
+        with_versions: bool = False,
+        max_concurrent_version_lookups: int = 8,
+    ):
+        self.writer = writer
+        self.with_versions = with_versions
+        self.max_concurrent_version_lookups = max_concurrent_version_lookups
+
+    @staticmethod
+    def columns(with_versions: bool) -> List[str]:
+        return DEVICE_COLUMNS + (VERSION_COLUMNS if with_versions else [])
+
+    def export_tenant(
+        self, api_client: ApiClient, tenant: MspManagedTenant = None, q: str = None
+    ) -> int:
+        inventory_api_service = InventoryApiService(api_client)
+        device_upgrade_api_service = None
+        if self.with_versions:
+            # imported here so that exports without versions do not need the device upgrade API
+            from services.device_upgrade_api_service import DeviceUpgradeApiService
+
+            device_upgrade_api_service = DeviceUpgradeApiService(api_client)
+
+        version_lookups = (
+            ThreadPoolExecutor(max_workers=self.max_concurrent_version_lookups)
+            if device_upgrade_api_service is not None
+            else None
+        )
+        exported = 0
+        try:
+            with tracer.span("export.tenant", tenant=tenant.name if tenant else None):
+                for devices in inventory_api_service.iter_device_pages(q=q):
+                    rows = [self._to_row(device, tenant) for device in devices]
+                    if version_lookups is not None:
+                        for row, versions in zip(
+                            rows,
+                            version_lookups.map(
+                                lambda device: self._get_versions(
+                                    device_upgrade_api_service, device
+                                ),
+                                devices,
+                            ),
+                        ):
+                            row.update(versions)
+                    self.writer.write_rows(rows)
+                    exported += len(rows)
+        finally:
+            if version_lookups is not None:
+                version_lookups.shutdown()
+        return exported
+
+    @staticmethod
+    def _to_row(device: Device, tenant: MspManagedTenant = None) -> Dict[str, Any]:
+        def value_of(attribute: str) -> Optional[str]:
+            value = getattr(device, attribute)
+            return getattr(value, "value", value)
+
+        return {
+            "tenant_uid": tenant.uid if tenant else None,
+            "tenant_name": tenant.name if tenant else None,
+            "uid": device.uid,
+            "name": device.name,
+            "device_type": value_of("device_type"),
+            "connectivity_state": value_of("connectivity_state"),
+            "config_state": value_of("config_state"),
+            "software_version": device.software_version,
+            "asdm_version": device.asdm_version,
+            "hardware_model": device.hardware_model,
+            "serial": device.serial,
+            "address": device.address,
+        }
+
+    @staticmethod
+    def _get_versions(
+        device_upgrade_api_service: Any, device: Device
+    ) -> Dict[str, Any]:
+        device_type = getattr(device.device_type, "value", device.device_type)
+        if device_type == "CDFMC_MANAGED_FTD":
+            ftd_versions = device_upgrade_api_service.get_compatible_ftd_versions(
+                device.uid
+            )
+            return {
+                "compatible_versions": ";".join(
+                    ftd_version.software_version for ftd_version in ftd_versions
+                ),
+                "suggested_version": next(
+                    (
+                        ftd_version.software_version
+                        for ftd_version in ftd_versions
+                        if ftd_version.is_suggested_version
+                    ),
+                    None,
+                ),
+            }
+        if device_type == "ASA":
+            asa_versions = device_upgrade_api_service.get_compatible_asa_versions(
+                device.uid
+            )
+            return {
+                "compatible_versions": ";".join(
+                    asa_version.software_version for asa_version in asa_versions
+                ),
+                "suggested_version": None,
+            }
+        return {"compatible_versions": None, "suggested_version": None}
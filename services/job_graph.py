@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List
+
+from services.tracing import tracer
+
+DONE = "DONE"
+FAILED = "FAILED"
+SKIPPED = "SKIPPED"
+
+
+@dataclass
+class Job:
+    name: str
+    run: Callable[[], Any]
+    dependencies: List[str] = field(default_factory=list)
+
+
+@dataclass
+class JobResult:
+    name: str
+    status: str
+    duration_seconds: float = 0
+    error: str = None
+    result: Any = None
+
+
+class JobGraph:
+    """
+    Jobs that depend on each other. A job can only depend on jobs added before it, so the graph cannot have cycles.
+    run() starts every job as soon as all of its dependencies are DONE, and skips the jobs that depend on a failed one.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+
+    def add(
+        self, name: str, run: Callable[[], Any], dependencies: Iterable[str] = ()
+    ) -> str:
+        if name in self.jobs:
+            raise ValueError(f"Job {name} was added twice")
+        dependencies = [dependency for dependency in dependencies if dependency]
+        unknown = [
+            dependency for dependency in dependencies if dependency not in self.jobs
+        ]
+        if unknown:
+            raise ValueError(f"Job {name} depends on unknown jobs {unknown}")
+        self.jobs[name] = Job(name=name, run=run, dependencies=dependencies)
+        return name
+
+    def run(
+        self,
+        max_concurrent_jobs: int = 8,
+        on_finished: Callable[[JobResult], None] = None,
+    ) -> Dict[str, JobResult]:
+        results: Dict[str, JobResult] = {}
+        waiting_on: Dict[str, int] = {
+            name: len(job.dependencies) for name, job in self.jobs.items()
+        }
+        dependents: Dict[str, List[str]] = {name: [] for name in self.jobs}
+        for job in self.jobs.values():
+            for dependency in job.dependencies:
+                dependents[dependency].append(job.name)
+
+        def finish(result: JobResult) -> None:
+            results[result.name] = result
+            if on_finished is not None:
+                on_finished(result)
+
+        def skip_dependents_of(name: str) -> None:
+            for dependent in dependents[name]:
+                if dependent not in results:
+                    finish(
+                        JobResult(
+                            name=dependent,
+                            status=SKIPPED,
+                            error=f"{name} did not finish",
+                        )
+                    )
+                    skip_dependents_of(dependent)
+
+        with ThreadPoolExecutor(
+            max_workers=max_concurrent_jobs, thread_name_prefix="job"
+        ) as executor:
+            running: Dict[Future, str] = {
+                executor.submit(self._run_job, self.jobs[name]): name
+                for name, count in waiting_on.items()
+                if count == 0
+            }
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result: JobResult = future.result()
+                    finish(result)
+                    if result.status != DONE:
+                        skip_dependents_of(name)
+                        continue
+                    for dependent in dependents[name]:
+                        waiting_on[dependent] -= 1
+                        if waiting_on[dependent] == 0 and dependent not in results:
+                            running[
+                                executor.submit(self._run_job, self.jobs[dependent])
+                            ] = dependent
+        return results
+
+    @staticmethod
+    def _run_job(job: Job) -> JobResult:
+        started_at = time.perf_counter()
+        try:
+            with tracer.span(f"job {job.name}"):
+                value = job.run()
+            return JobResult(
+                name=job.name,
+                status=DONE,
+                duration_seconds=time.perf_counter() - started_at,
+                result=value,
+            )
+        except (Exception, SystemExit) as e:
+            # the services exit (after printing the error) when a transaction fails; that only fails this job
+            return JobResult(
+                name=job.name,
+                status=FAILED,
+                duration_seconds=time.perf_counter() - started_at,
+                error=str(e) if not isinstance(e, SystemExit) else "exited",
+            )
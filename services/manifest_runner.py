@@ -0,0 +1,250 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from cdo_sdk_python import ApiClient, Device, UserInput
+from cdo_sdk_python.models.msp_managed_tenant import MspManagedTenant
+
+from models.job_manifest import JobManifest, TenantManifest, UpgradeManifest
+from parsers.ftd_parser import FtdParser
+from parsers.ftd_ztp_parser import FtdZtpParser
+from parsers.scc_users_parser import SccUsersParser
+from services.cdfmc_api_service import CdFmcApiService
+from services.inventory_api_service import InventoryApiService
+from services.job_graph import JobGraph
+from services.msp_api_service import MspApiService
+from services.token_cache_service import TokenCacheService
+from utils.query import escape_query_value
+
+# the parsers need an access policy UID, which is only known once the tenant's access policy job has run
+PENDING_ACCESS_POLICY_UID = "pending"
+
+
+@dataclass
+class _TenantState:
+    manifest: TenantManifest
+    tenant: Optional[MspManagedTenant] = None
+    api_client: Optional[ApiClient] = None
+    fmc_access_policy_uid: Optional[str] = None
+
+
+class ManifestRunner:
+    """
+    Compiles a job manifest into a job graph: each tenant's steps run in order, while the tenants, and the devices
+    within a tenant, run in parallel. Every job uses the shared API clients and transaction watcher.
+    """
+
+    def __init__(
+        self, msp_api_client: ApiClient, token_cache_service: TokenCacheService = None
+    ):
+        self.msp_api_client = msp_api_client
+        self.msp_api_service = MspApiService(
+            api_client=msp_api_client, token_cache_service=token_cache_service
+        )
+
+    def compile(self, manifest: JobManifest) -> JobGraph:
+        graph = JobGraph()
+        for tenant_manifest in manifest.tenants:
+            self._add_tenant_jobs(graph, _TenantState(manifest=tenant_manifest))
+        return graph
+
+    def _add_tenant_jobs(self, graph: JobGraph, state: _TenantState) -> None:
+        manifest = state.manifest
+        state.fmc_access_policy_uid = manifest.fmc_access_policy_uid
+        tenant_job = graph.add(
+            f"{manifest.name}: tenant", lambda: self._create_or_get_tenant(state)
+        )
+        users_job = None
+        if manifest.uid is None or manifest.users_csv_file:
+            users_job = graph.add(
+                f"{manifest.name}: users",
+                lambda: self._create_users(state),
+                [tenant_job],
+            )
+        token_job = graph.add(
+            f"{manifest.name}: API token",
+            lambda: self._connect_to_tenant(state),
+            [users_job or tenant_job],
+        )
+        cdfmc_job = None
+        if manifest.provision_cdfmc:
+            cdfmc_job = graph.add(
+                f"{manifest.name}: cdFMC",
+                lambda: self._provision_cdfmc(state),
+                [token_job],
+            )
+        access_policy_job = None
+        if manifest.create_access_policy:
+            access_policy_job = graph.add(
+                f"{manifest.name}: access policy",
+                lambda: self._create_access_policy(state),
+                [cdfmc_job or token_job],
+            )
+
+        onboarding_jobs: Dict[str, str] = {}
+        for ztp_onboarding_input in (
+            FtdZtpParser(
+                fmc_access_policy_uid=PENDING_ACCESS_POLICY_UID,
+                ftd_ztp_csv_file=manifest.ftd_ztp_csv_file,
+            ).get_ztp_onboarding_inputs()
+            if manifest.ftd_ztp_csv_file
+            else []
+        ):
+            onboarding_jobs[ztp_onboarding_input.name] = graph.add(
+                f"{manifest.name}: onboard {ztp_onboarding_input.name}",
+                lambda onboarding_input=ztp_onboarding_input: self._onboard_ftd(
+                    state, onboarding_input, ztp=True
+                ),
+                [access_policy_job or cdfmc_job or token_job],
+            )
+        for ftd_input in (
+            FtdParser(
+                fmc_access_policy_uid=PENDING_ACCESS_POLICY_UID,
+                ftd_csv_file=manifest.ftd_csv_file,
+            ).get_ftds_to_onboard()
+            if manifest.ftd_csv_file
+            else []
+        ):
+            onboarding_jobs[ftd_input.name] = graph.add(
+                f"{manifest.name}: onboard {ftd_input.name}",
+                lambda onboarding_input=ftd_input: self._onboard_ftd(
+                    state, onboarding_input, ztp=False
+                ),
+                [access_policy_job or cdfmc_job or token_job],
+            )
+
+        for upgrade in manifest.upgrades:
+            graph.add(
+                f"{manifest.name}: upgrade {upgrade.device_name}",
+                lambda upgrade=upgrade: self._upgrade(state, upgrade),
+                [onboarding_jobs.get(upgrade.device_name) or token_job],
+            )
+
+    def _create_or_get_tenant(self, state: _TenantState) -> str:
+        if state.manifest.uid is not None:
+            state.tenant = self.msp_api_service.get_managed_tenant_by_uid(
+                state.manifest.uid
+            )
+            return f"Found tenant {state.tenant.display_name} (UID: {state.tenant.uid})"
+        state.tenant = self.msp_api_service.create_tenant(
+            tenant_name=state.manifest.name,
+            display_name=state.manifest.display_name,
+        )
+        return f"Created tenant {state.tenant.display_name} (UID: {state.tenant.uid})"
+
+    def _create_users(self, state: _TenantState) -> str:
+        users: List[UserInput] = (
+            SccUsersParser(state.manifest.users_csv_file).get_users()
+            if state.manifest.users_csv_file
+            else []
+        )
+        if state.manifest.uid is None:
+            # like provision_tenant, new tenants get an API-only user to configure them with
+            users.append(
+                UserInput(
+                    username=state.manifest.api_only_user_name,
+                    role="ROLE_SUPER_ADMIN",
+                    api_only_user=True,
+                )
+            )
+        failed_users = self.msp_api_service.create_users_in_chunks(
+            users=users, msp_managed_tenant=state.tenant
+        )
+        if any(
+            failed_user.user.username == state.manifest.api_only_user_name
+            for failed_user in failed_users
+        ):
+            raise RuntimeError(
+                f"Could not create API-only user {state.manifest.api_only_user_name}"
+            )
+        if failed_users:
+            return f"Created {len(users) - len(failed_users)} users; could not create {', '.join(failed_user.user.username for failed_user in failed_users)}"
+        return f"Created {len(users)} users"
+
+    def _connect_to_tenant(self, state: _TenantState) -> str:
+        state.api_client = self.msp_api_service.get_managed_tenant_api_client(
+            msp_managed_tenant=state.tenant,
+            username=state.manifest.api_only_user_name,
+        )
+        return f"Using the API token of {state.manifest.api_only_user_name}"
+
+    def _provision_cdfmc(self, state: _TenantState) -> str:
+        self.msp_api_service.provision_cdfmc_on_msp_managed_tenant(
+            msp_managed_tenant=state.tenant,
+            msp_managed_tenant_api_token=state.api_client.configuration.access_token,
+            should_wait_for_cdfmc_to_be_active=True,
+        )
+        return "Provisioned cdFMC"
+
+    def _create_access_policy(self, state: _TenantState) -> str:
+        cdfmc_api_service = CdFmcApiService(api_client=state.api_client)
+        state.fmc_access_policy_uid = cdfmc_api_service.create_default_access_policy()
+        cdfmc_api_service.block_gambling(access_policy_uid=state.fmc_access_policy_uid)
+        return f"Created access policy {state.fmc_access_policy_uid}"
+
+    def _onboard_ftd(self, state: _TenantState, onboarding_input, ztp: bool) -> str:
+        inventory_api_service = InventoryApiService(api_client=state.api_client)
+        onboarding_input = onboarding_input.model_copy(
+            update={"fmc_access_policy_uid": state.fmc_access_policy_uid}
+        )
+        device: Device = (
+            inventory_api_service.onboard_ftd_ztp_device(
+                ztp_onboarding_input=onboarding_input
+            )
+            if ztp
+            else inventory_api_service.onboard_ftd_device(ftd_input=onboarding_input)
+        )
+        return f"Onboarded FTD {device.name} (UID: {device.uid})"
+
+    def _upgrade(self, state: _TenantState, upgrade: UpgradeManifest) -> str:
+        # imported here so that manifests without upgrades do not need the device upgrade API
+        from cdo_sdk_python import UpgradeAsaDeviceInput
+
+        from services.device_upgrade_api_service import DeviceUpgradeApiService
+
+        device_type = "CDFMC_MANAGED_FTD" if upgrade.device_type == "ftd" else "ASA"
+        devices = [
+            device
+            for device in InventoryApiService(api_client=state.api_client).get_devices(
+                q=f"name:{escape_query_value(upgrade.device_name)} AND deviceType:{device_type}"
+            )
+            if device.name == upgrade.device_name
+        ]
+        if len(devices) != 1:
+            raise RuntimeError(
+                f"Found {len(devices)} {upgrade.device_type.upper()}s named {upgrade.device_name}"
+            )
+        device_uid = devices[0].uid
+        device_upgrade_api_service = DeviceUpgradeApiService(state.api_client)
+
+        if upgrade.device_type == "asa":
+            device_upgrade_api_service.upgrade_asa(
+                device_uid,
+                UpgradeAsaDeviceInput(
+                    software_version=upgrade.software_version,
+                    asdm_version=upgrade.asdm_version,
+                ),
+            )
+            return f"Upgraded ASA {upgrade.device_name}"
+
+        upgrade_package_uid = upgrade.upgrade_package_uid
+        if upgrade_package_uid is None:
+            upgrade_package_uid = next(
+                (
+                    ftd_version.upgrade_package_uid
+                    for ftd_version in device_upgrade_api_service.get_compatible_ftd_versions(
+                        device_uid
+                    )
+                    if ftd_version.software_version == upgrade.software_version
+                ),
+                None,
+            )
+            if upgrade_package_uid is None:
+                raise RuntimeError(
+                    f"FTD {upgrade.device_name} cannot be upgraded to {upgrade.software_version}"
+                )
+        device_upgrade_api_service.upgrade_ftd(
+            ftd_uid=device_uid,
+            upgrade_package_uid=upgrade_package_uid,
+            software_version=upgrade.software_version,
+        )
+        return f"Upgraded FTD {upgrade.device_name}"
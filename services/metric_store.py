@@ -0,0 +1,319 @@
+import bisect
+import mmap
+import os
+import threading
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from models.monitoring import MetricSample
+
+SECONDS_PER_DAY = 24 * 60 * 60
+ROLLUP_SEGMENT_SECONDS = 30 * SECONDS_PER_DAY
+
+# one fixed-width file per column: seconds since the epoch, index into the device dictionary, and the value
+COLUMNS: Dict[str, str] = {"timestamps": "I", "devices": "I", "values": "f"}
+
+
+class _Segment:
+    """The column files of one metric for one period, memory-mapped read-only."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmaps: List[mmap.mmap] = []
+        self._views: List[memoryview] = []
+        self._device_column: mmap.mmap = None
+        columns = {
+            column: self._map_column(f"{path}.{column}", typecode)
+            for column, typecode in COLUMNS.items()
+        }
+        # a write interrupted half-way can leave one column longer than the others
+        self.length = min(len(view) for view in columns.values())
+        self.timestamps = self._track(columns["timestamps"][: self.length])
+        self.devices = self._track(columns["devices"][: self.length])
+        self.values = self._track(columns["values"][: self.length])
+
+    def _map_column(self, file_path: str, typecode: str) -> memoryview:
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return self._track(memoryview(array(typecode)))
+        with open(file_path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmaps.append(mapped)
+        if file_path.endswith(".devices"):
+            self._device_column = mapped
+        view = self._track(memoryview(mapped))
+        item_size = array(typecode).itemsize
+        return self._track(
+            self._track(view[: len(view) - len(view) % item_size]).cast(typecode)
+        )
+
+    def _track(self, view: memoryview) -> memoryview:
+        self._views.append(view)
+        return view
+
+    def row_range(self, since: float = None, until: float = None) -> Tuple[int, int]:
+        # rows are appended in time order, so a time range is a contiguous slice
+        start = 0 if since is None else bisect.bisect_left(self.timestamps, since)
+        end = (
+            self.length if until is None else bisect.bisect_left(self.timestamps, until)
+        )
+        return start, end
+
+    def rows_of_device(self, device_index: int, start: int, end: int) -> Iterator[int]:
+        # search the device column with mmap.find, which runs in C, instead of comparing every row in Python
+        if self._device_column is None:
+            return
+        needle = array(COLUMNS["devices"], [device_index]).tobytes()
+        item_size = len(needle)
+        position = self._device_column.find(needle, start * item_size, end * item_size)
+        while position != -1:
+            if position % item_size == 0:
+                yield position // item_size
+                position += item_size
+            else:
+                # matched across two rows
+                position += 1
+            position = self._device_column.find(needle, position, end * item_size)
+
+    def close(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+        for mapped in self._mmaps:
+            mapped.close()
+
+
+class MetricStore:
+    """
+    Append-only, columnar metric store. Each metric has one segment per day of raw samples, and one segment per month of
+    hourly averages that raw segments are downsampled into once they are older than raw_retention_days. Segments are
+    memory-mapped for reads, and rollups older than rollup_retention_days are deleted. Only one process should write to
+    a store at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str = "~/.cisco-security-metrics",
+        raw_retention_days: int = 7,
+        rollup_retention_days: int = 400,
+        rollup_interval_seconds: int = 60 * 60,
+    ):
+        self.directory = os.path.expanduser(directory)
+        self.raw_retention_days = raw_retention_days
+        self.rollup_retention_days = rollup_retention_days
+        self.rollup_interval_seconds = rollup_interval_seconds
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._device_uids: List[str] = []
+        self._device_indexes: Dict[str, int] = {}
+        self._load_device_dictionary()
+
+    def append(self, samples: Iterable[MetricSample]) -> None:
+        columns_by_segment: Dict[str, Dict[str, array]] = defaultdict(
+            lambda: {column: array(typecode) for column, typecode in COLUMNS.items()}
+        )
+        with self._lock:
+            for sample in sorted(samples, key=lambda s: s.timestamp):
+                timestamp = int(sample.timestamp)
+                columns = columns_by_segment[
+                    self._raw_segment_path(sample.metric, timestamp)
+                ]
+                columns["timestamps"].append(timestamp)
+                columns["devices"].append(self._device_index(sample.device_uid))
+                columns["values"].append(sample.value)
+            for segment_path, columns in columns_by_segment.items():
+                self._append_columns(segment_path, columns)
+
+    def query(
+        self,
+        metric: str,
+        device_uid: str = None,
+        since: float = None,
+        until: float = None,
+    ) -> List[MetricSample]:
+        """Returns the samples in the time range, oldest first; samples older than the raw retention are hourly averages."""
+        if device_uid is not None and device_uid not in self._device_indexes:
+            self._load_device_dictionary()
+            if device_uid not in self._device_indexes:
+                return []
+        samples = []
+        for segment_path in self._segment_paths(metric, since, until):
+            segment = _Segment(segment_path)
+            try:
+                start, end = segment.row_range(since, until)
+                rows = (
+                    range(start, end)
+                    if device_uid is None
+                    else segment.rows_of_device(
+                        self._device_indexes[device_uid], start, end
+                    )
+                )
+                samples.extend(
+                    MetricSample(
+                        device_uid=self._device_uid(segment.devices[row]),
+                        metric=metric,
+                        timestamp=segment.timestamps[row],
+                        value=segment.values[row],
+                    )
+                    for row in rows
+                )
+            finally:
+                segment.close()
+        return samples
+
+    def latest(
+        self, metric: str, max_age_seconds: float = 60 * 60
+    ) -> Dict[str, MetricSample]:
+        """Returns the most recent sample of the metric for every device that reported it within max_age_seconds of the newest sample."""
+        latest_samples: Dict[str, MetricSample] = {}
+        oldest_timestamp = None
+        for segment_path in reversed(self._segment_paths(metric)):
+            segment = _Segment(segment_path)
+            try:
+                for row in range(segment.length - 1, -1, -1):
+                    timestamp = segment.timestamps[row]
+                    if oldest_timestamp is None:
+                        oldest_timestamp = timestamp - max_age_seconds
+                    if timestamp < oldest_timestamp:
+                        return latest_samples
+                    device_uid = self._device_uid(segment.devices[row])
+                    if device_uid not in latest_samples:
+                        latest_samples[device_uid] = MetricSample(
+                            device_uid=device_uid,
+                            metric=metric,
+                            timestamp=timestamp,
+                            value=segment.values[row],
+                        )
+            finally:
+                segment.close()
+        return latest_samples
+
+    def metrics(self) -> List[str]:
+        return sorted(
+            name
+            for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def downsample_and_expire(self, now: float = None) -> None:
+        """Rolls raw segments older than the raw retention up into hourly averages, and deletes expired rollups."""
+        now = now or time.time()
+        raw_cutoff_day = int(now // SECONDS_PER_DAY) - self.raw_retention_days
+        rollup_cutoff = now - self.rollup_retention_days * SECONDS_PER_DAY
+        with self._lock:
+            for metric in self.metrics():
+                for segment_path in self._segment_paths_of_kind(metric, "raw"):
+                    if int(os.path.basename(segment_path)) < raw_cutoff_day:
+                        self._roll_up(metric, segment_path)
+                for segment_path in self._segment_paths_of_kind(metric, "rollup"):
+                    segment_end = (
+                        int(os.path.basename(segment_path)) + 1
+                    ) * ROLLUP_SEGMENT_SECONDS
+                    if segment_end < rollup_cutoff:
+                        self._delete_segment(segment_path)
+
+    def _roll_up(self, metric: str, raw_segment_path: str) -> None:
+        sums: Dict[Tuple[int, int], float] = defaultdict(float)
+        counts: Dict[Tuple[int, int], int] = defaultdict(int)
+        segment = _Segment(raw_segment_path)
+        try:
+            for timestamp, device_index, value in zip(
+                segment.timestamps, segment.devices, segment.values
+            ):
+                bucket = timestamp - timestamp % self.rollup_interval_seconds
+                sums[(bucket, device_index)] += value
+                counts[(bucket, device_index)] += 1
+        finally:
+            segment.close()
+
+        columns_by_segment: Dict[str, Dict[str, array]] = defaultdict(
+            lambda: {column: array(typecode) for column, typecode in COLUMNS.items()}
+        )
+        for (bucket, device_index), total in sorted(sums.items()):
+            columns = columns_by_segment[self._rollup_segment_path(metric, bucket)]
+            columns["timestamps"].append(bucket)
+            columns["devices"].append(device_index)
+            columns["values"].append(total / counts[(bucket, device_index)])
+        for segment_path, columns in columns_by_segment.items():
+            self._append_columns(segment_path, columns)
+        self._delete_segment(raw_segment_path)
+
+    def _raw_segment_path(self, metric: str, timestamp: int) -> str:
+        return os.path.join(
+            self.directory, metric, "raw", str(timestamp // SECONDS_PER_DAY)
+        )
+
+    def _rollup_segment_path(self, metric: str, timestamp: int) -> str:
+        return os.path.join(
+            self.directory,
+            metric,
+            "rollup",
+            str(timestamp // ROLLUP_SEGMENT_SECONDS),
+        )
+
+    def _segment_paths_of_kind(self, metric: str, kind: str) -> List[str]:
+        kind_directory = os.path.join(self.directory, metric, kind)
+        if not os.path.isdir(kind_directory):
+            return []
+        numbers = {
+            int(file_name.split(".")[0]) for file_name in os.listdir(kind_directory)
+        }
+        return [os.path.join(kind_directory, str(number)) for number in sorted(numbers)]
+
+    def _segment_paths(
+        self, metric: str, since: float = None, until: float = None
+    ) -> List[str]:
+        # rollups only hold data older than any raw segment, so they come first in time order
+        paths = []
+        for kind, segment_seconds in (
+            ("rollup", ROLLUP_SEGMENT_SECONDS),
+            ("raw", SECONDS_PER_DAY),
+        ):
+            for segment_path in self._segment_paths_of_kind(metric, kind):
+                segment_start = int(os.path.basename(segment_path)) * segment_seconds
+                if since is not None and segment_start + segment_seconds <= since:
+                    continue
+                if until is not None and segment_start >= until:
+                    continue
+                paths.append(segment_path)
+        return paths
+
+    @staticmethod
+    def _append_columns(segment_path: str, columns: Dict[str, array]) -> None:
+        os.makedirs(os.path.dirname(segment_path), mode=0o700, exist_ok=True)
+        for column, values in columns.items():
+            with open(f"{segment_path}.{column}", "ab") as file:
+                values.tofile(file)
+
+    @staticmethod
+    def _delete_segment(segment_path: str) -> None:
+        for column in COLUMNS:
+            if os.path.exists(f"{segment_path}.{column}"):
+                os.remove(f"{segment_path}.{column}")
+
+    def _device_index(self, device_uid: str) -> int:
+        device_index = self._device_indexes.get(device_uid)
+        if device_index is None:
+            device_index = len(self._device_uids)
+            with open(os.path.join(self.directory, "devices.txt"), "a") as file:
+                file.write(f"{device_uid}\n")
+            self._device_uids.append(device_uid)
+            self._device_indexes[device_uid] = device_index
+        return device_index
+
+    def _device_uid(self, device_index: int) -> str:
+        if device_index >= len(self._device_uids):
+            # added by the writing process after this store was opened
+            self._load_device_dictionary()
+        return self._device_uids[device_index]
+
+    def _load_device_dictionary(self) -> None:
+        devices_file_path = os.path.join(self.directory, "devices.txt")
+        if not os.path.exists(devices_file_path):
+            return
+        with open(devices_file_path, "r") as file:
+            self._device_uids = [line.rstrip("\n") for line in file if line.strip()]
+        self._device_indexes = {
+            device_uid: device_index
+            for device_index, device_uid in enumerate(self._device_uids)
+        }
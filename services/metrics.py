@@ -0,0 +1,304 @@
+import atexit
+import bisect
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Metric(ABC):
+    metric_type: str = None
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _label_text(self, label_values: Tuple[str, ...], extra: str = "") -> str:
+        labels = [
+            f'{name}="{self._escape(value)}"'
+            for name, value in zip(self.label_names, label_values)
+        ]
+        if extra:
+            labels.append(extra)
+        return "{" + ",".join(labels) + "}" if labels else ""
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ] + self._render_samples()
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        pass
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if len(values) == 0 and len(self.label_names) == 0:
+            values[()] = 0
+        return [
+            f"{self.name}{self._label_text(label_values)} {value:g}"
+            for label_values, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = buckets
+        # per label values: a count per bucket (the last one is +Inf), and the sum of the observed values
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            bucket_counts, total = self._values.setdefault(
+                label_values, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for label_values, (bucket_counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for upper_bound, count in zip(
+                    [f"{bound:g}" for bound in self.buckets] + ["+Inf"], bucket_counts
+                ):
+                    cumulative += count
+                    bucket_labels = self._label_text(
+                        label_values, 'le="' + upper_bound + '"'
+                    )
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(
+                    f"{self.name}_sum{self._label_text(label_values)} {total[0]:g}"
+                )
+                lines.append(
+                    f"{self.name}_count{self._label_text(label_values)} {cumulative}"
+                )
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(
+        self, name: str, documentation: str, label_names: Tuple[str, ...] = ()
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names))
+
+    def _register(self, metric: _Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        return (
+            "\n".join(line for metric in self._metrics for line in metric.render())
+            + "\n"
+        )
+
+
+class MetricsExporter:
+    """
+    Exposes the registry on http://<host>:<port>/metrics, and/or writes it to a file for the node_exporter textfile
+    collector every interval_seconds and on exit.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        port: Optional[int] = None,
+        textfile_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        interval_seconds: float = 15,
+    ):
+        self.registry = registry
+        self.port = port
+        self.textfile_path = textfile_path
+        self.host = host
+        self.interval_seconds = interval_seconds
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if self.port is not None:
+            try:
+                self._start_http_server()
+            except OSError as e:
+                # e.g. another command already serves metrics on the port; the command itself must still run
+                print(
+                    f"Warning: not serving metrics on port {self.port}: {e}",
+                    file=sys.stderr,
+                )
+        if self.textfile_path is not None:
+            threading.Thread(
+                target=self._write_textfile_periodically,
+                name="metrics-textfile",
+                daemon=True,
+            ).start()
+            atexit.register(self.write_textfile)
+
+    def _start_http_server(self) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # keep the scrapes out of the command's output
+                pass
+
+        server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(
+            target=server.serve_forever, name="metrics-http", daemon=True
+        ).start()
+
+    def _write_textfile_periodically(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            self.write_textfile()
+
+    def write_textfile(self) -> None:
+        # the textfile collector may read at any time, so the file is swapped in atomically
+        tmp_file_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, "w") as file:
+            file.write(self.registry.render())
+        os.replace(tmp_file_path, self.textfile_path)
+
+
+registry = MetricsRegistry()
+
+transactions_started = registry.counter(
+    "scc_transactions_started_total",
+    "Transactions started, by transaction type.",
+    ("type",),
+)
+transactions_finished = registry.counter(
+    "scc_transactions_finished_total",
+    "Transactions that finished successfully, by transaction type.",
+    ("type",),
+)
+transactions_failed = registry.counter(
+    "scc_transactions_failed_total",
+    "Transactions that finished with an error, by transaction type.",
+    ("type",),
+)
+transaction_polls = registry.counter(
+    "scc_transaction_polls_total", "Transaction status polls sent to the API."
+)
+api_request_duration = registry.histogram(
+    "scc_api_request_duration_seconds",
+    "API request latency, including rate limiting and 429 retries, by endpoint and HTTP status.",
+    ("endpoint", "status"),
+)
+rate_limited_requests = registry.counter(
+    "scc_rate_limited_requests_total",
+    "Requests rejected with HTTP 429, by API host.",
+    ("host",),
+)
+devices_onboarded = registry.counter(
+    "scc_devices_onboarded_total",
+    "Devices onboarded, by device type; rate() * 60 gives devices onboarded per minute.",
+    ("device_type",),
+)
+tenants_created = registry.counter(
+    "scc_tenants_created_total", "MSP-managed tenants created."
+)
+users_created = registry.counter(
+    "scc_users_created_total", "Users added to MSP-managed tenants."
+)
+
+
+def label_of(value) -> str:
+    # SDK enums render as TransactionType.ONBOARD_ASA with str(), label them with their value
+    return str(getattr(value, "value", value))
+
+
+def record_transaction_started(transaction) -> None:
+    transactions_started.inc(label_of(transaction.transaction_type))
+
+
+def record_transaction_finished(transaction) -> None:
+    if transaction.cdo_transaction_status == "ERROR":
+        transactions_failed.inc(label_of(transaction.transaction_type))
+    else:
+        transactions_finished.inc(label_of(transaction.transaction_type))
+
+
+_exporter: Optional[MetricsExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter_from_environment() -> Optional[MetricsExporter]:
+    """Starts exporting the metrics when SCC_METRICS_PORT or SCC_METRICS_TEXTFILE is set, once per process."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is not None:
+            return _exporter
+        port = os.environ.get("SCC_METRICS_PORT")
+        textfile_path = os.environ.get("SCC_METRICS_TEXTFILE")
+        if not port and not textfile_path:
+            return None
+        try:
+            port = int(port) if port else None
+        except ValueError:
+            print(
+                f"Warning: SCC_METRICS_PORT is not a port number: {port}",
+                file=sys.stderr,
+            )
+            port = None
+        _exporter = MetricsExporter(registry, port=port, textfile_path=textfile_path)
+        _exporter.start()
+        return _exporter
@@ -1,8 +1,10 @@
 import sys
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Dict, Set
 
 from cdo_sdk_python import (
     ApiClient,
+    ApiException,
     MSPApi,
     MspCreateTenantInput,
     CdoTransaction,
@@ -10,19 +12,37 @@ from cdo_sdk_python import (
     MspAddUsersToTenantInput,
     UserPage,
     ApiTokenInfo,
-    Configuration,
     TransactionsApi,
 )
 from cdo_sdk_python.models.msp_managed_tenant import MspManagedTenant
+from cdo_sdk_python.models.msp_managed_tenant_page import MspManagedTenantPage
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, TaskID
+from rich.progress import (
+    Progress,
+    SpinnerColumn,
+    TextColumn,
+    TaskID,
+    BarColumn,
+    MofNCompleteColumn,
+)
+
+from models.msp import FailedUserCreation
+from services.api_client_registry import api_client_registry
+from services.token_cache_service import TokenCacheService
+from services.metrics import tenants_created, users_created
+from services.transaction_service import TransactionService, show_transaction_status
+from utils.query import escape_query_value
 
-from services.transaction_service import TransactionService
+# the MSP portal accepts at most 50 users per add-users request
+MAX_USERS_PER_REQUEST = 50
 
 
 class MspApiService:
-    def __init__(self, api_client: ApiClient):
+    def __init__(
+        self, api_client: ApiClient, token_cache_service: TokenCacheService = None
+    ):
         self.api_client = api_client
+        self.token_cache_service = token_cache_service
         self.msp_api = MSPApi(api_client)
         self.transaction_service = TransactionService(api_client)
         self.console = Console()
@@ -30,6 +50,20 @@ class MspApiService:
     def get_managed_tenant_by_uid(self, tenant_uid: str) -> MspManagedTenant:
         return self.msp_api.get_msp_managed_tenant(tenant_uid)
 
+    def get_managed_tenants(self, q: str = None) -> List[MspManagedTenant]:
+        tenants: List[MspManagedTenant] = []
+        offset: int = 0
+        limit: int = 200
+        while True:
+            tenant_page: MspManagedTenantPage = self.msp_api.get_msp_managed_tenants(
+                limit=str(limit), offset=str(offset), q=q
+            )
+            tenants.extend(tenant_page.items)
+            offset += limit
+            if len(tenants) >= tenant_page.count or len(tenant_page.items) == 0:
+                break
+        return tenants
+
     def create_tenant(self, tenant_name: str, display_name: str) -> MspManagedTenant:
         with Progress(
             SpinnerColumn(),
@@ -47,7 +81,10 @@ class MspApiService:
             try:
                 finished_transaction: CdoTransaction = (
                     self.transaction_service.wait_for_transaction_to_finish(
-                        transaction_uid=transaction.transaction_uid
+                        transaction_uid=transaction.transaction_uid,
+                        on_update=show_transaction_status(
+                            progress, create_tenant_task_id, "Creating tenant..."
+                        ),
                     )
                 )
                 msp_managed_tenant: MspManagedTenant = (
@@ -61,6 +98,7 @@ class MspApiService:
             finally:
                 progress.stop_task(task_id=create_tenant_task_id)
 
+        tenants_created.inc()
         return msp_managed_tenant
 
     def provision_cdfmc_on_msp_managed_tenant(
@@ -95,18 +133,14 @@ class MspApiService:
                     target_transaction_uid = transaction.transaction_details.get(
                         "TRANSACTION_UID_IN_TARGET_TENANT"
                     )
-                    with ApiClient(
-                        Configuration(
-                            host=self.api_client.configuration.host,
-                            access_token=msp_managed_tenant_api_token,
-                        )
-                    ) as tenant_api_client:
-                        tenant_transaction_service = TransactionService(
-                            tenant_api_client
-                        )
-                        tenant_transaction_service.wait_for_transaction_to_finish(
-                            transaction_uid=target_transaction_uid
-                        )
+                    tenant_api_client = api_client_registry.get_api_client(
+                        host=self.api_client.configuration.host,
+                        access_token=msp_managed_tenant_api_token,
+                    )
+                    tenant_transaction_service = TransactionService(tenant_api_client)
+                    tenant_transaction_service.wait_for_transaction_to_finish(
+                        transaction_uid=target_transaction_uid
+                    )
             except RuntimeError as e:
                 progress.update(
                     task_id=provision_cdfmc_task_id, description=f"Error:{e}"
@@ -115,11 +149,55 @@ class MspApiService:
             finally:
                 progress.stop_task(task_id=provision_cdfmc_task_id)
 
+    def get_managed_tenant_api_client(
+        self, msp_managed_tenant: MspManagedTenant, username: str
+    ) -> ApiClient:
+        """
+        Returns an API client for the managed tenant that uses the user's API token. A token from the token cache is used
+        without checking it first: if the tenant rejects it, a new token is generated and the request is sent again.
+        """
+        cached_api_token = (
+            self.token_cache_service.get_token(msp_managed_tenant.uid, username)
+            if self.token_cache_service is not None
+            else None
+        )
+        api_client = api_client_registry.get_api_client(
+            host=self.api_client.configuration.host,
+            access_token=cached_api_token
+            or self._generate_new_api_token(msp_managed_tenant, username),
+        )
+        if cached_api_token is not None:
+            api_client.refresh_access_token = lambda: self._regenerate_api_token(
+                msp_managed_tenant, username
+            )
+        return api_client
+
     def generate_managed_tenant_api_token(
         self, msp_managed_tenant: MspManagedTenant, username: str
+    ) -> str:
+        if self.token_cache_service is not None:
+            cached_api_token = self.token_cache_service.get_token(
+                msp_managed_tenant.uid, username
+            )
+            if cached_api_token is not None:
+                return cached_api_token
+        return self._generate_new_api_token(msp_managed_tenant, username)
+
+    def _regenerate_api_token(
+        self, msp_managed_tenant: MspManagedTenant, username: str
+    ) -> str:
+        # the cached token was revoked, regenerated or its user deleted after it was cached
+        self.token_cache_service.invalidate_token(msp_managed_tenant.uid, username)
+        return self._generate_new_api_token(msp_managed_tenant, username)
+
+    def _generate_new_api_token(
+        self, msp_managed_tenant: MspManagedTenant, username: str
     ) -> str:
         user_page: UserPage = self.msp_api.get_users_in_tenant_in_msp_portal(
-            msp_managed_tenant.uid, limit="1", offset="0", q=f"name:{username}"
+            msp_managed_tenant.uid,
+            limit="1",
+            offset="0",
+            q=f"name:{escape_query_value(username)}",
         )
         if len(user_page.items) != 1:
             raise RuntimeError(
@@ -133,33 +211,121 @@ class MspApiService:
             )
         )
 
+        if self.token_cache_service is not None:
+            self.token_cache_service.put_token(
+                msp_managed_tenant.uid, username, api_token_info.api_token
+            )
         return api_token_info.api_token
 
-    def create_users(
-        self, users: List[UserInput], msp_managed_tenant: MspManagedTenant
-    ) -> None:
+    def create_users_in_chunks(
+        self,
+        users: List[UserInput],
+        msp_managed_tenant: MspManagedTenant,
+        chunk_size: int = MAX_USERS_PER_REQUEST,
+        max_concurrent_chunks: int = 4,
+    ) -> List[FailedUserCreation]:
+        chunk_size = max(1, min(chunk_size, MAX_USERS_PER_REQUEST))
+        # users that exist before the run are not created by it, and are reported as failed rather than submitted
+        usernames_before = self._get_existing_usernames(msp_managed_tenant.uid, users)
+        failed_users: List[FailedUserCreation] = [
+            FailedUserCreation(user=user, reason="already exists")
+            for user in users
+            if user.username in usernames_before
+        ]
+        users = [user for user in users if user.username not in usernames_before]
+        chunks: List[List[UserInput]] = [
+            users[i : i + chunk_size] for i in range(0, len(users), chunk_size)
+        ]
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
             transient=True,
         ) as progress:
             add_users_to_tenant_task_id: TaskID = progress.add_task(
                 f"Creating {len(users)} users in tenant {msp_managed_tenant.display_name} ({msp_managed_tenant.region})...",
-                start=True,
+                total=len(users),
             )
-            transaction: CdoTransaction = (
-                self.msp_api.add_users_to_tenant_in_msp_portal(
-                    msp_managed_tenant.uid, MspAddUsersToTenantInput(**{"users": users})
-                )
+            with ThreadPoolExecutor(max_workers=max_concurrent_chunks) as executor:
+                pending: Dict[Future, List[UserInput]] = {
+                    executor.submit(
+                        self._add_users_chunk, msp_managed_tenant.uid, chunk
+                    ): chunk
+                    for chunk in chunks
+                }
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk = pending.pop(future)
+                        try:
+                            future.result()
+                            progress.advance(add_users_to_tenant_task_id, len(chunk))
+                        except (RuntimeError, ApiException) as e:
+                            # the failed transaction may have created some of the chunk's users before failing, and
+                            # resubmitting those would report them as failed
+                            try:
+                                existing_usernames = self._get_existing_usernames(
+                                    msp_managed_tenant.uid, chunk
+                                )
+                            except (RuntimeError, ApiException):
+                                # then every user of the chunk is retried
+                                existing_usernames = set()
+                            progress.advance(
+                                add_users_to_tenant_task_id, len(existing_usernames)
+                            )
+                            chunk = [
+                                user
+                                for user in chunk
+                                if user.username not in existing_usernames
+                            ]
+                            if len(chunk) == 0:
+                                continue
+                            if len(chunk) == 1:
+                                failed_users.append(
+                                    FailedUserCreation(user=chunk[0], reason=str(e))
+                                )
+                                progress.advance(add_users_to_tenant_task_id, 1)
+                                continue
+                            # split the failed chunk in half and retry each half, to isolate the bad entries
+                            middle = len(chunk) // 2
+                            for half in (chunk[:middle], chunk[middle:]):
+                                pending[
+                                    executor.submit(
+                                        self._add_users_chunk,
+                                        msp_managed_tenant.uid,
+                                        half,
+                                    )
+                                ] = half
+            progress.stop_task(task_id=add_users_to_tenant_task_id)
+
+        return failed_users
+
+    def _get_existing_usernames(
+        self, tenant_uid: str, users: List[UserInput]
+    ) -> Set[str]:
+        existing_usernames: Set[str] = set()
+        # as many names per query as users per request, to keep the query string within URL length limits
+        for start in range(0, len(users), MAX_USERS_PER_REQUEST):
+            names = [
+                escape_query_value(user.username)
+                for user in users[start : start + MAX_USERS_PER_REQUEST]
+            ]
+            user_page: UserPage = self.msp_api.get_users_in_tenant_in_msp_portal(
+                tenant_uid,
+                limit=str(len(names)),
+                offset="0",
+                q=f"name:({' OR '.join(names)})",
             )
-            try:
-                self.transaction_service.wait_for_transaction_to_finish(
-                    transaction_uid=transaction.transaction_uid
-                )
-            except RuntimeError as e:
-                progress.update(
-                    task_id=add_users_to_tenant_task_id, description=f"Error:{e}"
-                )
-                sys.exit(1)
-            finally:
-                progress.stop_task(task_id=add_users_to_tenant_task_id)
+            existing_usernames.update(user.name for user in user_page.items)
+        return existing_usernames
+
+    def _add_users_chunk(self, tenant_uid: str, users: List[UserInput]) -> None:
+        transaction: CdoTransaction = self.msp_api.add_users_to_tenant_in_msp_portal(
+            tenant_uid, MspAddUsersToTenantInput(**{"users": users})
+        )
+        self.transaction_service.wait_for_transaction_to_finish(
+            transaction_uid=transaction.transaction_uid
+        )
+        users_created.inc(amount=len(users))
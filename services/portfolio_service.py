@@ -0,0 +1,57 @@
+from typing import Any, Callable, Dict, List
+
+from cdo_sdk_python import ApiClient
+from cdo_sdk_python.models.msp_managed_tenant import MspManagedTenant
+
+from services.job_graph import JobGraph, JobResult
+from services.msp_api_service import MspApiService
+from services.token_cache_service import TokenCacheService
+
+# provision_tenant creates an API-only user named after the tenant to configure it with
+DEFAULT_API_ONLY_USER = "{tenant_name}-api-only-user"
+
+
+class PortfolioService:
+    """
+    Runs one operation against every MSP-managed tenant of the portfolio, in parallel. Each tenant gets its own API
+    client, with the API token of its API-only user (reused from the token cache when possible), and a failure in one
+    tenant does not stop the others.
+    """
+
+    def __init__(
+        self,
+        msp_api_client: ApiClient,
+        token_cache_service: TokenCacheService = None,
+        api_only_user: str = DEFAULT_API_ONLY_USER,
+    ):
+        self.msp_api_client = msp_api_client
+        self.msp_api_service = MspApiService(
+            api_client=msp_api_client, token_cache_service=token_cache_service
+        )
+        self.api_only_user = api_only_user
+
+    def get_tenants(self, q: str = None) -> List[MspManagedTenant]:
+        return self.msp_api_service.get_managed_tenants(q=q)
+
+    def connect(self, tenant: MspManagedTenant) -> ApiClient:
+        return self.msp_api_service.get_managed_tenant_api_client(
+            msp_managed_tenant=tenant,
+            username=self.api_only_user.format(tenant_name=tenant.name),
+        )
+
+    def run(
+        self,
+        tenants: List[MspManagedTenant],
+        operation: Callable[[MspManagedTenant, ApiClient], Any],
+        max_concurrent_tenants: int = 16,
+        on_finished: Callable[[JobResult], None] = None,
+    ) -> Dict[str, JobResult]:
+        graph = JobGraph()
+        for tenant in tenants:
+            graph.add(
+                tenant.name,
+                lambda tenant=tenant: operation(tenant, self.connect(tenant)),
+            )
+        return graph.run(
+            max_concurrent_jobs=max_concurrent_tenants, on_finished=on_finished
+        )
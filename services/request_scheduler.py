@@ -0,0 +1,151 @@
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, TypeVar
+from urllib.parse import urlparse
+
+from services.metrics import rate_limited_requests
+from services.tracing import tracer
+
+T = TypeVar("T")
+
+# mutating calls (creating devices, triggering upgrades...) are let through before polls and reads
+HIGH_PRIORITY = 0
+LOW_PRIORITY = 1
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class TokenBucket:
+    def __init__(self, requests_per_second: float, burst: int):
+        self.requests_per_second = requests_per_second
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.high_priority_waiters = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, priority: int) -> None:
+        with self.condition:
+            if priority == HIGH_PRIORITY:
+                self.high_priority_waiters += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    may_proceed = (
+                        priority == HIGH_PRIORITY or self.high_priority_waiters == 0
+                    )
+                    if now >= self.paused_until and self.tokens >= 1 and may_proceed:
+                        self.tokens -= 1
+                        return
+                    self.condition.wait(timeout=self._time_until_next_token(now))
+            finally:
+                if priority == HIGH_PRIORITY:
+                    self.high_priority_waiters -= 1
+                    self.condition.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        # a 429 applies to everyone talking to the host, not just the request that got it
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.condition.notify_all()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.last_refill
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.requests_per_second
+        )
+        self.last_refill = now
+
+    def _time_until_next_token(self, now: float) -> float:
+        if now < self.paused_until:
+            return self.paused_until - now
+        return max((1 - self.tokens) / self.requests_per_second, 0.01)
+
+
+class RateLimitExceededError(RuntimeError):
+    pass
+
+
+class RequestScheduler:
+    """Sends every API request through a per-host token bucket, and retries requests that get an HTTP 429."""
+
+    def __init__(
+        self,
+        requests_per_second: float = None,
+        burst: int = None,
+        max_retries: int = 6,
+        max_backoff_seconds: float = 60,
+    ):
+        self.requests_per_second = requests_per_second or float(
+            os.environ.get("SCC_REQUESTS_PER_SECOND", "10")
+        )
+        self.burst = burst or int(os.environ.get("SCC_REQUEST_BURST", "20"))
+        self.max_retries = max_retries
+        self.max_backoff_seconds = max_backoff_seconds
+        self.rate_limited_count = 0
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def execute(self, url: str, method: str, send: Callable[[], T]) -> T:
+        host = urlparse(url).netloc
+        bucket = self._get_bucket(host)
+        priority = HIGH_PRIORITY if method.upper() in MUTATING_METHODS else LOW_PRIORITY
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire(priority)
+            response = send()
+            if self._status_of(response) != 429:
+                return response
+            with self._lock:
+                self.rate_limited_count += 1
+            rate_limited_requests.inc(host)
+            span = tracer.current_span()
+            if span is not None:
+                span.retries += 1
+            bucket.pause(self._backoff_seconds(response, attempt))
+        raise RateLimitExceededError(
+            f"{method} {url} was rate limited {self.max_retries + 1} times in a row"
+        )
+
+    def _get_bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.requests_per_second, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def _backoff_seconds(self, response, attempt: int) -> float:
+        retry_after = self._header_of(response, "Retry-After")
+        if retry_after:
+            if retry_after.strip().isdigit():
+                return min(float(retry_after), self.max_backoff_seconds)
+            try:
+                retry_at = email.utils.parsedate_to_datetime(retry_after)
+                return min(
+                    max(retry_at.timestamp() - time.time(), 0),
+                    self.max_backoff_seconds,
+                )
+            except (TypeError, ValueError):
+                pass
+        # no usable Retry-After header: back off exponentially, with jitter so that threads do not retry in lockstep
+        return min(2**attempt + random.random(), self.max_backoff_seconds)
+
+    @staticmethod
+    def _status_of(response) -> int:
+        # SDK responses (cdo_sdk_python.rest.RESTResponse) have .status, requests responses have .status_code
+        status = getattr(response, "status", None)
+        return status if status is not None else response.status_code
+
+    @staticmethod
+    def _header_of(response, name: str) -> str | None:
+        if hasattr(response, "getheader"):
+            return response.getheader(name)
+        return response.headers.get(name)
+
+
+request_scheduler = RequestScheduler()
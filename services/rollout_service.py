@@ -0,0 +1,179 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from cdo_sdk_python import ApiClient, ConnectivityState
+
+from models.monitoring import ThresholdRule
+from models.rollout import RolloutBatch, RolloutDevice, RolloutResult
+from services.cli_api_service import CliApiService
+from services.connectivity_watcher import ConnectivityWatcher, state_of
+from services.fleet_monitoring_service import FleetMonitoringService, METRICS_SCRIPT
+from services.job_graph import DONE, JobGraph
+from services.tracing import tracer
+
+
+class RolloutService:
+    """
+    Upgrades devices in batches that grow geometrically from a canary batch, and checks the health of every batch
+    before starting the next one: the upgraded devices must be back ONLINE on their new version and, for ASAs, within
+    the health gates' thresholds. The rollout halts when a canary fails, or when more devices failed than allowed.
+    """
+
+    def __init__(
+        self,
+        api_client: ApiClient,
+        upgrade: Callable[[RolloutDevice], None],
+        canary_size: int = 1,
+        growth_factor: float = 2,
+        max_batch_size: int = 50,
+        max_failed_devices: int = 0,
+        health_gates: List[ThresholdRule] = None,
+        recovery_timeout_seconds: float = 1800,
+        soak_seconds: float = 0,
+        poll_interval_seconds: float = 15,
+    ):
+        self.api_client = api_client
+        self.cli_api_service = CliApiService(api_client)
+        self.upgrade = upgrade
+        self.canary_size = canary_size
+        self.growth_factor = growth_factor
+        self.max_batch_size = max_batch_size
+        self.max_failed_devices = max_failed_devices
+        self.health_gates = health_gates or []
+        self.recovery_timeout_seconds = recovery_timeout_seconds
+        self.soak_seconds = soak_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+
+    def plan_batches(self, devices: List[RolloutDevice]) -> List[List[RolloutDevice]]:
+        batches: List[List[RolloutDevice]] = []
+        batch_size = float(self.canary_size)
+        start = 0
+        while start < len(devices):
+            size = max(1, min(int(batch_size), self.max_batch_size))
+            batches.append(devices[start : start + size])
+            start += size
+            batch_size *= self.growth_factor
+        return batches
+
+    def run(
+        self,
+        devices: List[RolloutDevice],
+        on_batch_started: Callable[[RolloutBatch], None] = None,
+        on_batch_finished: Callable[[RolloutBatch], None] = None,
+    ) -> RolloutResult:
+        result = RolloutResult()
+        planned_batches = self.plan_batches(devices)
+        for number, batch_devices in enumerate(planned_batches, start=1):
+            batch = RolloutBatch(number=number, devices=batch_devices)
+            if on_batch_started is not None:
+                on_batch_started(batch)
+            started_at = time.monotonic()
+            with tracer.span("rollout.batch", batch=number, devices=len(batch_devices)):
+                self._run_batch(batch)
+            batch.duration_seconds = time.monotonic() - started_at
+            result.batches.append(batch)
+            if on_batch_finished is not None:
+                on_batch_finished(batch)
+
+            result.halted_reason = self._halted_reason(batch, result)
+            if result.halted_reason is not None:
+                result.not_started = [
+                    device
+                    for remaining in planned_batches[number:]
+                    for device in remaining
+                ]
+                break
+        return result
+
+    def _halted_reason(
+        self, batch: RolloutBatch, result: RolloutResult
+    ) -> Optional[str]:
+        if batch.is_canary and batch.failures:
+            return f"{len(batch.failures)} of the {len(batch.devices)} canary devices failed"
+        if len(result.failures) > self.max_failed_devices:
+            return f"{len(result.failures)} devices failed, more than the {self.max_failed_devices} allowed"
+        return None
+
+    def _run_batch(self, batch: RolloutBatch) -> None:
+        devices_by_uid = {device.uid: device for device in batch.devices}
+        graph = JobGraph()
+        for device in batch.devices:
+            graph.add(device.uid, lambda device=device: self.upgrade(device))
+        # the batch is already sized for what the fleet can take at once
+        for uid, job_result in graph.run(
+            max_concurrent_jobs=len(batch.devices)
+        ).items():
+            if job_result.status != DONE:
+                batch.failures[uid] = f"upgrade failed: {job_result.error}"
+
+        upgraded = [
+            device
+            for uid, device in devices_by_uid.items()
+            if uid not in batch.failures
+        ]
+        batch.failures.update(self._wait_until_recovered(upgraded))
+        if self.health_gates:
+            if self.soak_seconds > 0:
+                time.sleep(self.soak_seconds)
+            batch.failures.update(
+                self._check_health_gates(
+                    [device for device in upgraded if device.uid not in batch.failures]
+                )
+            )
+
+    def _wait_until_recovered(self, devices: List[RolloutDevice]) -> Dict[str, str]:
+        if len(devices) == 0:
+            return {}
+        expected_versions = {device.uid: device.software_version for device in devices}
+        watcher = ConnectivityWatcher(
+            self.api_client, max_interval_seconds=self.poll_interval_seconds
+        )
+        watcher.watch(expected_versions)
+        with tracer.span("rollout.recovery", devices=len(devices)):
+            unsettled = watcher.wait_until(
+                lambda device: device.connectivity_state == ConnectivityState.ONLINE
+                and device.software_version == expected_versions[device.uid],
+                timeout_seconds=self.recovery_timeout_seconds,
+            )
+
+        return {
+            uid: (
+                "no longer in the inventory"
+                if device is None
+                else f"not back ONLINE on {expected_versions[uid]} within {self.recovery_timeout_seconds:g}s "
+                f"(state: {state_of(device)}, version: {device.software_version})"
+            )
+            for uid, device in unsettled.items()
+        }
+
+    def _check_health_gates(self, devices: List[RolloutDevice]) -> Dict[str, str]:
+        if len(devices) == 0:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=len(devices), thread_name_prefix="rollout-health"
+        ) as executor:
+            reasons = list(executor.map(self._check_device_health, devices))
+        return {
+            device.uid: reason
+            for device, reason in zip(devices, reasons)
+            if reason is not None
+        }
+
+    def _check_device_health(self, device: RolloutDevice) -> Optional[str]:
+        try:
+            cli_result = self.cli_api_service.run_command([device.uid], METRICS_SCRIPT)
+        except Exception as e:
+            return f"health check failed: {e}"
+        if cli_result.error_msg is not None:
+            return f"health check failed: {cli_result.error_msg}"
+        samples = FleetMonitoringService.parse_metrics(
+            device.uid, cli_result.result or "", time.time()
+        )
+        breaches = [
+            f"{rule} (was {sample.value:g})"
+            for sample in samples
+            for rule in self.health_gates
+            if rule.is_breached_by(sample)
+        ]
+        return f"health gate breached: {', '.join(breaches)}" if breaches else None
@@ -1,26 +1,35 @@
 # services/scc_credentials_service.py
+import hashlib
 import os
-import yaml
+import time
+
 from services.token_validation_service import TokenValidationService
-from utils.interactive_cli import get_region_and_api_token
+from utils.batch_mode import batch_mode
 from utils.region_mapping import get_scc_url
 
+LAST_VALIDATED_AT_KEY = "scc.api-token-last-validated-at"
+LAST_VALIDATED_TOKEN_KEY = "scc.api-token-last-validated-sha256"
+
 
 class SccCredentialsService:
     def __init__(
-        self, config_file_path="~/.cisco-security.yaml", region=None, api_token=None
+        self,
+        config_file_path="~/.cisco-security.yaml",
+        region=None,
+        api_token=None,
+        max_validation_age_seconds=24 * 60 * 60,
     ):
         self.config_file_path = os.path.expanduser(config_file_path)
         self.region = region
         self.api_token = api_token
         self.base_url = None
+        # how long a successful validation against SCC is trusted before the token is checked remotely again; 0 always checks remotely
+        self.max_validation_age_seconds = max_validation_age_seconds
 
     def load_or_prompt_credentials(self):
         if self.region and self.api_token:
             self.map_region_to_base_url()
-            if not TokenValidationService(
-                self.base_url, self.api_token
-            ).validate_token():
+            if not self.is_token_valid():
                 raise ValueError("The provided API token is invalid.")
         else:
             if not os.path.exists(self.config_file_path):
@@ -28,24 +37,37 @@ class SccCredentialsService:
             else:
                 self.load_credentials()
 
-            if not TokenValidationService(
-                self.base_url, self.api_token
-            ).validate_token():
+            if not self.is_token_valid():
                 print(
                     "The API token in ~/.cisco-security.yaml is invalid. Please re-enter your credentials."
                 )
                 self.prompt_and_save_credentials()
 
+    def is_token_valid(self):
+        token_validation_service = TokenValidationService(self.base_url, self.api_token)
+        if not token_validation_service.validate_token_locally():
+            return False
+        if self._was_validated_recently():
+            return True
+        if not token_validation_service.validate_token():
+            return False
+        self._record_validation()
+        return True
+
     def prompt_and_save_credentials(self):
+        # questionary is only needed when prompting, so it is not imported for non-interactive runs
+        batch_mode.ensure_can_prompt(
+            "A valid API token (--region and --api-token, or ~/.cisco-security.yaml)"
+        )
+        from utils.interactive_cli import get_region_and_api_token
+
         self.region, self.api_token = get_region_and_api_token()
         config = {"scc.region": self.region, "scc.api-token": self.api_token}
-        with open(self.config_file_path, "w") as file:
-            yaml.safe_dump(config, file)
+        self._write_config(config)
         self.map_region_to_base_url()
 
     def load_credentials(self):
-        with open(self.config_file_path, "r") as file:
-            config = yaml.safe_load(file)
+        config = self._read_config()
         self.region = config.get("scc.region")
         self.api_token = config.get("scc.api-token")
         if not self.region or not self.api_token:
@@ -61,3 +83,40 @@ class SccCredentialsService:
 
     def get_credentials(self):
         return self.api_token, self.base_url
+
+    def _was_validated_recently(self):
+        if self.max_validation_age_seconds <= 0:
+            return False
+        config = self._read_config()
+        last_validated_at = config.get(LAST_VALIDATED_AT_KEY)
+        return (
+            config.get(LAST_VALIDATED_TOKEN_KEY) == self._api_token_digest()
+            and last_validated_at is not None
+            and time.time() - last_validated_at < self.max_validation_age_seconds
+        )
+
+    def _record_validation(self):
+        # the record lives alongside the saved credentials, so tokens passed on the command line are only recorded if the file exists
+        if not os.path.exists(self.config_file_path):
+            return
+        config = self._read_config()
+        config[LAST_VALIDATED_AT_KEY] = int(time.time())
+        config[LAST_VALIDATED_TOKEN_KEY] = self._api_token_digest()
+        self._write_config(config)
+
+    def _api_token_digest(self):
+        return hashlib.sha256(self.api_token.encode("utf-8")).hexdigest()
+
+    def _read_config(self):
+        import yaml
+
+        if not os.path.exists(self.config_file_path):
+            return {}
+        with open(self.config_file_path, "r") as file:
+            return yaml.safe_load(file) or {}
+
+    def _write_config(self, config):
+        import yaml
+
+        with open(self.config_file_path, "w") as file:
+            yaml.safe_dump(config, file)
@@ -3,6 +3,8 @@ import os
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
+from services.tracing import tracer
+
 
 class SshService:
     @staticmethod
@@ -44,15 +46,18 @@ class SshService:
                     f"Executing command on {address}...", start=True
                 )
 
-                process = subprocess.Popen(
-                    ssh_command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    shell=True,
-                )
+                with tracer.span("ssh.command", device=address) as span:
+                    process = subprocess.Popen(
+                        ssh_command,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                        shell=True,
+                    )
 
-                stdout, stderr = process.communicate()
+                    stdout, stderr = process.communicate()
+                    if span is not None:
+                        span.attributes["return_code"] = process.returncode
 
                 progress.update(task_id, description=f"Command executed on {address}")
                 progress.stop_task(task_id)
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from typing import Optional, Dict
+
+import jwt
+import yaml
+
+
+class TokenCacheService:
+    def __init__(
+        self,
+        cache_file_path: str = "~/.cisco-security-token-cache.yaml",
+        expiry_margin_seconds: int = 300,
+    ):
+        self.cache_file_path = os.path.expanduser(cache_file_path)
+        self.expiry_margin_seconds = expiry_margin_seconds
+        self._lock = threading.Lock()
+
+    def get_token(self, tenant_uid: str, username: str) -> Optional[str]:
+        with self._lock:
+            api_token = self._load().get(self._key(tenant_uid, username))
+        if api_token is None or not self.is_token_usable(api_token):
+            return None
+        return api_token
+
+    def put_token(self, tenant_uid: str, username: str, api_token: str) -> None:
+        with self._lock:
+            tokens = self._load()
+            tokens[self._key(tenant_uid, username)] = api_token
+            # drop tokens that have expired since they were cached
+            tokens = {
+                key: token
+                for key, token in tokens.items()
+                if self.is_token_usable(token)
+            }
+            self._save(tokens)
+
+    def invalidate_token(self, tenant_uid: str, username: str) -> None:
+        with self._lock:
+            tokens = self._load()
+            if tokens.pop(self._key(tenant_uid, username), None) is not None:
+                self._save(tokens)
+
+    def is_token_usable(self, api_token: str) -> bool:
+        try:
+            claims = jwt.decode(api_token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return False
+        # SCC API-only user tokens do not expire unless revoked, so tokens without an exp claim are reused
+        expires_at = claims.get("exp")
+        return (
+            expires_at is None or expires_at - self.expiry_margin_seconds > time.time()
+        )
+
+    @staticmethod
+    def _key(tenant_uid: str, username: str) -> str:
+        return f"{tenant_uid}/{username}"
+
+    def _load(self) -> Dict[str, str]:
+        if not os.path.exists(self.cache_file_path):
+            return {}
+        with open(self.cache_file_path, "r") as file:
+            return yaml.safe_load(file) or {}
+
+    def _save(self, tokens: Dict[str, str]) -> None:
+        # write to a temporary file readable only by the current user, then atomically swap it in
+        tmp_file_path = f"{self.cache_file_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as file:
+            yaml.safe_dump(tokens, file)
+        os.replace(tmp_file_path, self.cache_file_path)
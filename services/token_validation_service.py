@@ -1,4 +1,6 @@
-from cdo_sdk_python import Configuration, UsersApi, ApiClient, ApiException
+import time
+
+import jwt
 
 
 class TokenValidationService:
@@ -7,11 +9,25 @@ class TokenValidationService:
         self.api_token = api_token
 
     def validate_token(self):
-        configuration = Configuration(host=self.base_url, access_token=self.api_token)
-        with ApiClient(configuration) as api_client:
-            api_instance = UsersApi(api_client)
-            try:
-                api_instance.get_token()
-            except ApiException as e:
-                return False
+        from cdo_sdk_python import UsersApi, ApiException
+
+        from services.api_client_registry import api_client_registry
+
+        api_client = api_client_registry.get_api_client(
+            host=self.base_url, access_token=self.api_token
+        )
+        api_instance = UsersApi(api_client)
+        try:
+            api_instance.get_token()
+        except ApiException as e:
+            return False
         return True
+
+    def validate_token_locally(self):
+        # checks the structure and expiry of the JWT without a round trip to SCC; the signature cannot be checked locally
+        try:
+            claims = jwt.decode(self.api_token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return False
+        expires_at = claims.get("exp")
+        return expires_at is None or expires_at > time.time()
@@ -0,0 +1,176 @@
+import atexit
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+_UUID = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+)
+_DEVICE_IN_PATH = re.compile(rf"/(?:devices|ftds|asas)/({_UUID.pattern})")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    name: str
+    start_time: float
+    thread_id: int
+    duration_seconds: float = None
+    tenant: str = None
+    device: str = None
+    http_status: int = None
+    retries: int = 0
+    error: str = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Records a timing span for API calls, transaction waits and SSH commands when SCC_TRACE_FILE is set, and appends
+    them to that file every thousand spans and when the process exits, so long runs do not hold their whole trace in
+    memory: as a Chrome trace (chrome://tracing, Perfetto) if the file name ends in .json, as JSON lines otherwise.
+    """
+
+    def __init__(self, trace_file_path: str = None, flush_every_spans: int = 1000):
+        self.trace_file_path = trace_file_path or os.environ.get("SCC_TRACE_FILE")
+        self.flush_every_spans = flush_every_spans
+        self._lock = threading.Lock()
+        # the finished spans not yet written to the trace file
+        self._pending_spans: List[Span] = []
+        self._spans_written = 0
+        self._closed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.trace_file_path is not None
+
+    @contextmanager
+    def span(
+        self, name: str, tenant: str = None, device: str = None, **attributes: Any
+    ) -> Iterator[Optional[Span]]:
+        """Times the block; nested spans inherit the tenant and device of the span they run in."""
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            start_time=time.time(),
+            thread_id=threading.get_ident(),
+            tenant=tenant or (parent.tenant if parent else None),
+            device=device or (parent.device if parent else None),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        started_at = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_seconds = time.perf_counter() - started_at
+            _current_span.reset(token)
+            with self._lock:
+                self._pending_spans.append(span)
+                if len(self._pending_spans) >= self.flush_every_spans:
+                    self._write_pending_spans()
+
+    @contextmanager
+    def http_span(
+        self, method: str, url: str, authorization: str = None
+    ) -> Iterator[Optional[Span]]:
+        if not self.enabled:
+            yield None
+            return
+        device_match = _DEVICE_IN_PATH.search(url)
+        with self.span(
+            endpoint_of(method, url),
+            tenant=tenant_of_authorization(authorization),
+            device=device_match.group(1) if device_match else None,
+        ) as span:
+            yield span
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    def close(self) -> None:
+        """Writes the remaining spans, and ends the Chrome trace; spans finished afterwards are not recorded."""
+        with self._lock:
+            self._write_pending_spans()
+            if self._spans_written > 0 and self.trace_file_path.endswith(".json"):
+                with open(self.trace_file_path, "a") as file:
+                    file.write("\n]\n")
+            self._closed = True
+
+    def _write_pending_spans(self) -> None:
+        # called with the lock held; the first write replaces the trace of a previous run
+        spans, self._pending_spans = self._pending_spans, []
+        if len(spans) == 0 or self._closed:
+            return
+        is_chrome_trace = self.trace_file_path.endswith(".json")
+        with open(self.trace_file_path, "a" if self._spans_written else "w") as file:
+            for span in spans:
+                if is_chrome_trace:
+                    # the JSON array trace format, which trace viewers read even without its closing bracket
+                    file.write(",\n" if self._spans_written else "[\n")
+                    file.write(json.dumps(self._to_chrome_trace_event(span)))
+                else:
+                    file.write(json.dumps(asdict(span), default=str) + "\n")
+                self._spans_written += 1
+
+    @staticmethod
+    def _to_chrome_trace_event(span: Span) -> Dict:
+        return {
+            "name": span.name,
+            "cat": span.name.split(" ")[0],
+            "ph": "X",
+            "ts": span.start_time * 1_000_000,
+            "dur": span.duration_seconds * 1_000_000,
+            "pid": os.getpid(),
+            "tid": span.thread_id,
+            "args": {
+                key: value
+                for key, value in asdict(span).items()
+                if key not in ("name", "start_time", "duration_seconds", "thread_id")
+                and value not in (None, {})
+            },
+        }
+
+
+def endpoint_of(method: str, url: str) -> str:
+    """Names the endpoint of a request, with UIDs replaced so that all calls to an endpoint share one name."""
+    path = url.split("://", 1)[-1].split("/", 1)[-1].split("?")[0]
+    return f"{method.upper()} /{_UUID.sub('{uid}', path)}"
+
+
+@functools.lru_cache(maxsize=64)
+def tenant_of_authorization(authorization: Optional[str]) -> Optional[str]:
+    """Returns the tenant UID (the parentId claim) of a Bearer token, without verifying it."""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    import jwt
+
+    try:
+        claims = jwt.decode(
+            authorization[len("Bearer ") :], options={"verify_signature": False}
+        )
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get("parentId")
+
+
+tracer = Tracer()
+if tracer.enabled:
+    atexit.register(tracer.close)
@@ -1,27 +1,61 @@
-import time
+from typing import Callable, Iterator, List, TYPE_CHECKING
 
 from cdo_sdk_python import TransactionsApi, CdoTransaction
 
+from services.tracing import tracer
+from services.transaction_watcher import transaction_watcher
+
+if TYPE_CHECKING:
+    from rich.progress import Progress, TaskID
+
+
+def show_transaction_status(
+    progress: "Progress", task_id: "TaskID", description: str
+) -> Callable[[CdoTransaction], None]:
+    # on_update callback that appends the transaction's current status to a progress spinner
+    return lambda transaction: progress.update(
+        task_id=task_id,
+        description=f"{description} ({transaction.cdo_transaction_status})",
+    )
+
 
 class TransactionService:
     def __init__(self, api_client):
+        self.api_client = api_client
         self.transactions_api: TransactionsApi = TransactionsApi(api_client)
 
     def wait_for_transaction_to_finish(
-        self, transaction_uid: str, time_to_wait_between_retries_seconds: int = 5
+        self,
+        transaction_uid: str,
+        time_to_wait_between_retries_seconds: int = 5,
+        on_update: Callable[[CdoTransaction], None] = None,
     ) -> CdoTransaction:
-        transaction: CdoTransaction = self.transactions_api.get_transaction(
-            transaction_uid
-        )
-        while transaction.cdo_transaction_status not in [
-            "DONE",
-            "ERROR",
-        ]:
-            time.sleep(time_to_wait_between_retries_seconds)
-            transaction = self.transactions_api.get_transaction(transaction_uid)
+        with tracer.span("transaction.wait", transaction_uid=transaction_uid) as span:
+            transaction: CdoTransaction = transaction_watcher.watch(
+                self.api_client,
+                transaction_uid,
+                on_update=on_update,
+                poll_interval_seconds=time_to_wait_between_retries_seconds,
+            ).result()
+            if span is not None:
+                span.attributes["transaction_type"] = transaction.transaction_type
+                span.attributes["status"] = transaction.cdo_transaction_status
 
         if transaction.cdo_transaction_status == "ERROR":
             raise RuntimeError(
                 f"Transaction {transaction_uid} failed: {transaction.transaction_details}"
             )
         return transaction
+
+    def wait_for_transactions_to_finish(
+        self,
+        transaction_uids: List[str],
+        time_to_wait_between_retries_seconds: int = 5,
+    ) -> Iterator[CdoTransaction]:
+        # yields transactions as they finish, including failed ones; callers decide how to handle an ERROR status
+        for transaction in transaction_watcher.as_completed(
+            self.api_client,
+            transaction_uids,
+            poll_interval_seconds=time_to_wait_between_retries_seconds,
+        ):
+            yield transaction
@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from cdo_sdk_python import ApiClient, CdoTransaction, TransactionsApi
+
+from services.metrics import (
+    record_transaction_finished,
+    record_transaction_started,
+    transaction_polls,
+)
+
+FINISHED_STATUSES = ["DONE", "ERROR"]
+
+
+@dataclass
+class _WatchedTransaction:
+    api_client: ApiClient
+    transaction_uid: str
+    poll_interval_seconds: float
+    next_poll_at: float
+    future: Future = field(default_factory=Future)
+    last_status: str = None
+    subscribers: List[Callable[[CdoTransaction], None]] = field(default_factory=list)
+
+
+class TransactionWatcher:
+    """
+    Tracks the status of outstanding transactions from a single background thread. Transactions that are due are
+    polled together in one round, and every caller waiting on the same transaction shares one poll.
+    """
+
+    def __init__(self, max_concurrent_polls: int = 8):
+        self.max_concurrent_polls = max_concurrent_polls
+        self._condition = threading.Condition()
+        self._watched: Dict[Tuple[int, str], _WatchedTransaction] = {}
+        self._poller: threading.Thread = None
+        self._executor: ThreadPoolExecutor = None
+
+    def watch(
+        self,
+        api_client: ApiClient,
+        transaction_uid: str,
+        on_update: Callable[[CdoTransaction], None] = None,
+        poll_interval_seconds: float = 5,
+    ) -> "Future[CdoTransaction]":
+        """Returns a future that resolves to the transaction once it is DONE or ERROR. on_update is called on every status change."""
+        with self._condition:
+            key = (id(api_client), transaction_uid)
+            watched = self._watched.get(key)
+            if watched is None:
+                watched = _WatchedTransaction(
+                    api_client=api_client,
+                    transaction_uid=transaction_uid,
+                    poll_interval_seconds=poll_interval_seconds,
+                    # poll straight away, the transaction may already have finished
+                    next_poll_at=time.monotonic(),
+                )
+                self._watched[key] = watched
+            else:
+                watched.poll_interval_seconds = min(
+                    watched.poll_interval_seconds, poll_interval_seconds
+                )
+            if on_update is not None:
+                watched.subscribers.append(on_update)
+            self._ensure_poller_started()
+            self._condition.notify_all()
+            return watched.future
+
+    def as_completed(
+        self,
+        api_client: ApiClient,
+        transaction_uids: List[str],
+        poll_interval_seconds: float = 5,
+    ) -> Iterator[CdoTransaction]:
+        """Yields each transaction as soon as it finishes, in completion order."""
+        futures = [
+            self.watch(
+                api_client, transaction_uid, poll_interval_seconds=poll_interval_seconds
+            )
+            for transaction_uid in transaction_uids
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def _ensure_poller_started(self) -> None:
+        if self._poller is None or not self._poller.is_alive():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrent_polls,
+                thread_name_prefix="transaction-poll",
+            )
+            self._poller = threading.Thread(
+                target=self._run, name="transaction-watcher", daemon=True
+            )
+            self._poller.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if len(self._watched) == 0:
+                    # exit when idle; the next watch() starts a new poller
+                    self._poller = None
+                    self._executor.shutdown(wait=False)
+                    return
+                now = time.monotonic()
+                due = [w for w in self._watched.values() if w.next_poll_at <= now]
+                if len(due) == 0:
+                    self._condition.wait(
+                        timeout=min(w.next_poll_at for w in self._watched.values())
+                        - now
+                    )
+                    continue
+
+            for watched, result in zip(due, self._executor.map(self._poll_safely, due)):
+                try:
+                    self._handle_poll_result(watched, result)
+                except Exception as e:
+                    # a failing subscriber must not stop the poller for every other transaction
+                    with self._condition:
+                        self._watched.pop(
+                            (id(watched.api_client), watched.transaction_uid), None
+                        )
+                    if not watched.future.done():
+                        watched.future.set_exception(e)
+
+    @staticmethod
+    def _poll_safely(watched: _WatchedTransaction):
+        transaction_polls.inc()
+        try:
+            return TransactionsApi(watched.api_client).get_transaction(
+                watched.transaction_uid
+            )
+        except Exception as e:
+            return e
+
+    def _handle_poll_result(self, watched: _WatchedTransaction, result) -> None:
+        key = (id(watched.api_client), watched.transaction_uid)
+        if isinstance(result, Exception):
+            with self._condition:
+                self._watched.pop(key, None)
+            watched.future.set_exception(result)
+            return
+
+        transaction: CdoTransaction = result
+        if watched.last_status is None:
+            # every transaction is watched from when it is started, so its first poll counts it as started
+            record_transaction_started(transaction)
+        if transaction.cdo_transaction_status != watched.last_status:
+            watched.last_status = transaction.cdo_transaction_status
+            for subscriber in list(watched.subscribers):
+                subscriber(transaction)
+
+        with self._condition:
+            if transaction.cdo_transaction_status in FINISHED_STATUSES:
+                self._watched.pop(key, None)
+            else:
+                watched.next_poll_at = time.monotonic() + watched.poll_interval_seconds
+                return
+        # counted here, once per transaction, however many callers are waiting on it
+        record_transaction_finished(transaction)
+        watched.future.set_result(transaction)
+
+
+transaction_watcher = TransactionWatcher()
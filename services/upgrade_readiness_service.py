@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from cdo_sdk_python import ApiClient, ApiException, Device
+
+from models.upgrade_readiness import (
+    ALREADY_ON_TARGET,
+    BLOCKED,
+    DeviceReadiness,
+    ELIGIBLE,
+    ELIGIBLE_VIA_INTERMEDIATE,
+    UNKNOWN,
+    version_key,
+)
+from services.device_upgrade_api_service import DeviceUpgradeApiService
+from services.inventory_api_service import InventoryApiService
+from services.tracing import tracer
+
+DEVICE_QUERIES = {
+    "ftd": "deviceType:CDFMC_MANAGED_FTD",
+    "asa": "deviceType:ASA",
+}
+
+# devices of the same model on the same version can be upgraded to the same versions
+_DeviceGroup = Tuple[Optional[str], Optional[str]]
+
+
+class UpgradeReadinessService:
+    """
+    Works out which devices can be upgraded to target versions, from one inventory query and one compatible versions
+    lookup per distinct model and version. A device that cannot reach a target directly is eligible through an
+    intermediate version when devices of its model on that version can reach the target.
+    """
+
+    def __init__(self, api_client: ApiClient, max_concurrent_lookups: int = 8):
+        self.inventory_api_service = InventoryApiService(api_client)
+        self.device_upgrade_api_service = DeviceUpgradeApiService(api_client)
+        self.max_concurrent_lookups = max_concurrent_lookups
+        # the FTD upgrade packages found by the lookups, by model, current version and target version
+        self.upgrade_package_uids: Dict[_DeviceGroup, Dict[str, str]] = {}
+
+    def assess(
+        self, device_type: str, target_versions: List[str], q: str = None
+    ) -> List[DeviceReadiness]:
+        query = DEVICE_QUERIES[device_type]
+        if q:
+            query = f"{query} AND {q}"
+        devices = self.inventory_api_service.get_devices(q=query)
+
+        representatives: Dict[_DeviceGroup, Device] = {}
+        for device in devices:
+            representatives.setdefault(
+                (device.hardware_model, device.software_version), device
+            )
+        with tracer.span(
+            "upgrade_readiness.lookups", groups=len(representatives)
+        ), ThreadPoolExecutor(max_workers=self.max_concurrent_lookups) as executor:
+            compatible_versions: Dict[_DeviceGroup, Optional[List[str]]] = dict(
+                zip(
+                    representatives,
+                    executor.map(
+                        lambda device: self._get_compatible_versions(
+                            device_type, device
+                        ),
+                        representatives.values(),
+                    ),
+                )
+            )
+
+        return [
+            self._assess_device(device, target_version, compatible_versions)
+            for target_version in target_versions
+            for device in devices
+        ]
+
+    def _get_compatible_versions(
+        self, device_type: str, device: Device
+    ) -> Optional[List[str]]:
+        try:
+            versions = (
+                self.device_upgrade_api_service.get_compatible_ftd_versions(device.uid)
+                if device_type == "ftd"
+                else self.device_upgrade_api_service.get_compatible_asa_versions(
+                    device.uid
+                )
+            )
+        except (ApiException, RuntimeError):
+            # reported as UNKNOWN for the devices of the group, instead of failing the whole report; RuntimeError
+            # covers the scheduler's RateLimitExceededError
+            return None
+        if device_type == "ftd":
+            self.upgrade_package_uids[
+                (device.hardware_model, device.software_version)
+            ] = {
+                version.software_version: version.upgrade_package_uid
+                for version in versions
+            }
+        return sorted(
+            {version.software_version for version in versions}, key=version_key
+        )
+
+    def get_upgrade_package_uid(
+        self, readiness: DeviceReadiness, software_version: str
+    ) -> Optional[str]:
+        return self.upgrade_package_uids.get(
+            (readiness.hardware_model, readiness.software_version), {}
+        ).get(software_version)
+
+    @staticmethod
+    def _assess_device(
+        device: Device,
+        target_version: str,
+        compatible_versions: Dict[_DeviceGroup, Optional[List[str]]],
+    ) -> DeviceReadiness:
+        readiness = DeviceReadiness(
+            uid=device.uid,
+            name=device.name,
+            hardware_model=device.hardware_model,
+            software_version=device.software_version,
+            target_version=target_version,
+            status=BLOCKED,
+        )
+        if device.software_version == target_version:
+            readiness.status = ALREADY_ON_TARGET
+            return readiness
+        versions = compatible_versions[(device.hardware_model, device.software_version)]
+        if versions is None:
+            readiness.status = UNKNOWN
+            return readiness
+        readiness.highest_reachable_version = versions[-1] if versions else None
+        if target_version in versions:
+            readiness.status = ELIGIBLE
+            readiness.upgrade_path = [target_version]
+            return readiness
+        # the latest intermediate version from which devices of the same model are known to reach the target
+        for intermediate_version in reversed(versions):
+            if target_version in (
+                compatible_versions.get((device.hardware_model, intermediate_version))
+                or []
+            ):
+                readiness.status = ELIGIBLE_VIA_INTERMEDIATE
+                readiness.upgrade_path = [intermediate_version, target_version]
+                break
+        return readiness
@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from cdo_sdk_python import ApiClient, CdoTransaction
+
+from models.upgrade_readiness import ELIGIBLE, ELIGIBLE_VIA_INTERMEDIATE
+from models.upgrade_wave import UpgradeWave, WaveEntry
+from services.device_upgrade_api_service import DeviceUpgradeApiService
+from services.inventory_api_service import InventoryApiService
+from services.job_graph import JobGraph, JobResult
+from services.transaction_service import TransactionService
+from services.upgrade_readiness_service import UpgradeReadinessService
+
+
+class UpgradeWaveService:
+    """
+    Plans FTD upgrades ahead of a maintenance window, and runs them in the window: as many at a time as the transfer
+    limit allows, with every transaction tracked by the shared transaction watcher.
+    """
+
+    def __init__(self, api_client: ApiClient):
+        self.api_client = api_client
+        self.device_upgrade_api_service = DeviceUpgradeApiService(api_client)
+        self.transaction_service = TransactionService(api_client)
+
+    def plan(
+        self, target_version: str, q: str = None, max_devices: int = None
+    ) -> UpgradeWave:
+        readiness_service = UpgradeReadinessService(self.api_client)
+        wave = UpgradeWave(
+            target_version=target_version,
+            planned_at=datetime.now(timezone.utc).isoformat(),
+        )
+        for readiness in readiness_service.assess("ftd", [target_version], q=q):
+            if readiness.status not in (ELIGIBLE, ELIGIBLE_VIA_INTERMEDIATE):
+                continue
+            next_version = readiness.upgrade_path[0]
+            wave.entries.append(
+                WaveEntry(
+                    device_uid=readiness.uid,
+                    device_name=readiness.name,
+                    current_version=readiness.software_version,
+                    software_version=next_version,
+                    upgrade_package_uid=readiness_service.get_upgrade_package_uid(
+                        readiness, next_version
+                    ),
+                )
+            )
+            if max_devices is not None and len(wave.entries) >= max_devices:
+                break
+        return wave
+
+    def pending_entries(self, wave: UpgradeWave) -> List[WaveEntry]:
+        # one inventory query, so that a wave run again after an interruption skips the devices already upgraded
+        software_versions: Dict[str, str] = {
+            device.uid: device.software_version
+            for device in InventoryApiService(self.api_client).get_devices(
+                q="deviceType:CDFMC_MANAGED_FTD"
+            )
+        }
+        return [
+            entry
+            for entry in wave.entries
+            if software_versions.get(entry.device_uid) == entry.current_version
+        ]
+
+    def run(
+        self,
+        entries: List[WaveEntry],
+        max_concurrent_transfers: int = 10,
+        on_finished: Callable[[JobResult], None] = None,
+    ) -> Dict[str, JobResult]:
+        # an upgrade holds its transfer slot until its transaction finishes, as the API does not report when the
+        # package has been transferred
+        graph = JobGraph()
+        for entry in entries:
+            graph.add(
+                f"{entry.device_name} ({entry.device_uid})",
+                lambda entry=entry: self.upgrade(entry),
+            )
+        return graph.run(
+            max_concurrent_jobs=max_concurrent_transfers, on_finished=on_finished
+        )
+
+    def upgrade(self, entry: WaveEntry) -> str:
+        transaction: CdoTransaction = self.device_upgrade_api_service.start_ftd_upgrade(
+            entry.device_uid, entry.upgrade_package_uid
+        )
+        self.transaction_service.wait_for_transaction_to_finish(
+            transaction_uid=transaction.transaction_uid
+        )
+        return f"Upgraded from {entry.current_version} to {entry.software_version}"
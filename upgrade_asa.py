@@ -1,38 +1,44 @@
-from typing import List
+from typing import Any, List, TYPE_CHECKING
 
 import click
-import questionary
-from cdo_sdk_python import (
-    ApiClient,
-    Configuration,
-    Device,
-    AsaCompatibleVersion,
-    UpgradeAsaDeviceInput,
-)
 from click_option_group import AllOptionGroup, optgroup
-from rich.console import Console
 
-from services.device_upgrade_api_service import DeviceUpgradeApiService
-from services.inventory_api_service import InventoryApiService
-from services.scc_credentials_service import SccCredentialsService
+from utils.batch_mode import batch_mode, batch_option
+from utils.cli_context import (
+    store_credential_options,
+    get_api_client,
+    get_daemon_client,
+)
 from utils.region_mapping import supported_regions
 
+if TYPE_CHECKING:
+    from cdo_sdk_python import ApiClient, UpgradeAsaDeviceInput
 
-def select_asa(api_client: ApiClient) -> str:
-    inventory_api_service = InventoryApiService(api_client)
-    devices: List[Device] = inventory_api_service.get_devices(
-        q="deviceType:ASA AND connectivityState:ONLINE"
-    )
-    device_names = [f"{device.name} ({device.software_version})" for device in devices]
-    selected_device = questionary.select("Select a device:", choices=device_names).ask()
-    return next(
-        device.uid
-        for device in devices
-        if device.name == selected_device.split(" (")[0]
+
+def select_asa(device_source: Any, device_name: str = None) -> str:
+    from utils.device_picker import DevicePicker
+
+    picker = DevicePicker(
+        device_source,
+        base_query="deviceType:ASA AND connectivityState:ONLINE",
+        device_kind="ASA",
     )
+    if device_name is not None:
+        return picker.resolve(device_name)
+    batch_mode.ensure_can_prompt("--asa-uid or --device-name")
+    return picker.pick("Select a device:")
 
 
-def select_asa_version(asa_uid: str, api_client: ApiClient) -> UpgradeAsaDeviceInput:
+def select_asa_version(
+    asa_uid: str, api_client: "ApiClient"
+) -> "UpgradeAsaDeviceInput":
+    import questionary
+    from cdo_sdk_python import AsaCompatibleVersion, UpgradeAsaDeviceInput
+
+    from services.device_upgrade_api_service import DeviceUpgradeApiService
+
+    batch_mode.ensure_can_prompt("--software-version or --asdm-version")
+
     device_upgrade_service = DeviceUpgradeApiService(api_client)
     asa_versions: List[AsaCompatibleVersion] = (
         device_upgrade_service.get_compatible_asa_versions(asa_uid)
@@ -83,13 +89,10 @@ def select_asa_version(asa_uid: str, api_client: ApiClient) -> UpgradeAsaDeviceI
     type=click.Choice(supported_regions),
 )
 @optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
 @click.pass_context
 def cli(ctx: any, api_token: str, region: str) -> None:
-    credentials_service = SccCredentialsService(region=region, api_token=api_token)
-    credentials_service.load_or_prompt_credentials()
-    retrieved_api_token, base_url = credentials_service.get_credentials()
-    ctx.obj["base_url"] = base_url
-    ctx.obj["api_token"] = retrieved_api_token
+    store_credential_options(ctx, region=region, api_token=api_token)
 
 
 @click.command(name="list-versions")
@@ -99,21 +102,39 @@ def cli(ctx: any, api_token: str, region: str) -> None:
     type=str,
     required=False,
 )
+@click.option(
+    "--device-name",
+    help="The name of the ASA to list compatible versions for, instead of its UID.",
+    type=str,
+    required=False,
+)
 @click.pass_context
-def list_versions(ctx: any, asa_uid: str) -> None:
+def list_versions(ctx: any, asa_uid: str, device_name: str) -> None:
     """Retrieve the list of compatible versions for the given ASA UID."""
-    # Add logic to retrieve and display the list of compatible versions
-    with ApiClient(
-        Configuration(host=ctx.obj["base_url"], access_token=ctx.obj["api_token"])
-    ) as api_client:
+    from utils.version_tables import print_asa_versions
+
+    # served by the daemon when one is running, without loading the SDK in this process
+    daemon_client = get_daemon_client(ctx)
+    if daemon_client is not None:
         if asa_uid is None:
-            asa_uid = select_asa(api_client)
+            asa_uid = select_asa(daemon_client, device_name)
+        print_asa_versions(daemon_client.get_compatible_asa_versions(asa_uid))
+        return
 
-        device_upgrade_service = DeviceUpgradeApiService(api_client)
-        asa_versions: List[AsaCompatibleVersion] = (
-            device_upgrade_service.get_compatible_asa_versions(asa_uid)
-        )
-        device_upgrade_service.print_asa_versions(asa_versions)
+    from cdo_sdk_python import AsaCompatibleVersion
+
+    from services.device_upgrade_api_service import DeviceUpgradeApiService
+    from services.inventory_api_service import InventoryApiService
+
+    api_client = get_api_client(ctx)
+    if asa_uid is None:
+        asa_uid = select_asa(InventoryApiService(api_client), device_name)
+
+    device_upgrade_service = DeviceUpgradeApiService(api_client)
+    asa_versions: List[AsaCompatibleVersion] = (
+        device_upgrade_service.get_compatible_asa_versions(asa_uid)
+    )
+    print_asa_versions(asa_versions)
 
 
 @click.command(name="upgrade")
@@ -123,6 +144,12 @@ def list_versions(ctx: any, asa_uid: str) -> None:
     type=str,
     required=False,
 )
+@click.option(
+    "--device-name",
+    help="The name of the ASA to upgrade, instead of its UID.",
+    type=str,
+    required=False,
+)
 @click.option(
     "--software-version",
     help="The software version to upgrade to",
@@ -136,30 +163,38 @@ def list_versions(ctx: any, asa_uid: str) -> None:
     required=False,
 )
 @click.pass_context
-def upgrade(ctx: any, asa_uid: str, software_version: str, asdm_version: str) -> None:
+def upgrade(
+    ctx: any, asa_uid: str, device_name: str, software_version: str, asdm_version: str
+) -> None:
     """Upgrade the ASA to the  specified software version and ASDM version."""
-    # Add logic to retrieve and display the list of compatible versions
-    with ApiClient(
-        Configuration(host=ctx.obj["base_url"], access_token=ctx.obj["api_token"])
-    ) as api_client:
-        if asa_uid is None:
-            asa_uid = select_asa(api_client)
+    from cdo_sdk_python import UpgradeAsaDeviceInput
+    from rich.console import Console
 
-        if software_version is None and asdm_version is None:
-            asa_upgrade_input = select_asa_version(asa_uid, api_client)
-        else:
-            asa_upgrade_input = UpgradeAsaDeviceInput(
-                software_version=software_version,
-                asdm_version=asdm_version,
-            )
+    from services.device_upgrade_api_service import DeviceUpgradeApiService
+    from services.inventory_api_service import InventoryApiService
 
-        device_upgrade_service = DeviceUpgradeApiService(api_client)
-        device_upgrade_service.upgrade_asa(asa_uid, asa_upgrade_input)
+    # Add logic to retrieve and display the list of compatible versions
+    api_client = get_api_client(ctx)
+    if asa_uid is None:
+        asa_uid = select_asa(
+            get_daemon_client(ctx) or InventoryApiService(api_client), device_name
+        )
 
-        Console().print(
-            f"Successfully upgraded ASA with UID: {asa_uid} to the specified versions."
+    if software_version is None and asdm_version is None:
+        asa_upgrade_input = select_asa_version(asa_uid, api_client)
+    else:
+        asa_upgrade_input = UpgradeAsaDeviceInput(
+            software_version=software_version,
+            asdm_version=asdm_version,
         )
 
+    device_upgrade_service = DeviceUpgradeApiService(api_client)
+    device_upgrade_service.upgrade_asa(asa_uid, asa_upgrade_input)
+
+    Console().print(
+        f"Successfully upgraded ASA with UID: {asa_uid} to the specified versions."
+    )
+
 
 cli.add_command(list_versions)
 cli.add_command(upgrade)
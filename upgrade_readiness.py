@@ -0,0 +1,111 @@
+from typing import Tuple
+
+import click
+from click_option_group import AllOptionGroup, optgroup
+
+from export_inventory import resolve_export_format
+from utils.batch_mode import batch_option
+from utils.export_formats import EXPORT_FORMATS
+from utils.region_mapping import supported_regions
+
+
+@click.command(
+    help="Report which devices can be upgraded to the target versions, directly or through an intermediate version, from one inventory query and one compatible versions lookup per model and version."
+)
+@click.option(
+    "--target-version",
+    "target_versions",
+    help="The version to assess the devices against. Can be repeated.",
+    type=str,
+    multiple=True,
+    required=True,
+)
+@click.option(
+    "--device-type",
+    help="The type of the devices to assess.",
+    type=click.Choice(["ftd", "asa"]),
+    default="ftd",
+    show_default=True,
+)
+@click.option(
+    "--query",
+    help="Only assess the devices matching this query, e.g. 'connectivityState:ONLINE'.",
+    type=str,
+)
+@click.option(
+    "--output",
+    "output_file",
+    help="Also write the readiness of every device to this CSV, JSON lines or Parquet file.",
+    type=click.Path(dir_okay=False, writable=True),
+)
+@click.option(
+    "--format",
+    "export_format",
+    help="The format of the output file. Defaults to the one its extension names (.csv, .jsonl, .parquet).",
+    type=click.Choice(EXPORT_FORMATS),
+)
+@click.option(
+    "--max-concurrent-lookups",
+    help="The number of compatible versions lookups made at the same time.",
+    type=int,
+    default=8,
+    show_default=True,
+)
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
+def main(
+    target_versions: Tuple[str, ...],
+    device_type: str,
+    query: str,
+    output_file: str,
+    export_format: str,
+    max_concurrent_lookups: int,
+    region: str,
+    api_token: str,
+) -> None:
+    # the SDK and services are imported here rather than at module load so that --help stays fast
+    from rich.console import Console
+
+    from models.upgrade_readiness import READINESS_COLUMNS
+    from services.api_client_registry import api_client_registry
+    from services.inventory_export_service import open_device_writer
+    from services.scc_credentials_service import SccCredentialsService
+    from services.upgrade_readiness_service import UpgradeReadinessService
+    from utils.version_tables import print_upgrade_readiness
+
+    if output_file:
+        export_format = resolve_export_format(output_file, export_format)
+    credentials_service = SccCredentialsService(region=region, api_token=api_token)
+    credentials_service.load_or_prompt_credentials()
+    api_token, base_url = credentials_service.get_credentials()
+
+    readiness_service = UpgradeReadinessService(
+        api_client_registry.get_api_client(host=base_url, access_token=api_token),
+        max_concurrent_lookups=max_concurrent_lookups,
+    )
+    readiness = readiness_service.assess(device_type, list(target_versions), q=query)
+    for target_version in target_versions:
+        print_upgrade_readiness(
+            target_version,
+            [device for device in readiness if device.target_version == target_version],
+        )
+
+    if output_file:
+        writer = open_device_writer(output_file, export_format, READINESS_COLUMNS)
+        try:
+            writer.write_rows([device.to_row() for device in readiness])
+        finally:
+            writer.close()
+        Console().print(
+            f"[green]Wrote the readiness of {len(readiness)} devices to {output_file}[/green]"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import click
+from click_option_group import AllOptionGroup, optgroup
+
+from utils.batch_mode import batch_mode, batch_option
+from utils.cli_context import store_credential_options, get_api_client
+from utils.region_mapping import supported_regions
+
+
+@click.group(
+    help="Plan FTD upgrades ahead of a maintenance window, then run them in the window, many at a time."
+)
+@optgroup.group("API Credentials", cls=AllOptionGroup)
+@optgroup.option(
+    "--region",
+    help="The region for the API.",
+    type=click.Choice(supported_regions),
+)
+@optgroup.option("--api-token", type=str, help="The API token.")
+@batch_option
+@click.pass_context
+def cli(ctx: any, api_token: str, region: str) -> None:
+    store_credential_options(ctx, region=region, api_token=api_token)
+
+
+@click.command(name="plan")
+@click.argument("plan_file", type=click.Path(dir_okay=False, writable=True))
+@click.option(
+    "--target-version",
+    help="The version to upgrade the FTDs to. FTDs that need an intermediate version are upgraded to it first.",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--query",
+    help="Only plan the FTDs matching this query, e.g. 'connectivityState:ONLINE AND name:branch*'.",
+    type=str,
+)
+@click.option(
+    "--max-devices",
+    help="The number of FTDs in the wave.",
+    type=int,
+)
+@click.pass_context
+def plan(
+    ctx: any, plan_file: str, target_version: str, query: str, max_devices: int
+) -> None:
+    """Find the FTDs that can be upgraded towards the target version and their upgrade packages, and save them to PLAN_FILE."""
+    from rich.console import Console
+
+    from services.upgrade_wave_service import UpgradeWaveService
+
+    wave = UpgradeWaveService(get_api_client(ctx)).plan(
+        target_version, q=query, max_devices=max_devices
+    )
+    wave.save(plan_file)
+    Console().print(
+        f"[green]Planned the upgrade of {len(wave.entries)} FTDs towards {target_version} in {plan_file}[/green]"
+    )
+
+
+@click.command(name="run")
+@click.argument("plan_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--max-concurrent-transfers",
+    help="The number of FTDs upgrading, and downloading their upgrade package, at the same time.",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+)
+@click.option(
+    "--bandwidth-mbps",
+    help="The bandwidth available for upgrade packages. With --mbps-per-transfer, sets the number of upgrades at the same time instead of --max-concurrent-transfers.",
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--mbps-per-transfer",
+    help="The bandwidth each upgrade package download should get.",
+    type=click.FloatRange(min=0, min_open=True),
+    default=50,
+    show_default=True,
+)
+@click.pass_context
+def run(
+    ctx: any,
+    plan_file: str,
+    max_concurrent_transfers: int,
+    bandwidth_mbps: float,
+    mbps_per_transfer: float,
+) -> None:
+    """Upgrade the FTDs planned in PLAN_FILE that have not been upgraded yet."""
+    import sys
+
+    from rich.console import Console
+
+    from models.upgrade_wave import UpgradeWave
+    from services.job_graph import DONE, JobResult
+    from services.upgrade_wave_service import UpgradeWaveService
+
+    try:
+        wave = UpgradeWave.load(plan_file)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="PLAN_FILE")
+    if bandwidth_mbps is not None:
+        max_concurrent_transfers = max(1, int(bandwidth_mbps // mbps_per_transfer))
+
+    console = Console()
+    wave_service = UpgradeWaveService(get_api_client(ctx))
+    # the upgrades run unattended, in parallel
+    batch_mode.enable()
+    entries = wave_service.pending_entries(wave)
+    console.print(
+        f"Upgrading {len(entries)} FTDs ({len(wave.entries) - len(entries)} of the {len(wave.entries)} planned are "
+        f"no longer on their planned version), {max_concurrent_transfers} at a time..."
+    )
+
+    def print_result(result: JobResult) -> None:
+        if result.status == DONE:
+            console.print(
+                f"[green]{result.name}: {result.result} ({result.duration_seconds:.0f}s)[/green]"
+            )
+        else:
+            console.print(f"[red]{result.name}: failed, {result.error}[/red]")
+
+    results = wave_service.run(
+        entries,
+        max_concurrent_transfers=max_concurrent_transfers,
+        on_finished=print_result,
+    )
+    failed = [result for result in results.values() if result.status != DONE]
+    console.print(
+        f"Upgraded {len(results) - len(failed)} FTDs, {len(failed)} failed; run the plan again to retry them."
+        if failed
+        else f"[green]Upgraded {len(results)} FTDs[/green]"
+    )
+    if failed:
+        sys.exit(1)
+
+
+cli.add_command(plan)
+cli.add_command(run)
+
+if __name__ == "__main__":
+    cli(obj={})
@@ -0,0 +1,46 @@
+import os
+
+import click
+
+BATCH_MODE_ENV_VAR = "SCC_BATCH"
+
+
+class BatchModeError(click.UsageError):
+    pass
+
+
+class BatchMode:
+    """Process-wide switch that makes every prompt fail with an error instead, for runs from schedulers and pipelines."""
+
+    def __init__(self):
+        self.enabled = os.environ.get(BATCH_MODE_ENV_VAR, "").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def ensure_can_prompt(self, missing_input: str) -> None:
+        # called before every prompt, so that a batch run fails straight away instead of waiting for input forever
+        if self.enabled:
+            raise BatchModeError(f"{missing_input} is required in batch mode.")
+
+
+batch_mode = BatchMode()
+
+
+def _enable_batch_mode(ctx: click.Context, param: click.Parameter, value: bool) -> None:
+    if value:
+        batch_mode.enable()
+
+
+batch_option = click.option(
+    "--batch",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=_enable_batch_mode,
+    help=f"Never prompt, and fail if an input is missing instead. Can also be enabled with {BATCH_MODE_ENV_VAR}=1.",
+)
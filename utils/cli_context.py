@@ -0,0 +1,79 @@
+from typing import Optional, Tuple, TYPE_CHECKING
+
+import click
+
+if TYPE_CHECKING:
+    from cdo_sdk_python import ApiClient
+
+    from services.daemon_client import DaemonClient
+
+
+def store_credential_options(ctx: click.Context, region: str, api_token: str) -> None:
+    # credentials are only loaded (and validated) when a command needs them, so --help never touches the API
+    ctx.ensure_object(dict)
+    ctx.obj["region"] = region
+    ctx.obj["api_token"] = api_token
+
+
+def get_base_url_and_api_token(ctx: click.Context) -> Tuple[str, str]:
+    if "base_url" not in ctx.obj:
+        from services.scc_credentials_service import SccCredentialsService
+
+        credentials_service = SccCredentialsService(
+            region=ctx.obj.get("region"), api_token=ctx.obj.get("api_token")
+        )
+        credentials_service.load_or_prompt_credentials()
+        retrieved_api_token, base_url = credentials_service.get_credentials()
+        ctx.obj["base_url"] = base_url
+        ctx.obj["region"] = credentials_service.region
+        ctx.obj["api_token"] = retrieved_api_token
+    return ctx.obj["base_url"], ctx.obj["api_token"]
+
+
+def get_api_client(ctx: click.Context) -> "ApiClient":
+    from services.api_client_registry import api_client_registry
+
+    base_url, api_token = get_base_url_and_api_token(ctx)
+    return api_client_registry.get_api_client(host=base_url, access_token=api_token)
+
+
+def get_daemon_client(
+    ctx: click.Context, socket_path: str = None
+) -> Optional["DaemonClient"]:
+    """
+    Returns a client for the running daemon, or None when there is none serving the credentials of this command: those
+    given on the command line, or else the ones in ~/.cisco-security.yaml.
+    """
+    from services.daemon_client import DEFAULT_SOCKET_PATH, DaemonClient
+
+    credentials = _get_region_and_api_token_without_prompting(ctx)
+    if credentials is None:
+        return None
+    region, api_token = credentials
+    daemon_client = DaemonClient(
+        socket_path=socket_path or DEFAULT_SOCKET_PATH,
+        region=region,
+        api_token=api_token,
+    )
+    return daemon_client if daemon_client.is_available() else None
+
+
+def _get_region_and_api_token_without_prompting(
+    ctx: click.Context,
+) -> Optional[Tuple[str, str]]:
+    # not validated: the daemon only serves a token it validated itself, which it recognises by its digest
+    if "base_url" in ctx.obj or (ctx.obj.get("region") and ctx.obj.get("api_token")):
+        return ctx.obj["region"], ctx.obj["api_token"]
+
+    import os
+
+    from services.scc_credentials_service import SccCredentialsService
+
+    credentials_service = SccCredentialsService()
+    if not os.path.exists(credentials_service.config_file_path):
+        return None
+    try:
+        credentials_service.load_credentials()
+    except ValueError:
+        return None
+    return credentials_service.region, credentials_service.api_token
@@ -0,0 +1,104 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import click
+from prompt_toolkit.completion import Completer, Completion, ThreadedCompleter
+
+from utils.query import escape_query_value
+
+
+class DevicePicker:
+    """
+    Picks one device out of an inventory of any size: the interactive prompt searches the inventory by name prefix as
+    you type, one page at a time, and a name given on the command line is looked up with a single query.
+    Every device seen is indexed by its label, which includes its UID, so devices with the same name stay distinct.
+    """
+
+    def __init__(
+        self, device_source: Any, base_query: str, device_kind: str, page_size=25
+    ):
+        # device_source is an InventoryApiService, or a DaemonClient serving the inventory from its cache
+        self.device_source = device_source
+        self.base_query = base_query
+        self.device_kind = device_kind
+        self.page_size = page_size
+        self.uids_by_label: Dict[str, str] = {}
+        self._pages: Dict[str, List[Any]] = {}
+
+    def resolve(self, device_name: str) -> str:
+        devices = self.device_source.search_devices(
+            q=f"{self.base_query} AND name:{escape_query_value(device_name)}",
+            limit=self.page_size,
+        )
+        devices = [device for device in devices if device.name == device_name]
+        if len(devices) == 0:
+            raise click.BadParameter(
+                f"No online {self.device_kind} named {device_name}."
+            )
+        if len(devices) > 1:
+            raise click.BadParameter(
+                f"{len(devices)} online {self.device_kind}s are named {device_name}, pass one of their UIDs instead: "
+                f"{', '.join(device.uid for device in devices)}"
+            )
+        return devices[0].uid
+
+    def pick(self, message: str) -> str:
+        import questionary
+
+        label = questionary.autocomplete(
+            message,
+            choices=[],
+            # searches run in the background, so typing never waits for the API
+            completer=ThreadedCompleter(_DeviceCompleter(self)),
+            validate=lambda text: text in self.uids_by_label
+            or f"Type to search, and pick an {self.device_kind} from the list",
+        ).ask()
+        if label is None:
+            raise click.Abort()
+        return self.uids_by_label[label]
+
+    def search(self, name_prefix: str) -> List[Any]:
+        if name_prefix in self._pages:
+            return self._pages[name_prefix]
+        # a shorter prefix that matched less than a page already holds every match, so no query is needed
+        for length in range(len(name_prefix) - 1, -1, -1):
+            page = self._pages.get(name_prefix[:length])
+            if page is not None and len(page) < self.page_size:
+                devices = [
+                    device
+                    for device in page
+                    if device.name.lower().startswith(name_prefix.lower())
+                ]
+                break
+        else:
+            query = self.base_query
+            if name_prefix:
+                query += f" AND name:{escape_query_value(name_prefix)}*"
+            devices = self.device_source.search_devices(q=query, limit=self.page_size)
+        self._pages[name_prefix] = devices
+        for device in devices:
+            self.uids_by_label[self.label(device)] = device.uid
+        return devices
+
+    @staticmethod
+    def label(device: Any) -> str:
+        return f"{device.name} ({device.uid})"
+
+    @staticmethod
+    def description(device: Any) -> Optional[str]:
+        return device.software_version
+
+
+class _DeviceCompleter(Completer):
+    def __init__(self, picker: DevicePicker):
+        self.picker = picker
+
+    def get_completions(self, document, complete_event) -> Iterable[Completion]:
+        text = document.text_before_cursor
+        if text in self.picker.uids_by_label:
+            return
+        for device in self.picker.search(text.strip()):
+            yield Completion(
+                self.picker.label(device),
+                start_position=-len(text),
+                display_meta=self.picker.description(device),
+            )
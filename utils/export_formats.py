@@ -0,0 +1,9 @@
+from typing import Optional
+
+# kept apart from the export service, so that commands can offer the formats without loading the SDK
+EXPORT_FORMATS = ["csv", "jsonl", "parquet"]
+
+
+def export_format_of(output_file: str) -> Optional[str]:
+    extension = output_file.rsplit(".", 1)[-1].lower()
+    return {"ndjson": "jsonl"}.get(extension, extension) if extension else None
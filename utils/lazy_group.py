@@ -0,0 +1,22 @@
+import importlib
+from typing import Dict, List
+
+import click
+
+
+class LazyGroup(click.Group):
+    """A click group that only imports a subcommand's module when the subcommand is looked up."""
+
+    def __init__(self, *args, lazy_subcommands: Dict[str, str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # maps a command name to "module:attribute"
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazy_subcommands:
+            module_name, attribute_name = self.lazy_subcommands[cmd_name].split(":")
+            return getattr(importlib.import_module(module_name), attribute_name)
+        return super().get_command(ctx, cmd_name)
@@ -0,0 +1,8 @@
+import re
+
+# the characters that would otherwise be read as Lucene syntax in a query value, such as a device or user name
+_QUERY_SPECIAL_CHARACTERS = re.compile(r'([\s"\\:()*?\[\]{}^~!+&|/])')
+
+
+def escape_query_value(value: str) -> str:
+    return _QUERY_SPECIAL_CHARACTERS.sub(r"\\\1", value)
@@ -0,0 +1,86 @@
+from typing import List, Any
+
+from rich.console import Console
+from rich.table import Table
+
+
+# these only read attributes, so they print SDK models and the plain records returned by the daemon alike
+def print_ftd_versions(versions: List[Any]) -> None:
+    table = Table(title="Compatible FTD versions")
+
+    table.add_column("Version", justify="center")
+    table.add_column("Upgrade Package UID", justify="center")
+    table.add_column("Suggested Release", justify="center")
+
+    for version in versions:
+        table.add_row(
+            version.software_version,
+            version.upgrade_package_uid,
+            "Yes" if version.is_suggested_version else "No",
+        )
+
+    console = Console()
+    console.print(table)
+
+
+def print_asa_versions(versions: List[Any]) -> None:
+    table = Table(title="Compatible ASA versions")
+
+    table.add_column("Software Version", justify="center")
+    table.add_column("ASDM Version", justify="center")
+
+    for version in versions:
+        table.add_row(
+            version.software_version,
+            version.asdm_version,
+        )
+
+    console = Console()
+    console.print(table)
+
+
+def print_upgrade_readiness(target_version: str, readiness: List[Any]) -> None:
+    # one row per model and current version, as every device in such a group has the same upgrade path
+    from collections import Counter
+
+    groups = Counter(
+        (
+            device.hardware_model or "",
+            device.software_version or "",
+            device.status,
+            " > ".join(device.upgrade_path),
+            device.highest_reachable_version or "",
+        )
+        for device in readiness
+    )
+    statuses = Counter(device.status for device in readiness)
+    table = Table(
+        title=f"Readiness for {target_version}: "
+        + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+    )
+
+    table.add_column("Model", justify="center")
+    table.add_column("Current Version", justify="center")
+    table.add_column("Devices", justify="right")
+    table.add_column("Status", justify="center")
+    table.add_column("Upgrade Path", justify="center")
+    table.add_column("Highest Reachable Version", justify="center")
+
+    for (
+        hardware_model,
+        software_version,
+        status,
+        upgrade_path,
+        highest_reachable_version,
+    ), count in sorted(groups.items()):
+        table.add_row(
+            hardware_model,
+            software_version,
+            str(count),
+            status,
+            upgrade_path,
+            highest_reachable_version,
+        )
+
+    console = Console()
+    console.print(table)